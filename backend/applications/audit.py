@@ -0,0 +1,280 @@
+# applications/audit.py
+"""
+Asynchronous audit trail for bookings, ledger, entity and user changes.
+
+Session events turn every flushed insert/update/delete of a tracked model into a record
+holding the changed columns as {column: [before, after]}. Records wait in session.info until
+the transaction commits (a rollback drops them), are then appended to an in-memory deque, and
+a background thread writes them in batches to the append-only audit_log table or to a
+rotating JSONL file. The request thread only pays for the attribute-history walk and a
+deque.extend().
+
+Statements that bypass the flush (bulk_update_mappings, Query.update/delete, Core inserts)
+are recorded per parameter row when the statement carries them, otherwise once per statement
+with row_id NULL. Their "before" values are unknown and stored as null.
+
+Config: AUDIT_BACKEND (db | jsonl | none), AUDIT_LOG_PATH, AUDIT_FLUSH_INTERVAL,
+AUDIT_BATCH_SIZE, AUDIT_QUEUE_MAX, AUDIT_MAX_BYTES, AUDIT_BACKUP_COUNT.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, date
+from decimal import Decimal
+
+from flask import g, has_request_context
+from sqlalchemy import event, inspect
+
+from applications.model import (
+    db, AuditLog, User, Customer, Agent, Partner, Particular, Passenger, TravelLocation,
+    TicketType, VisaType, Ticket, Visa, Service, Transaction
+)
+
+logger = logging.getLogger(__name__)
+
+TRACKED_MODELS = (
+    Ticket, Visa, Service, Transaction,
+    Customer, Agent, Partner, Particular, Passenger, TravelLocation, TicketType, VisaType,
+    User,
+)
+REDACTED_COLUMNS = {'users': {'password'}}
+# Bookkeeping columns whose changes alone are not worth an audit record (every login touches last_seen)
+IGNORED_COLUMNS = {'users': {'last_seen'}}
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if value is None or isinstance(value, (str, int, float, bool, list, dict)):
+        return value
+    return str(value)
+
+
+def _column_value(table, column, value):
+    if column in REDACTED_COLUMNS.get(table, ()):
+        return '***'
+    return _jsonable(value)
+
+
+def _actor():
+    if has_request_context():
+        user_id = getattr(g, 'user_id', None)
+        try:
+            user_id = int(user_id) if user_id is not None else None
+        except (TypeError, ValueError):
+            user_id = None
+        return user_id, getattr(g, 'username', None)
+    return None, 'system'
+
+
+def _record(action, table, row_id, changes):
+    user_id, username = _actor()
+    return {
+        'occurred_at': datetime.now(),
+        'user_id': user_id,
+        'username': username,
+        'action': action,
+        'table_name': table,
+        'row_id': row_id,
+        'changes': changes,
+    }
+
+
+def _object_changes(obj, table, action):
+    state = inspect(obj)
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        key = attr.key
+        if action == 'update':
+            if key in IGNORED_COLUMNS.get(table, ()):
+                continue
+            history = state.attrs[key].history
+            if not history.has_changes():
+                continue
+            before = history.deleted[0] if history.deleted else None
+            after = history.added[0] if history.added else None
+            if before == after:
+                continue
+            changes[key] = [_column_value(table, key, before), _column_value(table, key, after)]
+        else:
+            # Loaded values only: reading an expired attribute here would emit a SELECT mid-flush
+            value = _column_value(table, key, state.dict.get(key))
+            changes[key] = [None, value] if action == 'insert' else [value, None]
+    return changes
+
+
+class AuditTrail:
+    def __init__(self):
+        self.backend = 'none'
+        self.app = None
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        self.written = 0
+        self.dropped = 0
+        self.failures = 0
+
+    def init_app(self, app, session):
+        self.app = app
+        self.backend = app.config.get('AUDIT_BACKEND', 'db')
+        self.path = app.config.get('AUDIT_LOG_PATH')
+        self.flush_interval = app.config.get('AUDIT_FLUSH_INTERVAL', 1.0)
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', 500)
+        self.queue_max = app.config.get('AUDIT_QUEUE_MAX', 100000)
+        self.max_bytes = app.config.get('AUDIT_MAX_BYTES', 10 * 1024 * 1024)
+        self.backup_count = app.config.get('AUDIT_BACKUP_COUNT', 5)
+        self._tracked = {model.__table__.name: model for model in TRACKED_MODELS}
+        app.extensions['audit_trail'] = self
+        if self.backend == 'none':
+            return
+
+        event.listen(session, 'after_flush', self._collect_flushed)
+        event.listen(session, 'do_orm_execute', self._collect_bulk)
+        event.listen(session, 'after_commit', self._after_commit)
+        event.listen(session, 'after_rollback', lambda s: s.info.pop('audit_records', None))
+        atexit.register(self.flush)
+
+    # --- capture (request thread) ---
+
+    def _collect_flushed(self, session, flush_context):
+        records = None
+        for action, objects in (('insert', session.new), ('update', session.dirty), ('delete', session.deleted)):
+            for obj in objects:
+                table = getattr(obj, '__tablename__', None)
+                if table not in self._tracked:
+                    continue
+                changes = _object_changes(obj, table, action)
+                if not changes:
+                    continue
+                if records is None:
+                    records = session.info.setdefault('audit_records', [])
+                records.append(_record(action, table, getattr(obj, 'id', None), changes))
+
+    def _collect_bulk(self, orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is None or table.name not in self._tracked:
+            return
+        action = 'insert' if orm_execute_state.is_insert else ('bulk_update' if orm_execute_state.is_update else 'bulk_delete')
+        records = orm_execute_state.session.info.setdefault('audit_records', [])
+
+        rows = orm_execute_state.parameters
+        if isinstance(rows, dict):
+            rows = [rows] if rows else []
+        if rows:
+            for row in rows:
+                changes = {key: [None, _column_value(table.name, key, value)] for key, value in row.items() if key != 'id'}
+                records.append(_record(action, table.name, row.get('id'), changes))
+        else:
+            # Query.update()/delete() with a WHERE clause: one record for the statement
+            records.append(_record(action, table.name, None, {'statement': [None, str(orm_execute_state.statement)]}))
+
+    def _after_commit(self, session):
+        records = session.info.pop('audit_records', None)
+        if not records:
+            return
+        overflow = len(self._queue) + len(records) - self.queue_max
+        if overflow > 0:
+            # Writer is far behind: shed the oldest records rather than grow without bound
+            for _ in range(min(overflow, len(self._queue))):
+                self._queue.popleft()
+            self.dropped += overflow
+        self._queue.extend(records)
+        self._ensure_writer()
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    # --- writer (background thread) ---
+
+    def _ensure_writer(self):
+        # Started lazily and per process so pre-forked workers each get their own thread
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._thread_lock:
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit writer failed")
+
+    def flush(self):
+        """Write everything queued so far; safe to call from any thread."""
+        with self._write_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                try:
+                    self._write(batch)
+                except Exception:
+                    # Put the batch back and retry on the next cycle
+                    self._queue.extendleft(reversed(batch))
+                    self.failures += 1
+                    raise
+                self.written += len(batch)
+
+    def _write(self, batch):
+        if self.backend == 'jsonl':
+            self._write_jsonl(batch)
+        else:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(AuditLog.__table__.insert(), batch)
+
+    def _write_jsonl(self, batch):
+        lines = ''.join(json.dumps(record, default=_jsonable) + '\n' for record in batch)
+        if os.path.exists(self.path) and os.path.getsize(self.path) + len(lines) > self.max_bytes:
+            self._rotate()
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            fh.write(lines)
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            src, dst = f"{self.path}.{i}", f"{self.path}.{i + 1}"
+            if os.path.exists(src):
+                os.replace(src, dst)
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def after_fork(self):
+        """
+        Start clean in a forked worker: queued records belong to the parent (which flushes them),
+        and its writer thread and locks did not survive the fork.
+        """
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'pending': len(self._queue),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failures': self.failures,
+        }
+
+
+audit_trail = AuditTrail()
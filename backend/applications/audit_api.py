@@ -0,0 +1,76 @@
+# applications/audit_api.py
+from datetime import datetime
+from flask import request
+from flask_restful import Resource
+from applications.model import AuditLog
+from applications.utils import require_admin
+from applications.audit import audit_trail
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def _parse_datetime(value, field):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {field}; expected ISO date or datetime")
+
+
+class AuditLogAPI(Resource):
+    @require_admin
+    def get(self, table_name=None, row_id=None):
+        """
+        GET /api/audit?table=ticket&row_id=5&user_id=2&action=update&start=2025-01-01&end=...&before_id=...&limit=100
+        GET /api/audit/<table_name>/<row_id> - history of one row
+
+        Newest first. Every filter maps onto an index (table_name+row_id, user_id, occurred_at);
+        page with before_id=<next_before_id> from the previous response.
+        """
+        if audit_trail.backend != 'db':
+            return {"error": f"Audit trail is not stored in the database (backend: {audit_trail.backend})"}, 400
+
+        args = request.args
+        table_name = table_name or args.get('table')
+        row_id = row_id if row_id is not None else args.get('row_id', type=int)
+        try:
+            limit = min(int(args.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+            start = _parse_datetime(args['start'], 'start') if args.get('start') else None
+            end = _parse_datetime(args['end'], 'end') if args.get('end') else None
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        # Records still queued in this process become visible before we read
+        audit_trail.flush()
+
+        query = AuditLog.query
+        if table_name:
+            query = query.filter(AuditLog.table_name == table_name)
+        if row_id is not None:
+            query = query.filter(AuditLog.row_id == row_id)
+        if args.get('user_id', type=int) is not None:
+            query = query.filter(AuditLog.user_id == args.get('user_id', type=int))
+        if args.get('action'):
+            query = query.filter(AuditLog.action == args['action'])
+        if start:
+            query = query.filter(AuditLog.occurred_at >= start)
+        if end:
+            query = query.filter(AuditLog.occurred_at <= end)
+        if args.get('before_id', type=int):
+            query = query.filter(AuditLog.id < args.get('before_id', type=int))
+
+        entries = query.order_by(AuditLog.id.desc()).limit(limit).all()
+        return {
+            "entries": [{
+                "id": e.id,
+                "occurred_at": e.occurred_at.isoformat(),
+                "user_id": e.user_id,
+                "username": e.username,
+                "action": e.action,
+                "table": e.table_name,
+                "row_id": e.row_id,
+                "changes": e.changes,
+            } for e in entries],
+            "next_before_id": entries[-1].id if len(entries) == limit else None,
+            "writer": audit_trail.stats(),
+        }, 200
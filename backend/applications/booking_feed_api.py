@@ -0,0 +1,172 @@
+# applications/booking_feed_api.py
+"""
+GET /api/bookings: tickets, visas and services in one date-ordered feed, e.g. a customer's
+booking history, in one request instead of three full list fetches.
+
+The feed is a UNION ALL of one SELECT per booking table, each returning the same row shape.
+Filters go into every branch:
+- customer_id, agent_id
+- status (default all)
+- start_date/end_date
+- search_query (through the search index)
+- types: comma-separated subset of ticket,visa,service
+
+Pagination is keyset only, on (date, feed_id). feed_id = id * 3 + table code, so rows from
+different tables never tie. Each branch applies the cursor, orders by its own date index and
+stops at per_page + 1 rows. The outer query then merges those short lists, so a page reads
+at most 3 x (per_page + 1) rows, however deep it is. Cursors are the opaque tokens of
+applications/pagination.py.
+
+?include_total=1 adds the matching row count (sum of the branch counts, cached in
+result_cache).
+"""
+from datetime import datetime
+
+from flask import request
+from flask_restful import Resource
+from sqlalchemy import func, literal, null, or_, select, union_all
+
+from applications.utils import check_permission
+from applications.model import db, Customer, Agent, Partner, Passenger, Ticket, Visa, Service, TicketType, VisaType, Particular
+from applications.search_index import search_condition
+from applications.pagination import SortKey, decode_cursor, encode_cursor, keyset_filter
+from applications.result_cache import result_cache
+
+# booking type -> (model, type lookup, foreign key to it, table code for feed_id)
+BOOKING_TYPES = {
+    'ticket': (Ticket, TicketType, 'ticket_type_id', 0),
+    'visa': (Visa, VisaType, 'visa_type_id', 1),
+    'service': (Service, Particular, 'particular_id', 2),
+}
+FEED_TABLES = ['ticket', 'visa', 'service', 'customer', 'agent', 'partner', 'passenger',
+               'ticket_type', 'visa_type', 'particular']
+
+
+def _feed_id(model, code):
+    return model.id * len(BOOKING_TYPES) + code
+
+
+def _branch_columns(booking_type, model, type_model, code):
+    has_agent = hasattr(model, 'agent_id')
+    return [
+        literal(booking_type).label('booking_type'),
+        model.id.label('id'),
+        _feed_id(model, code).label('feed_id'),
+        model.ref_no.label('ref_no'),
+        model.date.label('date'),
+        model.status.label('status'),
+        model.customer_id.label('customer_id'),
+        Customer.name.label('customer_name'),
+        (model.agent_id if has_agent else null()).label('agent_id'),
+        (Agent.name if has_agent else null()).label('agent_name'),
+        (Partner.name if has_agent else null()).label('partner_name'),
+        (Passenger.name if has_agent else null()).label('passenger_name'),
+        type_model.name.label('item_name'),
+        model.customer_charge.label('customer_charge'),
+        (model.agent_paid if has_agent else null()).label('agent_paid'),
+        (model.profit if has_agent else null()).label('profit'),
+        model.customer_payment_mode.label('customer_payment_mode'),
+        model.customer_refund_amount.label('customer_refund_amount'),
+        model.description.label('description'),
+    ]
+
+
+def _branch(booking_type, filters):
+    """SELECT for one table with every filter applied, or None if the filters exclude it."""
+    model, type_model, type_fk, code = BOOKING_TYPES[booking_type]
+    has_agent = hasattr(model, 'agent_id')
+    if filters['agent_id'] is not None and not has_agent:
+        return None
+
+    stmt = select(*_branch_columns(booking_type, model, type_model, code))\
+        .select_from(model)\
+        .outerjoin(Customer, model.customer_id == Customer.id)\
+        .outerjoin(type_model, getattr(model, type_fk) == type_model.id)
+    if has_agent:
+        stmt = stmt.outerjoin(Agent, model.agent_id == Agent.id)\
+                   .outerjoin(Partner, model.partner_id == Partner.id)\
+                   .outerjoin(Passenger, model.passenger_id == Passenger.id)
+
+    if filters['customer_id'] is not None:
+        stmt = stmt.where(model.customer_id == filters['customer_id'])
+    if filters['agent_id'] is not None:
+        stmt = stmt.where(model.agent_id == filters['agent_id'])
+    if filters['status'] != 'all':
+        stmt = stmt.where(model.status == filters['status'])
+    if filters['start_date'] and filters['end_date']:
+        stmt = stmt.where(model.date.between(filters['start_date'], filters['end_date']))
+    if filters['search_query']:
+        matches = search_condition(booking_type, model.id, filters['search_query'])
+        if matches is None:
+            search_pattern = f"%{filters['search_query'].lower()}%"
+            names = [model.ref_no, Customer.name, type_model.name]
+            if has_agent:
+                names += [Agent.name, Passenger.name]
+            matches = or_(*(func.lower(name).like(search_pattern) for name in names))
+        stmt = stmt.where(matches)
+    return stmt
+
+
+class BookingFeedResource(Resource):
+    @check_permission()
+    def get(self):
+        args = request.args
+        try:
+            filters = {
+                'customer_id': args.get('customer_id', type=int),
+                'agent_id': args.get('agent_id', type=int),
+                'status': args.get('status', 'all'),
+                'search_query': args.get('search_query', '').strip(),
+                'start_date': None,
+                'end_date': None,
+            }
+            if args.get('start_date') and args.get('end_date'):
+                filters['start_date'] = datetime.strptime(args['start_date'], '%Y-%m-%d').date()
+                filters['end_date'] = datetime.strptime(args['end_date'], '%Y-%m-%d').date()
+        except ValueError:
+            return {'error': 'Invalid date format. Use YYYY-MM-DD.'}, 400
+
+        types = [t.strip() for t in args.get('types', ','.join(BOOKING_TYPES)).split(',') if t.strip()]
+        unknown = set(types) - set(BOOKING_TYPES)
+        if unknown:
+            return {'error': f"Unknown booking type(s): {', '.join(sorted(unknown))}"}, 400
+        per_page = max(args.get('per_page', 20, type=int), 1)
+        descending = args.get('sort_order', 'desc') != 'asc'
+
+        branches = {t: b for t in types if (b := _branch(t, filters)) is not None}
+        result = {'data': [], 'per_page': per_page, 'next_cursor': None}
+        if args.get('include_total') == '1':
+            result['total'] = result_cache.get_or_set(
+                'booking_feed_total', {**filters, 'types': sorted(branches)}, FEED_TABLES,
+                lambda: sum(db.session.execute(
+                    select(func.count()).select_from(stmt.subquery())
+                ).scalar() for stmt in branches.values())
+            )
+        if not branches:
+            return result, 200
+
+        cursor = args.get('cursor')
+        limited = []
+        for booking_type, stmt in branches.items():
+            model, _, _, code = BOOKING_TYPES[booking_type]
+            sort_key = SortKey('date', model.date, _feed_id(model, code), descending)
+            if cursor:
+                stmt = stmt.where(keyset_filter(sort_key, *decode_cursor(sort_key, cursor)))
+            # Own ORDER BY + LIMIT per branch: each walks its date index and stops early
+            order = [model.date.desc(), model.id.desc()] if descending else [model.date.asc(), model.id.asc()]
+            limited.append(select(stmt.order_by(*order).limit(per_page + 1).subquery()))
+
+        feed = union_all(*limited).subquery()
+        order = [feed.c.date.desc(), feed.c.feed_id.desc()] if descending else [feed.c.date.asc(), feed.c.feed_id.asc()]
+        rows = db.session.execute(select(feed).order_by(*order).limit(per_page + 1)).mappings().all()
+
+        result['data'] = [self._format_row(row) for row in rows[:per_page]]
+        if len(rows) > per_page:
+            last = rows[per_page - 1]
+            result['next_cursor'] = encode_cursor(SortKey('date', None, None, descending), last['date'], last['feed_id'])
+        return result, 200
+
+    def _format_row(self, row):
+        data = {key: value for key, value in row.items() if key != 'feed_id'}
+        data['date'] = row['date'].isoformat() if row['date'] else None
+        return data
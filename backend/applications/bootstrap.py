@@ -1,6 +1,12 @@
 # applications/bootstrap.py
 
-from applications.model import db, User, Role, Page, Permission
+import hashlib
+import json
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from applications.model import db, User, Role, Page, Permission, AppMeta, role_permissions
+from applications.permission_catalog import invalidate_catalog
+from applications import search_index
 
 # Map URL segments to SQLAlchemy models for generic CRUD routing
 from applications.model import User as UserModel, Role as RoleModel, Page as PageModel
@@ -10,81 +16,175 @@ RESOURCE_MODELS = {
     'pages': PageModel
 }
 
+PAGE_DEFS = [
+    ("Dashboard",      "/dashboard"),
+    ("UserManagement", "/users"),
+    ("Settings",       "/settings"),
+]
+PERMISSION_OPS = ["none", "read", "write", "modify" , "full" ]
+DEFAULT_ROLES = ["admin", "manager", "user"]
 
-def init_pages():
+SEED_VERSION_KEY = 'seed_version'
+
+
+def seed_version():
     """
-    Initialize Page entries for each UI route.
+    Fingerprint of the table/column layout plus the seed definitions above.
+    Changes whenever a model gains a table, column or index, the default pages/roles change or the
+    search index (applications/search_index.py) is redefined.
     """
-    page_defs = [
-        ("Dashboard",      "/dashboard"),
-        ("UserManagement", "/users"),
-        ("Settings",       "/settings"),
+    schema = [
+        (table.name, sorted(column.name for column in table.columns), sorted(index.name for index in table.indexes))
+        for table in db.metadata.sorted_tables
     ]
-    for name, route in page_defs:
-        if not Page.query.filter_by(name=name).first():
-            db.session.add(Page(name=name, route=route))
-    db.session.commit()
+    payload = json.dumps([schema, PAGE_DEFS, PERMISSION_OPS, DEFAULT_ROLES, search_index.SEARCH_INDEX_VERSION])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def stored_seed_version():
+    try:
+        return db.session.query(AppMeta.value).filter(AppMeta.key == SEED_VERSION_KEY).scalar()
+    except SQLAlchemyError:
+        # First boot: app_meta does not exist yet
+        db.session.rollback()
+        return None
 
 
-def init_permissions():
+def store_seed_version(version):
+    meta = db.session.get(AppMeta, SEED_VERSION_KEY)
+    if meta:
+        meta.value = version
+    else:
+        db.session.add(AppMeta(key=SEED_VERSION_KEY, value=version))
+
+
+def sync_schema():
     """
-    Create read/write/none Permission for every Page.
+    Add nullable columns and indexes that exist on the models but not yet in the database.
+    db.create_all() only creates missing tables, so new columns/indexes on existing tables land here.
     """
-    ops = ["none", "read", "write", "modify" , "full" ]
-    for page in Page.query.all():
-        for op in ops:
-            if not Permission.query.filter_by(
-                page_id=page.id,
-                crud_operation=op
-            ).first():
-                db.session.add(
-                    Permission(page_id=page.id, crud_operation=op)
-                )
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=db.session.connection())
     db.session.commit()
 
 
+def init_pages():
+    """
+    Initialize Page entries for each UI route. Returns every page id.
+    """
+    pages = dict(db.session.query(Page.name, Page.id).all())
+    missing = [{"name": name, "route": route} for name, route in PAGE_DEFS if name not in pages]
+    if missing:
+        db.session.execute(Page.__table__.insert(), missing)
+        pages = dict(db.session.query(Page.name, Page.id).all())
+    return list(pages.values())
+
 
-def init_roles():
+def init_permissions(page_ids):
     """
-    Create default roles and assign admin full-write permissions.
+    Create every PERMISSION_OPS Permission for every Page. Returns the ids of the write permissions.
     """
-    for rn in ["admin", "manager", "user"]:
-        if not Role.query.filter_by(name=rn).first():
-            db.session.add(Role(name=rn))
-    db.session.commit()
-    
-    # Admin gets all write permissions
-    admin = Role.query.filter_by(name="admin").first()
-    write_perms = Permission.query.filter_by(crud_operation="write").all()
-    admin.permissions = write_perms
-    db.session.commit()
+    existing = {(page_id, op): perm_id for perm_id, page_id, op in db.session.query(
+        Permission.id, Permission.page_id, Permission.crud_operation
+    ).all()}
+    missing = [
+        {"page_id": page_id, "crud_operation": op}
+        for page_id in page_ids for op in PERMISSION_OPS
+        if (page_id, op) not in existing
+    ]
+    if missing:
+        db.session.execute(Permission.__table__.insert(), missing)
+        existing = {(page_id, op): perm_id for perm_id, page_id, op in db.session.query(
+            Permission.id, Permission.page_id, Permission.crud_operation
+        ).all()}
+    return {perm_id for (page_id, op), perm_id in existing.items() if op == "write"}
 
 
-def init_admin_user():
+def init_roles(write_perm_ids):
+    """
+    Create default roles and assign admin full-write permissions. Returns the admin role id.
+    """
+    roles = dict(db.session.query(Role.name, Role.id).all())
+    missing = [{"name": name} for name in DEFAULT_ROLES if name not in roles]
+    if missing:
+        db.session.execute(Role.__table__.insert(), missing)
+        roles = dict(db.session.query(Role.name, Role.id).all())
+
+    # Admin gets exactly the write permissions
+    admin_id = roles["admin"]
+    current = {perm_id for (perm_id,) in db.session.query(role_permissions.c.permission_id).filter(
+        role_permissions.c.role_id == admin_id
+    )}
+    if current - write_perm_ids:
+        db.session.execute(role_permissions.delete().where(
+            role_permissions.c.role_id == admin_id,
+            role_permissions.c.permission_id.in_(current - write_perm_ids)
+        ))
+    if write_perm_ids - current:
+        db.session.execute(role_permissions.insert(), [
+            {"role_id": admin_id, "permission_id": perm_id} for perm_id in write_perm_ids - current
+        ])
+    return admin_id
+
+
+def init_admin_user(admin_role_id):
     """
     Create a global_admin with admin role if none exists.
     """
-    if not User.query.filter_by(name="admin").first():
-        admin_role = Role.query.filter_by(name="admin").first()
-        u = User(name="admin", full_name="Administrator", role_id=admin_role.id, status="active")
-        u.role = admin_role
+    if not db.session.query(User.id).filter_by(name="admin").first():
+        u = User(name="admin", full_name="Administrator", role_id=admin_role_id, status="active")
         u.set_password("admin")
-        try:
-            u.validate()
-            db.session.add(u)
-            db.session.commit()
-            print("✔ ADMIN created")
-        except Exception:
-            db.session.rollback()
-            print("✘ failed to create ADMIN")
+        u.validate()
+        db.session.add(u)
+        return True
+    return False
+
 
+def seed():
+    page_ids = init_pages()
+    write_perm_ids = init_permissions(page_ids)
+    admin_role_id = init_roles(write_perm_ids)
+    return init_admin_user(admin_role_id)
 
-def initialize_system():
+
+def initialize_system(force=False):
     """
-    Call all initialization routines.
+    Create tables and seed defaults, unless the stored seed version says this exact
+    schema + seed has already been applied (one indexed read on a warm boot).
     """
-    init_pages()
-    init_permissions()
-    init_roles()
-    init_admin_user()
+    version = seed_version()
+    if not force and stored_seed_version() == version:
+        return False
+
+    db.create_all()
+    sync_schema()
+    search_index.install(force=force)
+    try:
+        admin_created = seed()
+        store_seed_version(version)
+        db.session.commit()
+    except IntegrityError:
+        # Another worker seeded concurrently; its rows are there now, so one more pass only fills gaps
+        db.session.rollback()
+        admin_created = seed()
+        store_seed_version(version)
+        db.session.commit()
+    if admin_created:
+        print("✔ ADMIN created")
+    # Seeded pages/permissions must reach workers that already loaded the catalog
+    invalidate_catalog()
+    return True
 
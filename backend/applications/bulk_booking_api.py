@@ -0,0 +1,258 @@
+# applications/bulk_booking_api.py
+"""
+POST /api/bookings/import/<ticket|visa|service>: book many rows in one request, e.g. an
+airline batch entered from the back office.
+
+Rows come as a JSON body {"rows": [...]} or as a multipart CSV upload in field "file", with a
+header row of the same field names the single-booking endpoints take. Every row is validated
+before anything is written:
+- required fields, numbers, dates and payment modes
+- customers, agents and lookup ids, each loaded with one query per table
+- wallet and credit, booked in row order against one in-memory copy of each customer and
+  agent, as if the rows had been booked one by one
+
+If any row fails, nothing is saved and the response is 207 with the error rows. Otherwise:
+- rows without a ref_no get a consecutive block of ref numbers from one max() lookup
+- bookings go in with one flush
+- each customer and agent is updated once with its summed wallet and credit effect
+- the ledger (CompanyAccountBalance) gets one row per mode with the summed net, under the
+  same mode the single booking would have used
+all in one commit. The response lists each row's id and ref_no.
+"""
+import csv
+import io
+import math
+from datetime import date, datetime
+
+from flask import abort, current_app, g, request
+from flask_restful import Resource
+
+from applications.utils import check_permission
+from applications.model import (db, Customer, Agent, Passenger, TravelLocation, Particular,
+                                Ticket, Visa, Service, TicketType, VisaType)
+from applications.common_booking_resource import CommonBookingResource
+
+MAX_IMPORT_ROWS = 1000
+PAYMENT_MODES = ('wallet', 'cash', 'online')
+
+# booking type -> (model, ref prefix letter, required fields, agent payment mode default)
+IMPORT_TYPES = {
+    'ticket': (Ticket, 'T', ('customer_id', 'travel_location_id', 'ticket_type_id', 'customer_charge',
+                             'customer_payment_mode'), 'cash'),
+    'visa': (Visa, 'V', ('customer_id', 'travel_location_id', 'visa_type_id', 'customer_charge',
+                         'customer_payment_mode'), 'wallet'),
+    'service': (Service, 'S', ('customer_id', 'customer_charge', 'customer_payment_mode', 'date'), None),
+}
+# id field -> lookup model it must exist in (customers and agents are loaded whole)
+LOOKUP_FIELDS = {
+    'travel_location_id': TravelLocation,
+    'passenger_id': Passenger,
+    'ticket_type_id': TicketType,
+    'visa_type_id': VisaType,
+    'particular_id': Particular,
+}
+ID_FIELDS = ('customer_id', 'agent_id', *LOOKUP_FIELDS)
+AMOUNT_FIELDS = ('customer_charge', 'agent_paid')
+
+
+class BulkBookingImportResource(Resource, CommonBookingResource):
+    def __init__(self, **kwargs):
+        # The model is picked per request from the booking type
+        super().__init__(model=None, ref_prefix=None)
+
+    @check_permission()
+    def post(self, booking_type):
+        if booking_type not in IMPORT_TYPES:
+            abort(404, f"Unknown booking type: {booking_type}")
+        self.MODEL, self.REF_PREFIX, required, agent_mode_default = IMPORT_TYPES[booking_type]
+        has_agent = agent_mode_default is not None
+
+        upload = request.files.get('file')
+        if upload:
+            raw_rows = list(csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')))
+        else:
+            data = request.get_json(silent=True)
+            if not data or 'rows' not in data:
+                abort(400, "Missing rows array in request body")
+            raw_rows = data['rows']
+        if not isinstance(raw_rows, list) or not raw_rows:
+            abort(400, "rows must be a non-empty list")
+        if len(raw_rows) > MAX_IMPORT_ROWS:
+            abort(400, f"At most {MAX_IMPORT_ROWS} rows per import")
+
+        rows, errors = [], []
+        for index, raw_row in enumerate(raw_rows):
+            try:
+                rows.append(self._normalize_row(raw_row, required, has_agent, agent_mode_default))
+            except ValueError as e:
+                rows.append(None)
+                errors.append({"index": index, "error": str(e)})
+
+        valid = [row for row in rows if row]
+        customers = self._load(Customer, {row['customer_id'] for row in valid})
+        agents = self._load(Agent, {row['agent_id'] for row in valid if row.get('agent_id')})
+        known_ids = {
+            field: {id_ for (id_,) in db.session.query(model.id).filter(
+                model.id.in_({row[field] for row in valid if row.get(field)}))}
+            for field, model in LOOKUP_FIELDS.items() if any(row.get(field) for row in valid)
+        }
+
+        ledger = {}
+        with db.session.no_autoflush:
+            for index, row in enumerate(rows):
+                if row is None:
+                    continue
+                try:
+                    self._check_references(row, customers, agents, known_ids)
+                    self._book_payments(row, customers, agents, has_agent)
+                except ValueError as e:
+                    errors.append({"index": index, "error": str(e)})
+                    continue
+                mode, net = self._ledger_effect(row, has_agent)
+                if mode and net:
+                    ledger[mode] = ledger.get(mode, 0) + net
+
+        if errors:
+            # Discards the wallet and credit changes made while checking the rows
+            db.session.rollback()
+            errors.sort(key=lambda error: error['index'])
+            return {
+                "message": "Some rows have errors; nothing was booked",
+                "valid_count": len(raw_rows) - len(errors),
+                "error_count": len(errors),
+                "errors": errors
+            }, 207  # Multi-status
+
+        try:
+            ref_numbers = iter(self._allocate_ref_numbers(sum(1 for row in rows if not row.get('ref_no'))))
+            updated_by = getattr(g, 'username', 'system')
+            bookings = []
+            for row in rows:
+                row['ref_no'] = row.get('ref_no') or next(ref_numbers)
+                bookings.append(self.MODEL(**row, status='booked', updated_by=updated_by))
+            db.session.add_all(bookings)
+            db.session.flush()
+
+            ref_range = f"{bookings[0].ref_no}..{bookings[-1].ref_no}" if len(bookings) > 1 else bookings[0].ref_no
+            for mode, net in ledger.items():
+                self._update_company_account(mode, round(net, 2), 'book', f"Bulk {booking_type} import",
+                                             ref_no=ref_range, transaction_type=booking_type)
+
+            db.session.commit()
+            return {
+                "message": f"Booked {len(bookings)} {booking_type}s",
+                "count": len(bookings),
+                "rows": [{"index": index, "id": booking.id, "ref_no": booking.ref_no}
+                         for index, booking in enumerate(bookings)]
+            }, 201
+        except Exception as e:
+            db.session.rollback()
+            # e.orig: the driver's message without the statement and every row's parameters
+            current_app.logger.error(f"Bulk {booking_type} import failed: {getattr(e, 'orig', e)!r}")
+            abort(500, "Import failed")
+
+    def _normalize_row(self, raw_row, required, has_agent, agent_mode_default):
+        """Typed booking fields from one JSON or CSV row; blank CSV cells count as missing."""
+        if not isinstance(raw_row, dict):
+            raise ValueError("Row must be an object")
+        row = {key: value.strip() if isinstance(value, str) else value
+               for key, value in raw_row.items() if isinstance(key, str)}
+        row = {key: value for key, value in row.items() if value not in (None, '')}
+        if missing := [field for field in required if field not in row]:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+        columns = self.MODEL.__table__.columns
+        booking = {}
+        for field in ID_FIELDS:
+            if field in row and field in columns:
+                try:
+                    booking[field] = int(row[field])
+                except (TypeError, ValueError):
+                    raise ValueError(f"{field} must be an integer")
+        for field in AMOUNT_FIELDS:
+            if field in columns:
+                try:
+                    amount = float(row.get(field, 0))
+                except (TypeError, ValueError):
+                    raise ValueError(f"{field} must be a number")
+                if not math.isfinite(amount):
+                    raise ValueError(f"{field} must be a finite number")
+                booking[field] = round(amount, 2)
+                if booking[field] < 0:
+                    raise ValueError(f"{field} cannot be negative")
+
+        booking['customer_payment_mode'] = str(row['customer_payment_mode']).lower()
+        if has_agent:
+            booking['agent_payment_mode'] = str(row.get('agent_payment_mode', agent_mode_default)).lower()
+            booking['profit'] = round(booking['customer_charge'] - booking['agent_paid'], 2)
+        for field in ('customer_payment_mode', 'agent_payment_mode'):
+            if field in booking and booking[field] not in PAYMENT_MODES:
+                raise ValueError(f"Invalid payment mode: {booking[field]}")
+
+        try:
+            booking['date'] = datetime.strptime(str(row['date']), '%Y-%m-%d').date() if 'date' in row else date.today()
+        except ValueError:
+            raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+        if 'ref_no' in row and 'ref_no' in columns:
+            booking['ref_no'] = str(row['ref_no'])
+        if 'description' in row:
+            booking['description'] = str(row['description'])
+        return booking
+
+    def _load(self, model, ids):
+        return {obj.id: obj for obj in model.query.filter(model.id.in_(ids))} if ids else {}
+
+    def _check_references(self, row, customers, agents, known_ids):
+        if row['customer_id'] not in customers:
+            raise ValueError(f"Customer {row['customer_id']} not found")
+        if row.get('agent_id') and row['agent_id'] not in agents:
+            raise ValueError(f"Agent {row['agent_id']} not found")
+        for field in LOOKUP_FIELDS:
+            if row.get(field) and row[field] not in known_ids[field]:
+                raise ValueError(f"{field} {row[field]} not found")
+
+    def _book_payments(self, row, customers, agents, has_agent):
+        """
+        Take the row's wallet/credit payments off the loaded customer and agent, as
+        _process_payments does for one booking. A row that does not fit leaves them unchanged.
+        """
+        payments = [(customers[row['customer_id']], row['customer_charge'], row['customer_payment_mode'], True)]
+        if has_agent and row.get('agent_id') and row['agent_paid'] > 0:
+            payments.append((agents[row['agent_id']], row['agent_paid'], row['agent_payment_mode'], False))
+
+        saved = [(entity, entity.wallet_balance, entity.credit_used if is_customer else entity.credit_balance)
+                 for entity, _, _, is_customer in payments]
+        try:
+            for entity, amount, mode, is_customer in payments:
+                if mode == 'wallet':
+                    self._process_wallet_payment(entity, amount, is_customer)
+        except Exception as e:
+            for entity, wallet, credit in saved:
+                entity.wallet_balance = wallet
+                if isinstance(entity, Customer):
+                    entity.credit_used = credit
+                else:
+                    entity.credit_balance = credit
+            raise ValueError(str(e))
+
+    def _ledger_effect(self, row, has_agent):
+        """(mode, net) the single booking would post through _update_financials."""
+        net = 0
+        modes = [row['customer_payment_mode']]
+        if row['customer_payment_mode'] in ('cash', 'online'):
+            net += row['customer_charge']
+        if has_agent and row.get('agent_id'):
+            modes.append(row['agent_payment_mode'])
+            if row['agent_payment_mode'] in ('cash', 'online'):
+                net -= row['agent_paid']
+        mode = next((mode for mode in modes if mode in ('cash', 'online')), None)
+        return mode, net
+
+    def _allocate_ref_numbers(self, count):
+        """`count` consecutive ref numbers after this year's highest, from one max() lookup."""
+        prefix = f"{datetime.now().year}/{self.REF_PREFIX}/"
+        max_ref = db.session.query(db.func.max(self.MODEL.ref_no)).filter(
+            self.MODEL.ref_no.like(f"{prefix}%")
+        ).scalar()
+        last_num = int(max_ref.split('/')[-1]) if max_ref and '/' in max_ref else 0
+        return [f"{prefix}{last_num + n:05d}" for n in range(1, count + 1)]
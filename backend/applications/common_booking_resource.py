@@ -4,6 +4,8 @@ from flask import request, abort, g
 from applications.model import db, Customer, Agent, CompanyAccountBalance
 from datetime import datetime, timedelta
 from applications.pdf_excel_export_helpers import generate_export_pdf, generate_export_excel
+from applications.reporting_db import read_only_db
+from applications.search_index import search_condition
 
 class CommonBookingResource:
     def __init__(self, model, ref_prefix):
@@ -391,6 +393,7 @@ class CommonBookingResource:
                 obj.agent_recovery_amount = recovery_amt
                 obj.agent_recovery_mode = recovery_mode
     
+    @read_only_db()
     def export_excel_pdf(self, model, ref_type):
         export_format = request.args.get('export')
         status = request.args.get('status', 'booked')
@@ -407,14 +410,16 @@ class CommonBookingResource:
             query = query.filter_by(status=status)
 
         if search_query:
-            search_pattern = f'%{search_query.lower()}%'
-            query = query.join(Customer, isouter=True)\
-                         .join(Agent, isouter=True)\
-                         .filter(db.or_(
-                             db.func.lower(model.ref_no).like(search_pattern),
-                             db.func.lower(Customer.name).like(search_pattern),
-                             db.func.lower(Agent.name).like(search_pattern)
-                         ))
+            matches = search_condition(model.__tablename__, model.id, search_query)
+            if matches is None:
+                search_pattern = f'%{search_query.lower()}%'
+                query = query.join(Customer, isouter=True).join(Agent, isouter=True)
+                matches = db.or_(
+                    db.func.lower(model.ref_no).like(search_pattern),
+                    db.func.lower(Customer.name).like(search_pattern),
+                    db.func.lower(Agent.name).like(search_pattern)
+                )
+            query = query.filter(matches)
 
         records = query.all()
         format_func = getattr(self, f"_format_for_export", None)
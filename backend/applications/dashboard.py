@@ -3,9 +3,14 @@ from flask import jsonify, request, send_file
 from datetime import datetime, timedelta
 from sqlalchemy import func, case, and_, or_, union_all, select
 from io import BytesIO
-from fpdf import FPDF
 
 from .model import db, CompanyAccountBalance, Ticket, Transaction, Service, Particular, Agent, Customer, Partner, Visa
+from .result_cache import result_cache
+from .reporting_db import read_only_db
+from . import export_backends
+
+# Tables _get_dashboard_metrics_data reads; a commit touching any of them invalidates cached metrics
+DASHBOARD_TABLES = ['company_account_balance', 'ticket', 'visa', 'service', 'transaction', 'particular', 'agent', 'customer', 'partner']
 
 
 # Helper function to get dashboard metrics data (reused by API and PDF export)
@@ -286,7 +291,7 @@ def safe_encode(text):
 # Generic helper for exporting lists of data to PDF
 def _export_list_to_pdf(data_list, title, filename_prefix, column_headers):
     try:
-        pdf = FPDF()
+        pdf = export_backends.FPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=12)
 
@@ -351,13 +356,19 @@ def _export_list_to_pdf(data_list, title, filename_prefix, column_headers):
 
 class DashboardMetricsAPI(Resource):
     # @check_permission()
+    @read_only_db()
     def get(self):
         export_format = request.args.get('export')
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
 
         try:
-            metrics_data = _get_dashboard_metrics_data(start_date_str, end_date_str)
+            metrics_data = result_cache.get_or_set(
+                'dashboard_metrics',
+                {'start_date': start_date_str, 'end_date': end_date_str},
+                DASHBOARD_TABLES,
+                lambda: _get_dashboard_metrics_data(start_date_str, end_date_str)
+            )
 
             if export_format == 'pdf':
                 return self._export_pdf(metrics_data, start_date_str, end_date_str)
@@ -372,7 +383,7 @@ class DashboardMetricsAPI(Resource):
     def _export_pdf(self, metrics_data, start_date_str, end_date_str):
         """Helper method to generate and return the PDF file for Financial Overview."""
         try:
-            pdf = FPDF()
+            pdf = export_backends.FPDF()
             pdf.add_page()
             pdf.set_font("Arial", size=12)
 
@@ -436,20 +447,11 @@ class DashboardMetricsAPI(Resource):
 
 class CustomerWalletCreditAPI(Resource):
     # @check_permission()
+    @read_only_db()
     def get(self):
         export_format = request.args.get('export')
         try:
-            customers = Customer.query.filter_by(active=True).all()
-            data = []
-            for c in customers:
-                data.append({
-                    'ID': c.id,
-                    'Name': c.name,
-                    'Wallet Balance': c.wallet_balance,
-                    'Credit Limit': c.credit_limit,
-                    'Credit Used': c.credit_used,
-                    'Credit Available': c.credit_limit - c.credit_used
-                })
+            data = result_cache.get_or_set('customer_balances', {}, ['customer'], self._fetch_balances)
 
             if export_format == 'pdf':
                 column_headers = ['ID', 'Name', 'Wallet Balance', 'Credit Limit', 'Credit Used', 'Credit Available']
@@ -459,22 +461,27 @@ class CustomerWalletCreditAPI(Resource):
         except Exception as e:
             return {'error': 'Failed to fetch customer wallet/credit data.'}, 500
 
+    def _fetch_balances(self):
+        customers = Customer.query.filter_by(active=True).all()
+        data = []
+        for c in customers:
+            data.append({
+                'ID': c.id,
+                'Name': c.name,
+                'Wallet Balance': c.wallet_balance,
+                'Credit Limit': c.credit_limit,
+                'Credit Used': c.credit_used,
+                'Credit Available': c.credit_limit - c.credit_used
+            })
+        return data
+
 class AgentWalletCreditAPI(Resource):
     # @check_permission()
+    @read_only_db()
     def get(self):
         export_format = request.args.get('export')
         try:
-            agents = Agent.query.filter_by(active=True).all()
-            data = []
-            for a in agents:
-                data.append({
-                    'ID': a.id,
-                    'Name': a.name,
-                    'Wallet Balance': a.wallet_balance,
-                    'Credit Limit': a.credit_limit,
-                    'Credit Balance': a.credit_balance, # This is available credit
-                    'Credit Used': a.credit_limit - a.credit_balance # Calculate used credit
-                })
+            data = result_cache.get_or_set('agent_balances', {}, ['agent'], self._fetch_balances)
 
             if export_format == 'pdf':
                 column_headers = ['ID', 'Name', 'Wallet Balance', 'Credit Limit', 'Credit Balance', 'Credit Used']
@@ -484,20 +491,27 @@ class AgentWalletCreditAPI(Resource):
         except Exception as e:
             return {'error': 'Failed to fetch agent wallet/credit data.'}, 500
 
+    def _fetch_balances(self):
+        agents = Agent.query.filter_by(active=True).all()
+        data = []
+        for a in agents:
+            data.append({
+                'ID': a.id,
+                'Name': a.name,
+                'Wallet Balance': a.wallet_balance,
+                'Credit Limit': a.credit_limit,
+                'Credit Balance': a.credit_balance, # This is available credit
+                'Credit Used': a.credit_limit - a.credit_balance # Calculate used credit
+            })
+        return data
+
 class PartnerWalletCreditAPI(Resource):
     # @check_permission()
+    @read_only_db()
     def get(self):
         export_format = request.args.get('export')
         try:
-            partners = Partner.query.filter_by(active=True).all()
-            data = []
-            for p in partners:
-                data.append({
-                    'ID': p.id,
-                    'Name': p.name,
-                    'Wallet Balance': p.wallet_balance,
-                    'Allow Negative Wallet': 'Yes' if p.allow_negative_wallet else 'No'
-                })
+            data = result_cache.get_or_set('partner_balances', {}, ['partner'], self._fetch_balances)
 
             if export_format == 'pdf':
                 column_headers = ['ID', 'Name', 'Wallet Balance', 'Allow Negative Wallet']
@@ -506,3 +520,15 @@ class PartnerWalletCreditAPI(Resource):
                 return jsonify(data)
         except Exception as e:
             return {'error': 'Failed to fetch partner wallet data.'}, 500
+
+    def _fetch_balances(self):
+        partners = Partner.query.filter_by(active=True).all()
+        data = []
+        for p in partners:
+            data.append({
+                'ID': p.id,
+                'Name': p.name,
+                'Wallet Balance': p.wallet_balance,
+                'Allow Negative Wallet': 'Yes' if p.allow_negative_wallet else 'No'
+            })
+        return data
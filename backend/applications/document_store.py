@@ -0,0 +1,163 @@
+# applications/document_store.py
+"""
+Content-addressed storage for generated documents.
+
+Documents live once under INVOICE_FOLDER/blobs/<aa>/<sha256>.<ext>; returned paths are
+relative to INVOICE_FOLDER (what Invoice.pdf_path stores). Derived documents (stamped
+invoices, report exports) are hard-linked into INVOICE_FOLDER/cache/, so the link count
+acts as the reference count for cached copies.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from flask import current_app
+from applications.model import Invoice
+
+BLOB_DIR = 'blobs'
+CACHE_DIR = 'cache'
+
+
+def _root():
+    return current_app.config['INVOICE_FOLDER']
+
+
+def _abs(relative_path):
+    return os.path.join(_root(), relative_path)
+
+
+def _max_cache_entries():
+    return current_app.config.get('DOCUMENT_CACHE_MAX_ENTRIES', 500)
+
+
+def content_key(*parts):
+    """Stable SHA-256 key for any JSON-serialisable inputs."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def blob_relative_path(digest, ext='pdf'):
+    return os.path.join(BLOB_DIR, digest[:2], f"{digest}.{ext}")
+
+
+def _atomic_write(absolute_path, data):
+    os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(absolute_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, absolute_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def put_blob(data, ext='pdf'):
+    """Store bytes and return their relative blob path. Identical bytes are written only once."""
+    digest = hashlib.sha256(data).hexdigest()
+    relative_path = blob_relative_path(digest, ext)
+    absolute_path = _abs(relative_path)
+    if not os.path.exists(absolute_path):
+        _atomic_write(absolute_path, data)
+    return relative_path
+
+
+def read_blob(relative_path):
+    with open(_abs(relative_path), 'rb') as f:
+        return f.read()
+
+
+def blob_exists(relative_path):
+    return bool(relative_path) and os.path.exists(_abs(relative_path))
+
+
+def blob_digest(relative_path):
+    """Digest of a stored document; legacy (non content-addressed) files are hashed on demand."""
+    name = os.path.splitext(os.path.basename(relative_path))[0]
+    if relative_path.startswith(BLOB_DIR + os.sep) and len(name) == 64:
+        return name
+    return hashlib.sha256(read_blob(relative_path)).hexdigest()
+
+
+def release_blob(relative_path):
+    """Delete a blob once nothing references it any more (no Invoice row, no cache link)."""
+    if not relative_path:
+        return
+    absolute_path = _abs(relative_path)
+    if not os.path.exists(absolute_path):
+        return
+    if Invoice.query.filter_by(pdf_path=relative_path).first():
+        return
+    if relative_path.startswith(BLOB_DIR + os.sep) and os.stat(absolute_path).st_nlink > 1:
+        return
+    try:
+        os.remove(absolute_path)
+    except OSError as e:
+        current_app.logger.warning(f"Could not remove document {relative_path}: {e}")
+
+
+# ========= Derived document cache =========
+def _cache_path(key, ext):
+    return os.path.join(_root(), CACHE_DIR, f"{key}.{ext}")
+
+
+def cached_document(key, ext='pdf'):
+    """Absolute path of a cached derived document, or None."""
+    path = _cache_path(key, ext)
+    if os.path.exists(path):
+        os.utime(path)  # keep recently served entries out of pruning
+        return path
+    return None
+
+
+def cache_document(key, data, ext='pdf'):
+    """Store a derived document as a blob and link it into the cache. Returns the cache path."""
+    relative_path = put_blob(data, ext)
+    path = _cache_path(key, ext)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not os.path.exists(path):
+        try:
+            os.link(_abs(relative_path), path)
+        except FileExistsError:
+            pass
+        except OSError:
+            # Filesystems without hard links: fall back to a plain copy
+            shutil.copyfile(_abs(relative_path), path)
+    _prune_cache()
+    return path
+
+
+def _prune_cache():
+    cache_root = os.path.join(_root(), CACHE_DIR)
+    try:
+        entries = [os.path.join(cache_root, name) for name in os.listdir(cache_root)]
+    except FileNotFoundError:
+        return
+    excess = len(entries) - _max_cache_entries()
+    if excess <= 0:
+        return
+
+    entries.sort(key=lambda p: os.stat(p).st_mtime)
+    for path in entries[:excess]:
+        ext = os.path.splitext(path)[1].lstrip('.')
+        try:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            os.remove(path)
+        except OSError:
+            continue
+        release_blob(blob_relative_path(digest, ext))
+
+
+def stamped_document(relative_path, status, stamp_fn):
+    """
+    Return the absolute path of `relative_path` stamped with `status`, building it
+    with stamp_fn(pdf_bytes, status) only the first time.
+    """
+    key = f"stamp-{blob_digest(relative_path)}-{status}"
+    path = cached_document(key)
+    if path:
+        return path
+    return cache_document(key, stamp_fn(read_blob(relative_path), status))
@@ -0,0 +1,50 @@
+# applications/export_backends.py
+"""
+Export libraries (fpdf, pandas, PyPDF2, reportlab, xlsxwriter), imported on first use.
+
+Together they account for most of a worker's import time and resident memory, yet only the
+PDF/Excel export paths need them. Modules use `export_backends.FPDF`, `export_backends.pd`,
+... instead of importing the libraries at module level; the first attribute access imports
+the library and caches it on this module, so later lookups are plain attribute reads.
+"""
+import importlib
+import threading
+
+# name -> (module, attribute or None for the module itself)
+_BACKENDS = {
+    'FPDF': ('fpdf', 'FPDF'),
+    'pd': ('pandas', None),
+    'PdfReader': ('PyPDF2', 'PdfReader'),
+    'PdfWriter': ('PyPDF2', 'PdfWriter'),
+    'canvas': ('reportlab.pdfgen.canvas', None),
+    'xlsxwriter': ('xlsxwriter', None),
+}
+
+_lock = threading.Lock()
+_fpdf_subclasses = {}
+
+
+def __getattr__(name):
+    if name not in _BACKENDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _BACKENDS[name]
+    with _lock:
+        value = importlib.import_module(module_name)
+        if attribute:
+            value = getattr(value, attribute)
+        globals()[name] = value
+    return value
+
+
+def fpdf_subclass(mixin):
+    """FPDF subclass with `mixin`'s header/footer/helpers, built once on first use."""
+    cls = _fpdf_subclasses.get(mixin)
+    if cls is None:
+        base = globals().get('FPDF') or __getattr__('FPDF')
+        cls = _fpdf_subclasses[mixin] = type(mixin.__name__, (mixin, base), {})
+    return cls
+
+
+def loaded():
+    """Names of the backends imported so far in this process."""
+    return sorted(name for name in _BACKENDS if name in globals())
@@ -1,16 +1,19 @@
 from flask import request, abort, send_file, current_app
 from flask_restful import Resource
 from applications.utils import check_permission
-from applications.model import db, Customer, Agent, Partner, Transaction, Ticket, Visa, Service, Invoice
+from applications.model import db, Customer, Agent, Partner, Passenger, Transaction, Ticket, Visa, Service, Invoice
 from datetime import datetime, timedelta
 from io import BytesIO
 import os
-from fpdf import FPDF
 from sqlalchemy import or_, and_ 
-from PyPDF2 import PdfReader, PdfWriter
-from reportlab.pdfgen import canvas
-import xlsxwriter
 from sqlalchemy.orm import joinedload
+from applications.reporting_db import read_only_db
+from applications import export_backends
+from applications.document_store import (
+    put_blob, blob_exists, release_blob, stamped_document, cached_document, cache_document, content_key
+)
+from applications.result_cache import result_cache
+from applications.metrics import timed_export, invoices_generated
 
 # ========= Helpers =========
 def generate_invoice_number(entity_type):
@@ -54,7 +57,8 @@ def parse_date(date_input):
     raise ValueError(f"Invalid date format: {date_input}")
 
 # ========= Core Logic =========
-class PDF(FPDF):
+class InvoicePDF:
+    """Invoice layout; mixed into fpdf.FPDF on first use via export_backends.fpdf_subclass."""
     def header(self):
         header_path = os.path.join(current_app.config['TEMPLATE_FOLDER'], 'header.jpg')
         if os.path.exists(header_path):
@@ -164,6 +168,64 @@ class InvoiceCore:
                 "services": self._format_bookings(services, 'service', entity_type),
             }
 
+    def _fetch_input_fingerprint(self, entity_type, entity_id, start_date, end_date):
+        """
+        Hash of everything an invoice/report for this entity and period is built from.
+        Reads plain column tuples only, so it is much cheaper than _fetch_entity_data.
+        Returns None when the entity does not exist.
+        """
+        entity_model = {
+            'customer': Customer,
+            'agent': Agent,
+            'partner': Partner
+        }.get(entity_type)
+        if not entity_model:
+            return None
+
+        entity_columns = [entity_model.name, entity_model.contact, entity_model.email, entity_model.wallet_balance]
+        if entity_type == 'customer':
+            entity_columns.append(Customer.credit_used)
+        elif entity_type == 'agent':
+            entity_columns.append(Agent.credit_balance)
+        entity_row = db.session.query(*entity_columns).filter(entity_model.id == entity_id).first()
+        if not entity_row:
+            return None
+
+        transactions = db.session.query(
+            Transaction.id, Transaction.date, Transaction.ref_no, Transaction.transaction_type,
+            Transaction.amount, Transaction.description, Transaction.mode
+        ).filter(
+            Transaction.date >= start_date,
+            Transaction.date < end_date,
+            Transaction.entity_type == entity_type,
+            Transaction.entity_id == entity_id
+        ).order_by(Transaction.id).all()
+
+        # Bookings carry updated_at (onupdate), so id + updated_at covers every edit to the row itself;
+        # the passenger name is joined in because renaming a passenger does not touch the booking.
+        bookings = {}
+        for model in (Ticket, Visa):
+            bookings[model.__tablename__] = db.session.query(
+                model.id, model.updated_at, Passenger.name
+            ).outerjoin(Passenger, model.passenger_id == Passenger.id).filter(
+                model.date >= start_date,
+                model.date < end_date,
+                getattr(model, f'{entity_type}_id') == entity_id
+            ).order_by(model.id).all()
+
+        if entity_type == 'customer':
+            bookings['service'] = db.session.query(Service.id, Service.updated_at).filter(
+                Service.date >= start_date,
+                Service.date < end_date,
+                Service.customer_id == entity_id
+            ).order_by(Service.id).all()
+
+        return content_key(
+            entity_type, entity_id, tuple(entity_row),
+            [tuple(t) for t in transactions],
+            {name: [tuple(r) for r in rows] for name, rows in bookings.items()}
+        )
+
     def _format_transactions(self, transactions):
         return [{
             "date": t.date.strftime('%Y-%m-%d'),
@@ -298,9 +360,10 @@ class InvoiceCore:
 
         return excel_data
 
+    @timed_export('invoice', 'pdf')
     def _generate_invoice_pdf(self, data, entity_type, start_date, end_date, invoice_number=None, is_invoice=True):
         
-        pdf = PDF(orientation='P', unit='mm', format='A4')
+        pdf = export_backends.fpdf_subclass(InvoicePDF)(orientation='P', unit='mm', format='A4')
         pdf.add_page()
         pdf.set_auto_page_break(auto=True, margin=50)
 
@@ -450,7 +513,7 @@ class InvoiceCore:
         """Apply status stamp to PDF and return stamped bytes"""
         # Create watermark
         packet = BytesIO()
-        can = canvas.Canvas(packet)
+        can = export_backends.canvas.Canvas(packet)
         
         # Set stamp properties based on status
         if status == 'paid':
@@ -472,12 +535,12 @@ class InvoiceCore:
         
         # Move to beginning of BytesIO buffer
         packet.seek(0)
-        watermark = PdfReader(packet)
+        watermark = export_backends.PdfReader(packet)
         watermark_page = watermark.pages[0]
         
         # Apply watermark to each page
-        original = PdfReader(BytesIO(pdf_bytes))
-        output = PdfWriter()
+        original = export_backends.PdfReader(BytesIO(pdf_bytes))
+        output = export_backends.PdfWriter()
         
         for i in range(len(original.pages)):
             page = original.pages[i]
@@ -500,6 +563,14 @@ class InvoiceListResource(Resource, InvoiceCore):
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
 
+        return result_cache.get_or_set(
+            'invoice_list',
+            dict(request.args),
+            ['invoice', 'customer', 'agent', 'partner'],
+            lambda: self._list_invoices(status, entity_type, entity_id, invoice_number, start_date_str, end_date_str)
+        )
+
+    def _list_invoices(self, status, entity_type, entity_id, invoice_number, start_date_str, end_date_str):
         query = Invoice.query
         if status:
             query = query.filter(Invoice.status == status)
@@ -573,7 +644,35 @@ class InvoiceListResource(Resource, InvoiceCore):
             )
         ).first()
 
+        period_bounds = (
+            datetime.combine(period_start, datetime.min.time()),
+            datetime.combine(period_end, datetime.max.time())
+        )
+
         if existing:
+            same_period = existing.period_start == period_start and existing.period_end == period_end
+            if same_period:
+                fingerprint = self._fetch_input_fingerprint(entity_type, entity_id, *period_bounds)
+                # Nothing the invoice is built from has changed: hand back the stored one
+                if fingerprint and fingerprint == existing.input_fingerprint and blob_exists(existing.pdf_path):
+                    invoices_generated.inc(1, entity_type, 'reused')
+                    return self._serialize_invoice(existing), 200
+
+                # Data changed since it was issued: re-render in place, keeping the invoice number
+                if data.get('regenerate') and existing.status == 'pending':
+                    old_pdf_path = existing.pdf_path
+                    existing.pdf_path = self._render_invoice(
+                        entity_type, entity_id, period_bounds, period_start_str, period_end_str,
+                        existing.invoice_number
+                    )
+                    existing.input_fingerprint = fingerprint
+                    existing.generated_date = datetime.now()
+                    db.session.commit()
+                    if old_pdf_path != existing.pdf_path:
+                        release_blob(old_pdf_path)
+                    invoices_generated.inc(1, entity_type, 'regenerated')
+                    return self._serialize_invoice(existing), 200
+
             abort(400, f"An active invoice already exists for this entity covering part of this period "
                    f"({existing.period_start} to {existing.period_end}). Please cancel it first.")
 
@@ -585,11 +684,30 @@ class InvoiceListResource(Resource, InvoiceCore):
         # Generate invoice number by entity type
         invoice_number = generate_invoice_number(entity_type)
 
-        data_dict = self._fetch_entity_data(
-            entity_type, entity_id,
-            datetime.combine(period_start, datetime.min.time()),
-            datetime.combine(period_end, datetime.max.time())
+        # Fingerprint before rendering, so a later change can never be masked by this invoice
+        fingerprint = self._fetch_input_fingerprint(entity_type, entity_id, *period_bounds)
+        relative_pdf_path = self._render_invoice(
+            entity_type, entity_id, period_bounds, period_start_str, period_end_str, invoice_number
         )
+
+        invoice = Invoice(
+            invoice_number=invoice_number,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            period_start=period_start,
+            period_end=period_end,
+            status='pending',
+            pdf_path=relative_pdf_path,
+            input_fingerprint=fingerprint
+        )
+        db.session.add(invoice)
+        db.session.commit()
+        invoices_generated.inc(1, entity_type, 'new')
+
+        return self._serialize_invoice(invoice), 201
+
+    def _render_invoice(self, entity_type, entity_id, period_bounds, period_start_str, period_end_str, invoice_number):
+        data_dict = self._fetch_entity_data(entity_type, entity_id, *period_bounds)
         if not data_dict:
             abort(404, "No data found for the selected entity and date range.")
 
@@ -603,31 +721,10 @@ class InvoiceListResource(Resource, InvoiceCore):
             is_invoice=True
         )
 
-        # Create safe filename
-        safe_filename = invoice_number.replace('/', '-') + '.pdf'
-        
-        entity_folder = os.path.join(current_app.config['INVOICE_FOLDER'], f"{entity_type}s")
-        os.makedirs(entity_folder, exist_ok=True)
-
-        absolute_pdf_path = os.path.join(entity_folder, safe_filename)
-        with open(absolute_pdf_path, 'wb') as f:
-            f.write(pdf_bytes)
-
-        # Store the path relative to the base directory
-        relative_pdf_path = os.path.relpath(absolute_pdf_path, current_app.config['INVOICE_FOLDER'])
-
-        invoice = Invoice(
-            invoice_number=invoice_number,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            period_start=period_start,
-            period_end=period_end,
-            status='pending',
-            pdf_path=relative_pdf_path
-        )
-        db.session.add(invoice)
-        db.session.commit()
+        # Content-addressed: identical bytes are stored once, path is relative to INVOICE_FOLDER
+        return put_blob(pdf_bytes)
 
+    def _serialize_invoice(self, invoice):
         return {
             "id": invoice.id,
             "invoice_number": invoice.invoice_number,
@@ -638,7 +735,7 @@ class InvoiceListResource(Resource, InvoiceCore):
             "status": invoice.status,
             "generated_date": invoice.generated_date.strftime('%Y-%m-%d'),
             "pdf_path": invoice.pdf_path
-        }, 201
+        }
 
 class InvoiceStatusResource(Resource, InvoiceCore):
     @check_permission()
@@ -656,17 +753,11 @@ class InvoiceStatusResource(Resource, InvoiceCore):
         invoice.status = new_status
         
         if new_status in ['paid', 'cancelled'] and old_status != new_status:
-            absolute_pdf_path = os.path.join(current_app.config['INVOICE_FOLDER'], invoice.pdf_path)
-            if not invoice.pdf_path or not os.path.exists(absolute_pdf_path):
+            if not blob_exists(invoice.pdf_path):
                 abort(404, "Invoice PDF not found.")
-                
-            with open(absolute_pdf_path, 'rb') as f:
-                original_pdf = f.read()
-            
-            stamped_pdf = self.apply_stamp(original_pdf, new_status)
-            
-            with open(absolute_pdf_path, 'wb') as f:
-                f.write(stamped_pdf)
+
+            # The original blob is kept untouched; the stamped copy is cached for downloads
+            stamped_document(invoice.pdf_path, new_status, self.apply_stamp)
         
         db.session.commit()
         return {"message": "Invoice status updated.", "status": new_status}
@@ -678,22 +769,12 @@ class InvoiceDownloadResource(Resource, InvoiceCore):
         if not invoice:
             abort(404, "Invoice not found.")
         
-        absolute_pdf_path = os.path.join(current_app.config['INVOICE_FOLDER'], invoice.pdf_path)
-
-        if not invoice.pdf_path or not os.path.exists(absolute_pdf_path):
+        if not blob_exists(invoice.pdf_path):
             abort(404, "Invoice PDF not found.")
-        
-        with open(absolute_pdf_path, 'rb') as f:
-            original_pdf = f.read()
-        
+
+        absolute_pdf_path = os.path.join(current_app.config['INVOICE_FOLDER'], invoice.pdf_path)
         if invoice.status in ['paid', 'cancelled']:
-            stamped_pdf = self.apply_stamp(original_pdf, invoice.status)
-            return send_file(
-                BytesIO(stamped_pdf),
-                as_attachment=True,
-                download_name=f"{invoice.invoice_number}.pdf",
-                mimetype="application/pdf"
-            )
+            absolute_pdf_path = stamped_document(invoice.pdf_path, invoice.status, self.apply_stamp)
         
         return send_file(
             absolute_pdf_path,
@@ -709,20 +790,17 @@ class InvoiceDeleteResource(Resource):
         if not invoice:
             abort(404, "Invoice not found.")
 
-        absolute_pdf_path = os.path.join(current_app.config['INVOICE_FOLDER'], invoice.pdf_path)
-
-        if invoice.pdf_path and os.path.exists(absolute_pdf_path):
-            try:
-                os.remove(absolute_pdf_path)
-            except OSError as e:
-                print(f"Error deleting PDF file: {e}")
-
+        pdf_path = invoice.pdf_path
         db.session.delete(invoice)
         db.session.commit()
+
+        # The blob may still be shared with another invoice; it is only removed once unreferenced
+        release_blob(pdf_path)
         return {"message": "Invoice deleted successfully."}, 200
 
 class InvoiceExportResource(Resource, InvoiceCore):
     @check_permission()
+    @read_only_db()
     def post(self):
         data = request.get_json()
         entity_type = data.get('entity_type')
@@ -740,36 +818,55 @@ class InvoiceExportResource(Resource, InvoiceCore):
         except Exception:
             abort(400, "Invalid date format. Use YYYY-MM-DD.")
         
-        data_dict = self._fetch_entity_data(
-            entity_type, entity_id,
+        period_bounds = (
             datetime.combine(period_start, datetime.min.time()),
             datetime.combine(period_end, datetime.max.time())
         )
-        if not data_dict:
+        fingerprint = self._fetch_input_fingerprint(entity_type, entity_id, *period_bounds)
+        if not fingerprint:
             abort(404, "No data found for the selected entity and date range.")
 
         invoice_number = generate_invoice_number(entity_type)
+
+        # Identical inputs render identical reports; the date is part of the key as it is printed.
+        # The full entity data is only fetched when the report has to be rendered.
+        cache_key = content_key('report', export_type, period_start_str, period_end_str,
+                                datetime.now().strftime('%Y-%m-%d'), fingerprint)
         
         if export_type == 'pdf':
-            pdf_bytes = self._generate_invoice_pdf(
-                data_dict,
-                entity_type,
-                period_start_str,
-                period_end_str,
-                invoice_number=None,
-                is_invoice=False
-            )
+            report_path = cached_document(cache_key, 'pdf')
+            if not report_path:
+                data_dict = self._fetch_entity_data(entity_type, entity_id, *period_bounds)
+                pdf_bytes = self._generate_invoice_pdf(
+                    data_dict,
+                    entity_type,
+                    period_start_str,
+                    period_end_str,
+                    invoice_number=None,
+                    is_invoice=False
+                )
+                report_path = cache_document(cache_key, pdf_bytes, 'pdf')
             return send_file(
-                BytesIO(pdf_bytes),
+                report_path,
                 as_attachment=True,
                 download_name=f"{invoice_number.replace('/', '-')}-report.pdf",
                 mimetype="application/pdf"
             )
         
         elif export_type == 'excel':
+            report_path = cached_document(cache_key, 'xlsx')
+            if report_path:
+                return send_file(
+                    report_path,
+                    as_attachment=True,
+                    download_name=f"{invoice_number.replace('/', '-')}-report.xlsx",
+                    mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+
+            data_dict = self._fetch_entity_data(entity_type, entity_id, *period_bounds)
             excel_data = self._generate_excel_data(data_dict)
             output = BytesIO()
-            workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+            workbook = export_backends.xlsxwriter.Workbook(output, {'in_memory': True})
 
             header_format = workbook.add_format({
                 'bold': True,
@@ -809,10 +906,10 @@ class InvoiceExportResource(Resource, InvoiceCore):
                     worksheet.set_column(col_num, col_num, max_len + 2)
             
             workbook.close()
-            output.seek(0)
+            report_path = cache_document(cache_key, output.getvalue(), 'xlsx')
             
             return send_file(
-                output,
+                report_path,
                 as_attachment=True,
                 download_name=f"{invoice_number.replace('/', '-')}-report.xlsx",
                 mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
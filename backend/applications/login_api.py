@@ -1,9 +1,11 @@
 from flask import request, jsonify, current_app
 from flask_restful import Resource
 from flask_jwt_extended import create_access_token,jwt_required,get_jwt_identity
-from applications.model import db, User, Role, Permission
+from applications.model import db, User
 from applications.validation_utils import validate_user_data, validate_password
-from applications.utils import get_user_payload,normalize
+from applications.utils import get_user_payload, check_permission
+from applications.session_versions import session_versions
+from applications.password_hashing import needs_rehash
 from datetime import timedelta
 
 class LoginAPI(Resource):
@@ -14,11 +16,9 @@ class LoginAPI(Resource):
             if not name or not password:
                 return {"error": "Username and password required"}, 400
 
+            # Permissions come from the cached catalog; only the role row is needed here
             user = User.query\
-                .options(
-                    db.joinedload(User.role).joinedload(Role.permissions).joinedload(Permission.page),
-                    db.joinedload(User.permissions).joinedload(Permission.page)
-                )\
+                .options(db.joinedload(User.role))\
                 .filter_by(name=name).first()
 
             if not user or not user.check_password(password):
@@ -26,52 +26,19 @@ class LoginAPI(Resource):
 
             if user.status != 'active':
                 return {"error": "Your account is inactive. Please contact an administrator."}, 403
-            
-            perms_set = set()
-
-            # 1. Process ROLE permissions first
-            for p in user.role.permissions:
-                if not p.page:
-                    continue
 
-                page_name = normalize(p.page.name)
-                
-                if p.crud_operation == "none":
-                    continue
-                    
-                if p.crud_operation == "write":
-                    perms_set.add(f"{page_name}.read")
-                    perms_set.add(f"{page_name}.write")
-                elif p.crud_operation == "read":
-                    perms_set.add(f"{page_name}.read")
-
-            # 2. Process USER permissions to override
-            for p in user.permissions:
-                if not p.page:
-                    continue
-                page_name = normalize(p.page.name)
-                
-                # Remove existing permissions for this page
-                perms_set.discard(f"{page_name}.read")
-                perms_set.discard(f"{page_name}.write")
-                
-                if p.crud_operation == "write":
-                    perms_set.add(f"{page_name}.read")  # Write implies read
-                    perms_set.add(f"{page_name}.write")
-                elif p.crud_operation == "read":
-                    perms_set.add(f"{page_name}.read")
-                elif p.crud_operation == "none":
-                    pass  
+            # Upgrade hashes made with older algorithm/cost settings while the plain password is at hand
+            if needs_rehash(user.password):
+                user.set_password(password)
+                db.session.commit()
             
-
             additional_claims = {
                 "sub": str(user.id),
                 "username": user.name,  # ✅ Add username to token
-                "perms": [p.lower() for p in user.effective_permissions],
                 "role": user.role.name,
-                "is_admin": user.is_admin,
-                "session_version": user.session_version
+                **user.to_jwt_claims()  # compiled permission map, is_admin, session_version
             }
+            session_versions.set(user.id, user.session_version)
 
 
             access_token = create_access_token(
@@ -138,13 +105,8 @@ class VerifyTokenAPI(Resource):
         
 
 class BulkUpdateAPI(Resource):
-    @jwt_required()
+    @check_permission()
     def patch(self):
-        from flask_jwt_extended import get_jwt
-        claims = get_jwt()
-        if "user.update" not in claims.get("perms", []):
-            return {"error": "Forbidden"}, 403
-
         data = request.get_json() or {}
         ids, status = data.get("user_ids", []), data.get("status")
         if not ids or status not in ["active", "inactive"]:
@@ -152,6 +114,10 @@ class BulkUpdateAPI(Resource):
 
         users = User.query.filter(User.id.in_(ids)).all()
         for u in users:
-            u.status = status
+            if u.status != status:
+                u.status = status
+                u.session_version += 1
         db.session.commit()
+        for u in users:
+            session_versions.set(u.id, u.session_version)
         return {"message": "Users updated"}, 200
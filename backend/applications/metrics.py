@@ -0,0 +1,357 @@
+# applications/metrics.py
+"""
+Prometheus metrics, served in text format on GET /metrics.
+
+Recording is lock-free. Each thread writes to its own dict of {(metric, labels): value}, and
+only the first write from a new thread takes a lock, to register that dict. A scrape copies
+every thread's dict (dict.copy() is atomic under the GIL) and sums them.
+
+With METRICS_DIR set (gunicorn.conf.py sets it), every worker writes a snapshot of its own
+totals to <METRICS_DIR>/<pid>.json every METRICS_FLUSH_INTERVAL seconds. The worker that
+answers a scrape refreshes its own file first, then adds up all the files:
+- counters and histograms include workers that have since exited, so totals never go
+  backwards when gunicorn recycles a worker
+- gauges (requests in flight) only count live workers
+
+Recorded:
+- request count and latency per flask_restful resource and method
+- statement count and time per engine (primary / reporting)
+- export and PDF render time and size
+- invoices generated
+- ledger (CompanyAccountBalance) postings per mode
+- password hashing time
+"""
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from flask import Response, current_app, g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 2e7)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_local = threading.local()
+_shards = []
+_shards_lock = threading.Lock()
+
+
+def _shard():
+    values = getattr(_local, 'values', None)
+    if values is None or _local.pid != os.getpid():
+        values = _local.values = {}
+        _local.pid = os.getpid()
+        with _shards_lock:
+            _shards.append(values)
+    return values
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, *labels):
+        values = _shard()
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount=1, *labels):
+        self.inc(-amount, *labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        values = _shard()
+        key = (self.name, labels)
+        slots = values.get(key)
+        if slots is None:
+            # one slot per bucket plus +Inf, then sum and count
+            slots = values[key] = [0] * (len(self.buckets) + 3)
+        slots[bisect_left(self.buckets, value)] += 1
+        slots[-2] += value
+        slots[-1] += 1
+
+
+REGISTRY = []
+
+http_requests = Counter('http_requests_total', 'Requests served', ('resource', 'method', 'status'))
+http_latency = Histogram('http_request_duration_seconds', 'Request latency', ('resource', 'method'))
+http_in_flight = Gauge('http_requests_in_flight', 'Requests being served right now')
+db_statements = Counter('db_statements_total', 'SQL statements executed', ('engine',))
+db_latency = Histogram('db_statement_duration_seconds', 'SQL statement latency', ('engine',))
+export_render = Histogram('export_render_seconds', 'Time to render an export or PDF', ('kind', 'format'))
+export_size = Histogram('export_size_bytes', 'Size of a rendered export or PDF', ('kind', 'format'), SIZE_BUCKETS)
+invoices_generated = Counter('invoices_generated_total', 'Invoice requests by outcome', ('entity_type', 'outcome'))
+ledger_postings = Counter('ledger_postings_total', 'CompanyAccountBalance rows committed', ('mode', 'action'))
+ledger_amount = Counter('ledger_posted_amount_total', 'Absolute amount posted to the ledger', ('mode', 'direction'))
+password_hashing = Histogram('password_hash_seconds', 'Password hash/verify time', ('operation',))
+
+
+def timed_export(kind, fmt):
+    """
+    Time a render function and record the size of what it returns: bytes, or a send_file
+    response. Error returns (a (body, status) tuple) are not recorded.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+            size = len(result) if isinstance(result, (bytes, bytearray)) else getattr(result, 'content_length', None)
+            if size is not None:
+                export_render.observe(elapsed, kind, fmt)
+                export_size.observe(size, kind, fmt)
+            return result
+        return wrapper
+    return decorator
+
+
+def _snapshot():
+    """This process's totals: {(name, labels): value}."""
+    with _shards_lock:
+        shards = [shard.copy() for shard in _shards]
+    totals = {}
+    for shard in shards:
+        for key, value in shard.items():
+            if isinstance(value, list):
+                current = totals.get(key)
+                totals[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+            else:
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self.directory = None
+        self.interval = 5.0
+        self._thread = None
+        self._thread_pid = None
+        self._thread_lock = threading.Lock()
+
+    def init_app(self, app, db):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.directory = app.config.get('METRICS_DIR')
+        self.interval = app.config.get('METRICS_FLUSH_INTERVAL', 5.0)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        with app.app_context():
+            engines = [('primary', engine) for engine in db.engines.values()]
+        if app.extensions.get('reporting_engine') is not None:
+            engines.append(('reporting', app.extensions['reporting_engine']))
+        for name, engine in engines:
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _make_after_cursor_execute(name))
+
+        # Ledger rows count once their transaction commits, not when they are flushed
+        from applications.model import CompanyAccountBalance
+        event.listen(db.session, 'after_flush', lambda session, ctx: session.info.setdefault('ledger_rows', []).extend(
+            o for o in session.new if isinstance(o, CompanyAccountBalance)))
+        event.listen(db.session, 'after_commit', _record_ledger_rows)
+        event.listen(db.session, 'after_rollback', lambda session: session.info.pop('ledger_rows', None))
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['metrics'] = self
+
+    # --- requests ---
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        http_in_flight.inc()
+        if self.directory:
+            self._ensure_writer()
+
+    def _after_request(self, response):
+        started = g.get('metrics_started')
+        if started is not None:
+            resource = _resource_name()
+            http_latency.observe(time.perf_counter() - started, resource, request.method)
+            http_requests.inc(1, resource, request.method, str(response.status_code))
+        return response
+
+    def _teardown_request(self, exc):
+        if g.pop('metrics_started', None) is not None:
+            http_in_flight.dec()
+
+    # --- cross-worker aggregation ---
+
+    def _ensure_writer(self):
+        # Started lazily and per process so pre-forked workers each get their own thread
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._thread_lock:
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write_snapshot()
+            except OSError:
+                logger.exception("metrics snapshot failed")
+
+    def write_snapshot(self):
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump({'pid': os.getpid(),
+                       'values': [[name, list(labels), value] for (name, labels), value in _snapshot().items()]}, fh)
+        os.replace(tmp, path)
+
+    def collect(self):
+        """Totals across this process and, with METRICS_DIR, every other worker's last snapshot."""
+        if not self.directory:
+            return _snapshot()
+        self.write_snapshot()
+        gauges = {m.name for m in REGISTRY if m.kind == 'gauge'}
+        totals = {}
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, file_name)) as fh:
+                    snapshot = json.load(fh)
+            except (OSError, ValueError):
+                continue  # being replaced right now; its numbers arrive on the next scrape
+            alive = _pid_alive(snapshot['pid'])
+            for name, labels, value in snapshot['values']:
+                if name in gauges and not alive:
+                    continue
+                key = (name, tuple(labels))
+                current = totals.get(key)
+                if isinstance(value, list):
+                    totals[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    totals[key] = (current or 0) + value
+        return totals
+
+    def render(self):
+        totals = self.collect()
+        lines = []
+        for metric in REGISTRY:
+            series = sorted((labels, value) for (name, labels), value in totals.items() if name == metric.name)
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if not series and metric.kind == 'gauge':
+                lines.append(f"{metric.name} 0")
+            for labels, value in series:
+                pairs = list(zip(metric.labelnames, labels))
+                if metric.kind != 'histogram':
+                    lines.append(f"{metric.name}{_labels(pairs)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), value):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f"{metric.name}_bucket{_labels(pairs + [('le', le)])} {cumulative}")
+                lines.append(f"{metric.name}_sum{_labels(pairs)} {_number(value[-2])}")
+                lines.append(f"{metric.name}_count{_labels(pairs)} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+    def response(self):
+        return Response(self.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+    def after_fork(self):
+        """Forked workers start from zero; the parent's totals (startup seeding) are not theirs."""
+        global _shards, _shards_lock
+        _shards = []
+        _shards_lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        self._thread_lock = threading.Lock()
+
+
+def reset_metrics_dir(directory):
+    """Drop snapshots from a previous server run (gunicorn when_ready, before workers fork)."""
+    if directory and os.path.isdir(directory):
+        for file_name in os.listdir(directory):
+            os.remove(os.path.join(directory, file_name))
+
+
+def _resource_name():
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    view_class = getattr(view, 'view_class', None)
+    if view_class is not None:
+        return view_class.__name__
+    return request.endpoint or 'unmatched'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started_at', []).append(time.perf_counter())
+
+
+def _make_after_cursor_execute(engine_name):
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_started_at'].pop()
+        db_statements.inc(1, engine_name)
+        db_latency.observe(elapsed, engine_name)
+    return after_cursor_execute
+
+
+def _record_ledger_rows(session):
+    for row in session.info.pop('ledger_rows', ()):
+        amount = row.credited_amount or 0
+        ledger_postings.inc(1, row.mode, row.action or '')
+        ledger_amount.inc(abs(amount), row.mode, 'in' if amount >= 0 else 'out')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (f'{k}="{_escape(v)}"' for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = Metrics()
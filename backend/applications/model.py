@@ -2,11 +2,13 @@
 from datetime import datetime,date
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from applications.password_hashing import hash_password, verify_password
 from itertools import chain
 from sqlalchemy.ext.hybrid import hybrid_property
+from applications.permissions import PERMISSION_CLAIM, permission_strings, has_level
+from applications.reporting_db import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # association tables…
 role_permissions = db.Table('role_permissions',
@@ -61,9 +63,9 @@ class User(db.Model, UserMixin):
     session_version = db.Column(db.Integer, default=1, nullable=False)
 
     def set_password(self, pw):
-        self.password = generate_password_hash(pw)
+        self.password = hash_password(pw)
     def check_password(self, pw):
-        return check_password_hash(self.password, pw)
+        return verify_password(self.password, pw)
 
     @property
     def is_admin(self):
@@ -73,31 +75,12 @@ class User(db.Model, UserMixin):
         if self.is_admin:
             return True
 
-        # Define a permission hierarchy mapping
-        permission_order = {
-            'full': 4,
-            'modify': 3,
-            'write': 2,
-            'read': 1,
-            'none': 0,
-        }
-
         try:
             page, op = perm_str.split('.')
-            required_level = permission_order.get(op, 0)
         except ValueError:
             return False
 
-        effective_perms = self.effective_permissions
-        for effective_perm_str in effective_perms:
-            try:
-                effective_page, effective_op = effective_perm_str.split('.')
-                if effective_page == page and permission_order.get(effective_op, 0) >= required_level:
-                    return True
-            except ValueError:
-                continue
-
-        return False
+        return has_level(self.effective_permission_map, page, op)
 
     def validate(self):
         if not self.name: raise ValueError("Username required")
@@ -107,41 +90,22 @@ class User(db.Model, UserMixin):
             
     def to_jwt_claims(self):
         return {
-            "perms": self.effective_permissions,
+            # Admins bypass the map in check_permission, so their tokens do not carry one
+            PERMISSION_CLAIM: {} if self.is_admin else self.effective_permission_map,
             "is_admin": self.is_admin,
             "session_version": self.session_version
         }
 
     @property
     def effective_permissions(self):
-        if self.is_admin:
-            # For admins, grant full permission on all pages
-            return [f"{page.name.lower()}.full" for page in Page.query.all()]
-
-        # Define a permission hierarchy mapping
-        permission_order = {
-            'full': 4,
-            'modify': 3,
-            'write': 2,
-            'read': 1,
-            'none': 0,
-        }
+        return permission_strings(self.effective_permission_map)
 
-        perms = {}
-        
-        # Process user overrides first
-        for perm in self.permissions:
-            page_name = perm.page.name.lower()
-            perms[page_name] = perm.crud_operation
-
-        # Process role permissions as a fallback, but do not override existing user permissions
-        for perm in self.role.permissions:
-            page_name = perm.page.name.lower()
-            if page_name not in perms:
-                perms[page_name] = perm.crud_operation
-        
-        # Only return the final, effective permissions as strings, ignoring 'none'
-        return [f"{page}.{op}" for page, op in perms.items() if op != 'none']
+    @property
+    def effective_permission_map(self):
+        """{page_name: level} after applying user overrides on top of role permissions"""
+        # Imported here: the catalog module imports the models
+        from applications.permission_catalog import get_catalog
+        return get_catalog().effective_permission_map(self.id, self.role_id, self.is_admin)
     
 
     # Model for TravelAgency
@@ -378,6 +342,15 @@ class Ticket(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, onupdate=datetime.now)
     updated_by = db.Column(db.String(100), default='system')
+
+    # List sorts; keyset pagination (applications/pagination.py) walks these in order.
+    # (customer_id|agent_id, date) serve the per-customer/agent booking feed (booking_feed_api.py)
+    __table_args__ = (
+        db.Index('ix_ticket_ref_no', 'ref_no'),
+        db.Index('ix_ticket_date', 'date'),
+        db.Index('ix_ticket_customer_date', 'customer_id', 'date'),
+        db.Index('ix_ticket_agent_date', 'agent_id', 'date'),
+    )
     
     attachments = db.relationship(
         'Attachment',
@@ -428,6 +401,15 @@ class Visa(db.Model):
     updated_at = db.Column(db.DateTime, onupdate=datetime.now)
     updated_by = db.Column(db.String(100), default='system')
 
+    # List sorts; keyset pagination (applications/pagination.py) walks these in order.
+    # (customer_id|agent_id, date) serve the per-customer/agent booking feed (booking_feed_api.py)
+    __table_args__ = (
+        db.Index('ix_visa_ref_no', 'ref_no'),
+        db.Index('ix_visa_date', 'date'),
+        db.Index('ix_visa_customer_date', 'customer_id', 'date'),
+        db.Index('ix_visa_agent_date', 'agent_id', 'date'),
+    )
+
     attachments = db.relationship(
         'Attachment',
         primaryjoin="and_(Attachment.parent_type=='visa', foreign(Visa.id)==Attachment.parent_id)",
@@ -460,6 +442,9 @@ class Transaction(db.Model):
     
     updated_by = db.Column(db.String(100), default='system')
     extra_data = db.Column(db.JSON, default={})
+
+    # Per-type lists sorted by date (the default); ref_no already has its unique index
+    __table_args__ = (db.Index('ix_transaction_type_date', 'transaction_type', 'date'),)
     
     attachments = db.relationship(
         'Attachment',
@@ -505,6 +490,9 @@ class Service(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, onupdate=datetime.now)
     updated_by = db.Column(db.String(100), default='system')
+
+    # Date-ordered booking feed (booking_feed_api.py), overall and per customer
+    __table_args__ = (db.Index('ix_service_date', 'date'), db.Index('ix_service_customer_date', 'customer_id', 'date'))
     
     attachments = db.relationship(
         'Attachment',
@@ -541,6 +529,32 @@ class Invoice(db.Model):
     status = db.Column(db.String(20), default='pending')  # pending, paid, cancelled
     generated_date = db.Column(db.DateTime, default=datetime.now)
     pdf_path = db.Column(db.String(255), nullable=True)  # optional: store generated PDF path
+    input_fingerprint = db.Column(db.String(64), nullable=True)  # hash of the rows the PDF was built from
+
+    def __repr__(self):
+        return f"<Invoice {self.invoice_number} | {self.entity_type} {self.entity_id} | {self.status}>"
+
+
+class AppMeta(db.Model):
+    # Small key/value store for deployment state, e.g. the applied seed version (see bootstrap.py)
+    __tablename__ = 'app_meta'
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.String(255))
+
+
+class AuditLog(db.Model):
+    # Append-only; written in batches by applications/audit.py
+    __tablename__ = 'audit_log'
+    id = db.Column(db.Integer, primary_key=True)
+    occurred_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+    user_id = db.Column(db.Integer, index=True)
+    username = db.Column(db.String(100))
+    action = db.Column(db.String(20), nullable=False)  # insert, update, delete, bulk_update, bulk_delete
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer)
+    changes = db.Column(db.JSON, default={})  # {column: [before, after]}
+
+    __table_args__ = (db.Index('ix_audit_log_table_row', 'table_name', 'row_id', 'id'),)
 
     def __repr__(self):
-        return f"<Invoice {self.invoice_number} | {self.entity_type} {self.entity_id} | {self.status}>"
\ No newline at end of file
+        return f"<AuditLog {self.id} | {self.action} {self.table_name}:{self.row_id}>"
\ No newline at end of file
@@ -0,0 +1,115 @@
+# applications/pagination.py
+"""
+Keyset (cursor) pagination for the ticket, visa and transaction lists.
+
+Lists are ordered by (sort column, id). Each page comes back with next_cursor, an opaque
+token holding the sort column's value and the id of the last row on the page. Sending
+?cursor=<token> asks for the rows after that point with a WHERE on (sort column, id), so
+page 500 costs the same as page 1. An empty ?cursor= asks for the first page in cursor
+mode. Without a cursor, ?page=N still works with an OFFSET, for numbered pagers.
+
+total is the COUNT(*) of the filtered list. It is cached in result_cache under the filters
+(not the page or sort) and invalidated when any table the list reads is written.
+?include_total=0 skips it.
+
+NULL sort values follow SQLite: lowest, so first ascending and last descending.
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from flask import abort, request
+from sqlalchemy import and_, literal, or_, tuple_
+
+from applications.result_cache import result_cache
+
+PAGE_ARGS = ('page', 'per_page', 'cursor', 'sort_by', 'sort_order', 'include_total')
+
+SortKey = namedtuple('SortKey', 'name column id_column descending')
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        return date.fromisoformat(value['d'])
+    return value
+
+
+def encode_cursor(sort_key, value, row_id):
+    payload = json.dumps([sort_key.name, sort_key.descending, _dump(value), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(sort_key, token):
+    """(sort value, id) from a token issued for this same sort; 400 otherwise."""
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        name, descending, value, row_id = json.loads(payload)
+        value = _load(value)
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        abort(400, "Invalid cursor.")
+    if name != sort_key.name or descending != sort_key.descending or not isinstance(row_id, int):
+        abort(400, "Cursor does not match the requested sort; start again without a cursor.")
+    return value, row_id
+
+
+def order_by_key(query, sort_key):
+    if sort_key.descending:
+        return query.order_by(sort_key.column.desc(), sort_key.id_column.desc())
+    return query.order_by(sort_key.column.asc(), sort_key.id_column.asc())
+
+
+def keyset_filter(sort_key, value, row_id):
+    """Rows that come after (value, row_id) in sort_key order."""
+    column, id_column = sort_key.column, sort_key.id_column
+    # Bound with the column's type, so dates compare in the same text format they are stored in
+    key = tuple_(literal(value, column.type), literal(row_id, id_column.type))
+    if sort_key.descending:
+        if value is None:
+            return and_(column.is_(None), id_column < row_id)
+        return or_(tuple_(column, id_column) < key, column.is_(None))
+    if value is None:
+        return or_(column.isnot(None), and_(column.is_(None), id_column > row_id))
+    return tuple_(column, id_column) > key
+
+
+def paginate(query, sort_key, endpoint, tables, page=1, per_page=20):
+    """
+    One page of `query`, which must already carry its filters but no ORDER BY.
+    Returns (items, meta): meta has per_page and next_cursor, plus page in page mode and
+    total unless ?include_total=0. `endpoint` and `tables` key the cached total.
+    """
+    per_page = max(per_page, 1)
+    meta = {'per_page': per_page}
+    if request.args.get('include_total', '1') != '0':
+        filters = {**(request.view_args or {}), **{k: v for k, v in request.args.items() if k not in PAGE_ARGS}}
+        meta['total'] = result_cache.get_or_set(
+            f'{endpoint}_total', filters, tables, lambda: query.order_by(None).count()
+        )
+
+    keyed = order_by_key(query, sort_key).add_columns(sort_key.column.label('cursor_key'))
+    cursor = request.args.get('cursor')
+    if cursor:
+        keyed = keyed.filter(keyset_filter(sort_key, *decode_cursor(sort_key, cursor)))
+    elif cursor is None:
+        meta['page'] = max(page, 1)
+        keyed = keyed.offset((meta['page'] - 1) * per_page)
+
+    rows = keyed.limit(per_page + 1).all()
+    items = [row[0] for row in rows[:per_page]]
+    meta['next_cursor'] = None
+    if len(rows) > per_page:
+        last = rows[per_page - 1]
+        meta['next_cursor'] = encode_cursor(sort_key, last.cursor_key, getattr(last[0], sort_key.id_column.key))
+    return items, meta
@@ -0,0 +1,101 @@
+# applications/password_hashing.py
+"""
+Password hashing off the request thread.
+
+Hashes are computed with werkzeug on a bounded ProcessPoolExecutor, so a burst of logins keeps
+the CPU-bound work out of the interpreter that serves requests (the waiting thread releases the
+GIL). Algorithm and cost come from PASSWORD_HASH_METHOD (any werkzeug method string, e.g.
+"scrypt:32768:8:1" or "pbkdf2:sha256:600000"); stored hashes made with other parameters are
+upgraded on the next successful login via needs_rehash().
+
+PASSWORD_HASH_WORKERS=0 hashes inline, which is what tests and one-off scripts want. Outside a
+request (startup seeding, scripts) hashing is always inline, so a pre-fork master never starts
+pool processes that its workers would inherit.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app, has_app_context, has_request_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from applications.metrics import password_hashing as hash_seconds
+
+DEFAULT_METHOD = 'scrypt'
+DEFAULT_SALT_LENGTH = 16
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_canonical_methods = {}
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _method():
+    return _config('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+
+
+def _salt_length():
+    return _config('PASSWORD_HASH_SALT_LENGTH', DEFAULT_SALT_LENGTH)
+
+
+def _workers():
+    return _config('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1))
+
+
+def _executor():
+    """Pool per process: created lazily so pre-forked workers never share one."""
+    global _pool, _pool_pid
+    if _workers() <= 0 or not has_request_context():
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=_workers())
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _run(fn, *args):
+    executor = _executor()
+    if executor is None:
+        return fn(*args)
+    return executor.submit(fn, *args).result()
+
+
+def hash_password(password):
+    started = time.perf_counter()
+    password_hash = _run(generate_password_hash, password, _method(), _salt_length())
+    hash_seconds.observe(time.perf_counter() - started, 'hash')
+    return password_hash
+
+
+def hash_passwords(passwords):
+    """Hash many passwords in parallel, preserving order (bulk user creation)."""
+    executor = _executor()
+    method, salt_length = _method(), _salt_length()
+    if executor is None:
+        return [generate_password_hash(pw, method, salt_length) for pw in passwords]
+    return list(executor.map(generate_password_hash, passwords,
+                             [method] * len(passwords), [salt_length] * len(passwords)))
+
+
+def verify_password(password_hash, password):
+    started = time.perf_counter()
+    valid = _run(check_password_hash, password_hash, password)
+    hash_seconds.observe(time.perf_counter() - started, 'verify')
+    return valid
+
+
+def needs_rehash(password_hash):
+    """True when a stored hash was made with a different algorithm or cost than configured."""
+    method = _method()
+    if method not in _canonical_methods:
+        # werkzeug expands short names ("scrypt") to full parameters ("scrypt:32768:8:1")
+        _canonical_methods[method] = generate_password_hash('', method, 1).split('$', 1)[0]
+    return password_hash.split('$', 1)[0] != _canonical_methods[method]
@@ -1,9 +1,9 @@
 # applications/pdf_excel_export_helpers.py
-from fpdf import FPDF
 from io import BytesIO
 from datetime import datetime
 from flask import send_file, request
-import pandas as pd
+from applications import export_backends
+from applications.metrics import timed_export
 import re
 
 def _is_date_format(s, format_regex=r'^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2})?$'):
@@ -15,12 +15,13 @@ def _is_date_format(s, format_regex=r'^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2})?$')
         return re.match(format_regex, s) is not None
     return False
 
+@timed_export('report', 'pdf')
 def generate_export_pdf(data, title, date_range_start, date_range_end, summary_totals=None, exclude_columns=None, status=None):
     """
     A reusable function to generate a PDF export with dynamic headers, data, and summary.
     """
     try:
-        pdf = FPDF(orientation='L', unit='mm', format='A3')  # Increased to A3 to provide more space
+        pdf = export_backends.FPDF(orientation='L', unit='mm', format='A3')  # Increased to A3 to provide more space
         pdf.add_page()
         pdf.set_auto_page_break(auto=True, margin=15)
         
@@ -94,7 +95,7 @@ def generate_export_pdf(data, title, date_range_start, date_range_end, summary_t
         for row in data:
             max_row_height = 10
             
-            temp_pdf = FPDF(orientation='L', unit='mm', format='A3')
+            temp_pdf = export_backends.FPDF(orientation='L', unit='mm', format='A3')
             temp_pdf.set_font('Arial', '', 9)
             
             for key in headers:
@@ -182,10 +183,12 @@ def generate_export_pdf(data, title, date_range_start, date_range_end, summary_t
         print(f"PDF generation failed: {e}")
         return {'error': f'PDF export failed: {str(e)}'}, 500
 
+@timed_export('report', 'excel')
 def generate_export_excel(data, status, transaction_type=None):
     """
     A reusable function to generate an Excel export.
     """
+    pd = export_backends.pd
     try:
         if not data:
             # Handle empty data case for Excel
@@ -0,0 +1,90 @@
+# applications/permission_catalog.py
+"""
+Process-level snapshot of pages, permissions, role grants and user overrides.
+
+Effective permissions are computed from the snapshot, so login, /api/me and get_user_payload
+do not query Page/Permission or walk lazy relationships. The snapshot is tagged with a counter
+kept in app_meta, read with one primary-key lookup per use, so every worker process sees the
+same version. The admin write paths (PageAPI, RoleAPI, RolePermissionAPI, UserPermissionAPI)
+call invalidate_catalog() after committing, and the next reader in each process reloads the
+snapshot with four flat queries.
+"""
+import threading
+from collections import defaultdict
+
+from sqlalchemy import Integer, String, cast, update
+from sqlalchemy.exc import IntegrityError
+
+from applications.model import db, AppMeta, Page, Permission, role_permissions, user_permissions
+from applications.permissions import PERMISSION_LEVELS, compile_permission_map
+
+VERSION_KEY = 'permission_catalog_version'
+
+_catalog = None
+_lock = threading.Lock()
+
+
+class PermissionCatalog:
+    def __init__(self, version):
+        self.version = version
+        self.pages = dict(db.session.query(Page.id, Page.name).all())
+        self.permissions = {
+            perm_id: (self.pages.get(page_id, '').lower(), operation)
+            for perm_id, page_id, operation in db.session.query(
+                Permission.id, Permission.page_id, Permission.crud_operation
+            ).all()
+            if page_id in self.pages
+        }
+        self.role_permissions = defaultdict(list)
+        for role_id, perm_id in db.session.query(role_permissions.c.role_id, role_permissions.c.permission_id).all():
+            self.role_permissions[role_id].append(perm_id)
+        self.user_permissions = defaultdict(list)
+        for user_id, perm_id in db.session.query(user_permissions.c.user_id, user_permissions.c.permission_id).all():
+            self.user_permissions[user_id].append(perm_id)
+
+    def effective_permission_map(self, user_id, role_id, is_admin):
+        if is_admin:
+            # For admins, grant full permission on all pages
+            return {name.lower(): PERMISSION_LEVELS['full'] for name in self.pages.values()}
+
+        perms = {}
+        # Process user overrides first
+        for perm_id in self.user_permissions.get(user_id, ()):
+            if perm_id in self.permissions:
+                page_name, operation = self.permissions[perm_id]
+                perms[page_name] = operation
+
+        # Role permissions as a fallback, but do not override existing user permissions
+        for perm_id in self.role_permissions.get(role_id, ()):
+            if perm_id in self.permissions:
+                page_name, operation = self.permissions[perm_id]
+                perms.setdefault(page_name, operation)
+
+        return compile_permission_map(perms)
+
+
+def get_catalog():
+    global _catalog
+    version = db.session.query(AppMeta.value).filter(AppMeta.key == VERSION_KEY).scalar()
+    catalog = _catalog
+    if catalog is None or catalog.version != version:
+        with _lock:
+            if _catalog is None or _catalog.version != version:
+                _catalog = PermissionCatalog(version)
+            catalog = _catalog
+    return catalog
+
+
+def invalidate_catalog():
+    """Call after committing any change to pages, permissions, role grants or user overrides. Commits."""
+    bump = update(AppMeta).where(AppMeta.key == VERSION_KEY)\
+        .values(value=cast(cast(AppMeta.value, Integer) + 1, String))
+    if not db.session.execute(bump).rowcount:
+        db.session.add(AppMeta(key=VERSION_KEY, value='1'))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created the row first
+        db.session.rollback()
+        db.session.execute(bump)
+        db.session.commit()
@@ -0,0 +1,61 @@
+# applications/permissions.py
+"""
+Permission levels shared by the JWT check, User.has_permission and the login claims.
+
+Tokens carry a compiled map {page_name: level} under the "pm" claim, so a request is
+authorised with one dict lookup. Admin tokens carry no map at all (is_admin bypasses it).
+"""
+
+PERMISSION_LEVELS = {
+    'none': 0,
+    'read': 1,
+    'write': 2,
+    'modify': 3,
+    'full': 4,
+}
+
+PERMISSION_CLAIM = 'pm'
+
+
+def permission_level(operation):
+    return PERMISSION_LEVELS.get((operation or '').lower(), 0)
+
+
+def compile_permission_map(page_operations):
+    """{page: 'write', ...} -> {page: 2, ...}, dropping pages without access."""
+    compiled = {}
+    for page, operation in page_operations.items():
+        level = permission_level(operation)
+        if level:
+            compiled[page.lower()] = level
+    return compiled
+
+
+def compile_permission_strings(perm_strings):
+    """Legacy ["page.op", ...] list -> {page: level}, keeping the highest level per page."""
+    compiled = {}
+    for perm_string in perm_strings or []:
+        page, _, operation = perm_string.rpartition('.')
+        level = permission_level(operation)
+        if page and level > compiled.get(page, 0):
+            compiled[page] = level
+    return compiled
+
+
+def permission_strings(permission_map):
+    """{page: level} -> ["page.op", ...], the format the frontend consumes."""
+    names = {level: name for name, level in PERMISSION_LEVELS.items()}
+    return [f"{page}.{names[level]}" for page, level in permission_map.items() if level]
+
+
+def claims_permission_map(claims):
+    """Compiled map from JWT claims; tokens issued before "pm" existed still carry "perms"."""
+    permission_map = claims.get(PERMISSION_CLAIM)
+    if permission_map is None:
+        permission_map = compile_permission_strings(claims.get('perms'))
+    return permission_map
+
+
+def has_level(permission_map, page, operation):
+    required_level = permission_level(operation)
+    return required_level > 0 and permission_map.get(page.lower(), 0) >= required_level
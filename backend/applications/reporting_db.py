@@ -0,0 +1,63 @@
+# applications/reporting_db.py
+"""
+Read-only engine for reporting reads (dashboard, wallet lists, reports, exports).
+
+The engine has its own connection pool, so a long export never holds a connection the
+booking and transaction paths are waiting for. On SQLite it opens the same file with
+mode=ro and PRAGMA query_only=ON; REPORTING_DATABASE_URL can point it at a replica instead.
+
+Endpoints opt in with the read_only_db() decorator (or `with read_only_db():` around a
+block). Inside it RoutingSession sends queries to the reporting engine; flushes still go
+to the primary, and a stray write statement fails instead of silently running.
+"""
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+
+from applications.sqlite_profile import DEFAULT_PRAGMAS, install_sqlite_profile
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('db_read_only'):
+            engine = current_app.extensions.get('reporting_engine')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def read_only_db():
+    """Route this request's reads to the reporting engine while active (nests safely)."""
+    depth = g.get('db_read_only', 0)
+    g.db_read_only = depth + 1
+    try:
+        yield
+    finally:
+        g.db_read_only = depth
+
+
+def init_reporting_engine(app, db):
+    if not app.config.get('READ_ONLY_REPORTS', True):
+        return
+    pool_size = app.config.get('REPORTING_POOL_SIZE', 5)
+    url = app.config.get('REPORTING_DATABASE_URL')
+    with app.app_context():
+        primary = db.engine.url
+    if url:
+        engine = create_engine(url, pool_size=pool_size, pool_pre_ping=True)
+    elif primary.get_backend_name() == 'sqlite':
+        if not primary.database or primary.database == ':memory:':
+            return
+        engine = create_engine(f"sqlite:///file:{primary.database}?mode=ro&uri=true", pool_size=pool_size)
+    else:
+        engine = create_engine(primary, pool_size=pool_size, pool_pre_ping=True)
+
+    if engine.dialect.name == 'sqlite':
+        # journal_mode is a property of the file and cannot be changed from a read-only handle
+        pragmas = {k: v for k, v in app.config.get('SQLITE_PRAGMAS', DEFAULT_PRAGMAS).items() if k != 'journal_mode'}
+        pragmas['query_only'] = 'ON'
+        install_sqlite_profile(engine, pragmas)
+    app.extensions['reporting_engine'] = engine
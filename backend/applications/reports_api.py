@@ -5,9 +5,11 @@ from applications.utils import check_permission
 from applications.model import db, Customer, Agent, Partner, CompanyAccountBalance, Transaction, Ticket, Visa, Service
 from datetime import datetime, timedelta
 from applications.pdf_excel_export_helpers import generate_export_pdf, generate_export_excel
+from applications.result_cache import result_cache
+from applications.reporting_db import read_only_db
+from applications import export_backends
 from io import BytesIO
 import os
-from fpdf import FPDF
 
 # Assume a base URL for the project root to find the templates directory
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -16,6 +18,7 @@ FOOTER_PATH = os.path.join(BASE_DIR, 'templates', 'footer.jpg')
 
 class CompanyBalanceReportResource(Resource):
     @check_permission()
+    @read_only_db()
     def get(self, mode):
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
@@ -28,6 +31,37 @@ class CompanyBalanceReportResource(Resource):
         except (ValueError, TypeError):
             abort(400, "Missing or invalid date range. Use YYYY-MM-DD format.")
 
+        report = result_cache.get_or_set(
+            'company_balance_report',
+            {'mode': mode, 'start_date': start_date_str, 'end_date': end_date_str},
+            ['company_account_balance'],
+            lambda: self._build_report(mode, start_date, end_date)
+        )
+        data = report['entries']
+        start_balance = report['starting_balance']
+        end_balance = report['ending_balance']
+
+        # Handle exports
+        if export_format == 'excel':
+            return generate_export_excel(data=data, status=f'{mode}_report')
+        elif export_format == 'pdf':
+            return generate_export_pdf(
+                data=data,
+                title=f"{mode.capitalize()} Account Report",
+                date_range_start=start_date_str,
+                date_range_end=end_date_str,
+                summary_totals={"Opening Balance": start_balance, "Ending Balance": end_balance},
+                exclude_columns=[],
+                status=f'{mode}_report'
+            )
+
+        return {
+            "entries": data,
+            "starting_balance": round(start_balance, 2),
+            "ending_balance": round(end_balance, 2)
+        }, 200
+
+    def _build_report(self, mode, start_date, end_date):
         # We want the closing balance of the day before start_date
         prev_day_end = start_date - timedelta(seconds=1)
 
@@ -66,29 +100,16 @@ class CompanyBalanceReportResource(Resource):
         # Determine ending balance
         end_balance = entries[-1].balance if entries else start_balance
 
-        # Handle exports
-        if export_format == 'excel':
-            return generate_export_excel(data=data, status=f'{mode}_report')
-        elif export_format == 'pdf':
-            return generate_export_pdf(
-                data=data,
-                title=f"{mode.capitalize()} Account Report",
-                date_range_start=start_date_str,
-                date_range_end=end_date_str,
-                summary_totals={"Opening Balance": start_balance, "Ending Balance": end_balance},
-                exclude_columns=[],
-                status=f'{mode}_report'
-            )
-
         return {
             "entries": data,
-            "starting_balance": round(start_balance, 2),
-            "ending_balance": round(end_balance, 2)
-        }, 200
+            "starting_balance": start_balance,
+            "ending_balance": end_balance
+        }
 
 
 class InvoiceResource(Resource):
     @check_permission()
+    @read_only_db()
     def get(self, entity_type, entity_id):
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
@@ -210,7 +231,7 @@ class InvoiceResource(Resource):
         return formatted_bookings
 
     def _generate_invoice_pdf(self, data, entity_type):
-            class PDF(FPDF):
+            class PDF(export_backends.FPDF):
                 def header(self):
                     if os.path.exists(HEADER_PATH):
                         self.image(HEADER_PATH, x=0, y=0, w=self.w)
@@ -0,0 +1,244 @@
+# applications/result_cache.py
+"""
+Write-invalidated cache for read-heavy endpoints (dashboard, wallet lists, reports, invoice list).
+
+Entries are keyed by endpoint name + normalized parameters + the current version of every
+table the endpoint reads. Table versions are bumped when a session that wrote to the table
+commits, so a stale entry simply stops being addressed and ages out of the LRU.
+
+Backends:
+  memory - per-process LRU (default, single worker)
+  file   - shared SQLite file holding entries and table versions, for multi-worker deployments
+  none   - caching disabled
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from applications.document_store import content_key
+
+
+class MemoryBackend:
+    name = 'memory'
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._entries.move_to_end(key)
+            return item
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, tables):
+        with self._lock:
+            return [self._versions.get(t, 0) for t in tables]
+
+    def bump(self, tables):
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+    def size(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def after_fork(self):
+        # Another thread may have held the lock at fork time
+        self._lock = threading.Lock()
+
+
+class FileBackend:
+    """Entries and versions in one SQLite file, so every worker sees every other worker's bumps."""
+    name = 'file'
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, expires_at REAL, used_at REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_used_at ON entries (used_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (time.time(), key))
+        return row
+
+    def set(self, key, value, expires_at):
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO entries (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                     (key, value, expires_at, time.time()))
+        excess = self.size() - self.max_entries
+        if excess > 0:
+            conn.execute("DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY used_at LIMIT ?)", (excess,))
+
+    def versions(self, tables):
+        placeholders = ','.join('?' * len(tables))
+        rows = dict(self._conn().execute(
+            f"SELECT name, version FROM versions WHERE name IN ({placeholders})", list(tables)
+        ).fetchall())
+        return [rows.get(t, 0) for t in tables]
+
+    def bump(self, tables):
+        self._conn().executemany(
+            "INSERT INTO versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            [(t,) for t in tables]
+        )
+
+    def size(self):
+        return self._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self):
+        self._conn().execute("DELETE FROM entries")
+
+    def after_fork(self):
+        # SQLite connections must not cross a fork; the worker opens its own on first use
+        self._local = threading.local()
+
+
+class ResultCache:
+    def __init__(self):
+        self.backend = None
+        # Table versions stay available even with caching disabled; other caches key on them too
+        self.versions_backend = MemoryBackend(0)
+        self.ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self.endpoint_stats = {}
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app, session):
+        backend = app.config.get('RESULT_CACHE_BACKEND', 'memory')
+        max_entries = app.config.get('RESULT_CACHE_MAX_ENTRIES', 1000)
+        if backend == 'file':
+            self.backend = FileBackend(app.config['RESULT_CACHE_PATH'], max_entries)
+        elif backend == 'memory':
+            self.backend = MemoryBackend(max_entries)
+        else:
+            self.backend = None
+        self.versions_backend = self.backend or MemoryBackend(0)
+        # Safety net for writes that bypass the ORM session (0 = no expiry)
+        self.ttl = app.config.get('RESULT_CACHE_TTL', 0)
+
+        event.listen(session, 'after_flush', _collect_flushed_tables)
+        event.listen(session, 'do_orm_execute', _collect_bulk_tables)
+        event.listen(session, 'after_commit', lambda s: self._after_commit(s))
+        event.listen(session, 'after_rollback', lambda s: s.info.pop('result_cache_tables', None))
+        app.extensions['result_cache'] = self
+
+    def after_fork(self):
+        for backend in {id(b): b for b in (self.backend, self.versions_backend) if b is not None}.values():
+            backend.after_fork()
+        self._stats_lock = threading.Lock()
+
+    def _after_commit(self, session):
+        tables = session.info.pop('result_cache_tables', None)
+        if tables:
+            self.bump(*tables)
+
+    def bump(self, *tables):
+        """Invalidate every entry that depends on any of `tables`."""
+        if tables:
+            self.versions_backend.bump(sorted(tables))
+
+    def version(self, table):
+        return self.versions_backend.versions([table])[0]
+
+    def get_or_set(self, endpoint, params, tables, compute):
+        """
+        Return the cached result for `endpoint` + `params`, or call compute() and store it.
+        `tables` lists every table the result is derived from. Results must be JSON-serialisable.
+        """
+        if self.backend is None:
+            return compute()
+
+        tables = sorted(tables)
+        key = content_key(endpoint, params, tables, self.backend.versions(tables))
+        item = self.backend.get(key)
+        if item is not None and (not item[1] or item[1] > time.time()):
+            self._record(endpoint, hit=True)
+            return json.loads(item[0])
+
+        self._record(endpoint, hit=False)
+        result = compute()
+        expires_at = time.time() + self.ttl if self.ttl else 0
+        self.backend.set(key, json.dumps(result, default=str), expires_at)
+        return result
+
+    def _record(self, endpoint, hit):
+        with self._stats_lock:
+            stats = self.endpoint_stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            if hit:
+                self.hits += 1
+                stats['hits'] += 1
+            else:
+                self.misses += 1
+                stats['misses'] += 1
+
+    def stats(self):
+        """Hit/miss counters are per process; entries are shared when the file backend is used."""
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend.name if self.backend else 'none',
+            'entries': self.backend.size() if self.backend else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'endpoints': self.endpoint_stats,
+        }
+
+    def clear(self):
+        if self.backend:
+            self.backend.clear()
+
+
+def _collect_flushed_tables(session, flush_context):
+    tables = session.info.setdefault('result_cache_tables', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            tables.add(table)
+
+
+def _collect_bulk_tables(orm_execute_state):
+    # Query.update()/delete() and insert()/update() statements never go through a flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault('result_cache_tables', set()).add(table.name)
+
+
+result_cache = ResultCache()
@@ -0,0 +1,185 @@
+# applications/search_index.py
+"""
+Full-text search over bookings and transactions, using SQLite FTS5 with the trigram tokenizer.
+
+Each searchable table has a shadow FTS table (ticket_search, visa_search, service_search,
+transaction_search). Its rowid is the booking's id, and its columns hold the denormalised
+text the list screens search:
+- ref_no
+- customer, agent and partner names
+- passenger name
+- type: ticket type, visa type or particular
+
+Triggers keep the shadow tables in sync, so ORM writes, Core bulk inserts and tools/ all go
+through them. Renaming a customer, agent, partner, passenger or type also refreshes every
+document that shows that name.
+
+A trigram index answers substring matches like the LIKE '%q%' it replaces, case-insensitively,
+for queries of three characters or more. Shorter queries fall back to LIKE over the shadow
+table, which is still a single-table scan instead of a five-way join.
+
+install() runs from bootstrap.initialize_system. It rebuilds the tables when
+SEARCH_INDEX_VERSION changes. On other databases, or a SQLite build without FTS5,
+search_condition() returns None and callers keep their LIKE filters.
+"""
+from sqlalchemy import column, literal_column, or_, select, table, text
+from sqlalchemy.exc import OperationalError
+
+from applications.model import db, AppMeta
+
+SEARCH_INDEX_VERSION = '1'
+VERSION_KEY = 'search_index_version'
+FIELDS = ('ref_no', 'customer', 'agent', 'partner', 'passenger', 'type')
+MIN_MATCH_LENGTH = 3  # trigrams; shorter queries use LIKE
+
+PASSENGER_NAME = ("trim(coalesce(first_name, '') || coalesce(' ' || middle_name, '') || "
+                  "coalesce(' ' || last_name, ''))")
+LOOKUP_NAME = {'passenger': (PASSENGER_NAME, ('first_name', 'middle_name', 'last_name'))}
+
+# document -> field -> (lookup table, foreign key on the document, extra condition)
+DOCUMENTS = {
+    'ticket': {
+        'customer': ('customer', 'customer_id', None),
+        'agent': ('agent', 'agent_id', None),
+        'partner': ('partner', 'partner_id', None),
+        'passenger': ('passenger', 'passenger_id', None),
+        'type': ('ticket_type', 'ticket_type_id', None),
+    },
+    'visa': {
+        'customer': ('customer', 'customer_id', None),
+        'agent': ('agent', 'agent_id', None),
+        'partner': ('partner', 'partner_id', None),
+        'passenger': ('passenger', 'passenger_id', None),
+        'type': ('visa_type', 'visa_type_id', None),
+    },
+    'service': {
+        'customer': ('customer', 'customer_id', None),
+        'type': ('particular', 'particular_id', None),
+    },
+    'transaction': {
+        'customer': ('customer', 'entity_id', "d.entity_type = 'customer'"),
+        'agent': ('agent', 'entity_id', "d.entity_type = 'agent'"),
+        'partner': ('partner', 'entity_id', "d.entity_type = 'partner'"),
+        'type': ('particular', 'particular_id', None),
+    },
+}
+
+_available = {}
+
+
+def _fts(document):
+    return f"{document}_search"
+
+
+def _document_select(document, where=None):
+    """rowid plus every FIELDS value for rows of `document` (aliased d) matching `where`."""
+    values = ['d.id', 'd.ref_no']
+    for field in FIELDS[1:]:
+        spec = DOCUMENTS[document].get(field)
+        if spec is None:
+            values.append('NULL')
+            continue
+        lookup, fk, condition = spec
+        name = LOOKUP_NAME.get(lookup, ('name',))[0]
+        value = f"(SELECT {name} FROM \"{lookup}\" WHERE id = d.{fk})"
+        values.append(f"CASE WHEN {condition} THEN {value} END" if condition else value)
+    sql = f"SELECT {', '.join(values)} FROM \"{document}\" d"
+    return f"{sql} WHERE {where}" if where else sql
+
+
+def _insert(document, where=None):
+    return f"INSERT INTO {_fts(document)} (rowid, {', '.join(FIELDS)}) {_document_select(document, where)}"
+
+
+def _ddl(document):
+    fts = _fts(document)
+    specs = DOCUMENTS[document]
+    watched = ['ref_no'] + sorted({fk for _, fk, _ in specs.values()})
+    if any(condition for _, _, condition in specs.values()):
+        watched.append('entity_type')
+    statements = [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(FIELDS)}, tokenize='trigram')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON \"{document}\" BEGIN "
+        f"{_insert(document, 'd.id = NEW.id')}; END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {', '.join(watched)} ON \"{document}\" BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = OLD.id; {_insert(document, 'd.id = NEW.id')}; END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON \"{document}\" BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = OLD.id; END",
+    ]
+    # A renamed customer/agent/... refreshes the documents that show the name
+    for field, (lookup, fk, condition) in specs.items():
+        name_columns = LOOKUP_NAME.get(lookup, (None, ('name',)))[1]
+        where = f"d.{fk} = NEW.id" + (f" AND {condition}" if condition else '')
+        statements.append(
+            f"CREATE TRIGGER {fts}_{field}_au AFTER UPDATE OF {', '.join(name_columns)} ON \"{lookup}\" BEGIN "
+            f"DELETE FROM {fts} WHERE rowid IN (SELECT d.id FROM \"{document}\" d WHERE {where}); "
+            f"{_insert(document, where)}; END"
+        )
+    return statements
+
+
+def _drop(document):
+    fts = _fts(document)
+    statements = [f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ('ai', 'au', 'ad')]
+    statements += [f"DROP TRIGGER IF EXISTS {fts}_{field}_au" for field in DOCUMENTS[document]]
+    statements.append(f"DROP TABLE IF EXISTS {fts}")
+    return statements
+
+
+def install(force=False):
+    """
+    Create the FTS tables and triggers and fill them from the current rows, unless this
+    SEARCH_INDEX_VERSION is already installed. Commits. Returns True if it (re)built.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    meta = db.session.get(AppMeta, VERSION_KEY)
+    if not force and meta and meta.value == SEARCH_INDEX_VERSION:
+        return False
+    try:
+        for document in DOCUMENTS:
+            for statement in _drop(document) + _ddl(document) + [_insert(document)]:
+                db.session.execute(text(statement))
+    except OperationalError:
+        # SQLite built without FTS5 or trigram (< 3.34): searches keep using LIKE
+        db.session.rollback()
+        return False
+    if meta:
+        meta.value = SEARCH_INDEX_VERSION
+    else:
+        db.session.add(AppMeta(key=VERSION_KEY, value=SEARCH_INDEX_VERSION))
+    db.session.commit()
+    _available.clear()
+    return True
+
+
+def is_available():
+    engine = db.engine
+    if engine.url not in _available:
+        installed = False
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as conn:
+                installed = conn.execute(text(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = :name"
+                ), {'name': _fts('transaction')}).scalar() > 0
+        _available[engine.url] = installed
+    return _available[engine.url]
+
+
+def search_condition(document, id_column, query):
+    """
+    `id_column IN (ids of `document` rows whose searchable text contains `query`)`, or None when
+    the index is not available and the caller should apply its own LIKE filter.
+    """
+    if not is_available():
+        return None
+    fts = table(_fts(document), column('rowid'), *(column(field) for field in FIELDS))
+    phrase = query.strip()
+    if len(phrase) >= MIN_MATCH_LENGTH:
+        # One quoted phrase: matched as a substring, FTS operators in the input stay literal
+        condition = literal_column(fts.name).op('MATCH')('"' + phrase.replace('"', '""') + '"')
+    else:
+        # Unstripped, like the LIKE filters this replaces: a blank query must not become '%%'
+        pattern = f"%{query}%"
+        condition = or_(*(fts.c[field].like(pattern) for field in FIELDS))
+    return id_column.in_(select(fts.c.rowid).where(condition))
@@ -5,6 +5,8 @@ from applications.utils import check_permission
 from applications.model import db, Customer, Particular, Service, CompanyAccountBalance
 from datetime import datetime, timedelta, date
 from applications.pdf_excel_export_helpers import generate_export_pdf, generate_export_excel
+from applications.reporting_db import read_only_db
+from applications.search_index import search_condition
 
 class ServiceResource(Resource):
     def __init__(self, **kwargs):
@@ -36,14 +38,16 @@ class ServiceResource(Resource):
             query = query.filter_by(status=status)
 
         if search_query:
-            search_pattern = f'%{search_query.lower()}%'
-            query = query.join(Customer, isouter=True)\
-                         .join(Particular, isouter=True)\
-                         .filter(db.or_(
-                             db.func.lower(Service.ref_no).like(search_pattern),
-                             db.func.lower(Customer.name).like(search_pattern),
-                             db.func.lower(Particular.name).like(search_pattern)
-                         ))
+            matches = search_condition('service', Service.id, search_query)
+            if matches is None:
+                search_pattern = f'%{search_query.lower()}%'
+                query = query.join(Customer, isouter=True).join(Particular, isouter=True)
+                matches = db.or_(
+                    db.func.lower(Service.ref_no).like(search_pattern),
+                    db.func.lower(Customer.name).like(search_pattern),
+                    db.func.lower(Particular.name).like(search_pattern)
+                )
+            query = query.filter(matches)
             
         services = query.all()
         return [self._format_service(s) for s in services], 200
@@ -441,6 +445,7 @@ class ServiceResource(Resource):
                     service.ref_no
                 )
 
+    @read_only_db()
     def export_services(self, format_type):
         status = request.args.get('status', 'booked')
         start_date, end_date = self._parse_date_range()
@@ -459,14 +464,16 @@ class ServiceResource(Resource):
             query = query.filter_by(status=status)
 
         if search_query:
-            search_pattern = f'%{search_query.lower()}%'
-            query = query.join(Customer, isouter=True)\
-                         .join(Particular, isouter=True)\
-                         .filter(db.or_(
-                             db.func.lower(Service.ref_no).like(search_pattern),
-                             db.func.lower(Customer.name).like(search_pattern),
-                             db.func.lower(Particular.name).like(search_pattern)
-                         ))
+            matches = search_condition('service', Service.id, search_query)
+            if matches is None:
+                search_pattern = f'%{search_query.lower()}%'
+                query = query.join(Customer, isouter=True).join(Particular, isouter=True)
+                matches = db.or_(
+                    db.func.lower(Service.ref_no).like(search_pattern),
+                    db.func.lower(Customer.name).like(search_pattern),
+                    db.func.lower(Particular.name).like(search_pattern)
+                )
+            query = query.filter(matches)
 
         services = query.all()
         data = [self._format_service_for_export(s) for s in services]
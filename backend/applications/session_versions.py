@@ -0,0 +1,54 @@
+# applications/session_versions.py
+"""
+In-process map of user_id -> current User.session_version, used to reject revoked tokens.
+
+Every JWT carries the session_version it was issued with. Write paths that change what a
+user may do (permissions, role, status, password) increment User.session_version and record
+the new value here; entries expire after SESSION_VERSION_TTL seconds and are then re-read
+from the database, which bounds how long another worker can serve a revoked token.
+"""
+import threading
+import time
+
+from applications.model import db, User
+
+
+class SessionVersionRegistry:
+    def __init__(self):
+        self.ttl = 60
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('SESSION_VERSION_TTL', 60)
+        app.extensions['session_versions'] = self
+
+    def is_current(self, claims):
+        try:
+            user_id = int(claims.get('sub'))
+        except (TypeError, ValueError):
+            return False
+        current = self.current(user_id)
+        return current is not None and claims.get('session_version') == current
+
+    def current(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+
+        # Miss or expired: one indexed primary-key read, then cached for ttl seconds
+        version = db.session.query(User.session_version).filter(User.id == user_id).scalar()
+        self.set(user_id, version)
+        return version
+
+    def set(self, user_id, version):
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic() + self.ttl)
+
+    def forget(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+
+session_versions = SessionVersionRegistry()
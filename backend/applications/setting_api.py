@@ -3,11 +3,15 @@ from sqlalchemy.exc import IntegrityError
 from flask_restful import Resource
 from applications.model import db,User, Role, Permission, Page,role_permissions, user_permissions
 from applications.utils import check_permission, serialize_entity
+from applications.permission_catalog import invalidate_catalog
+from applications.session_versions import session_versions
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from flask import current_app
 from flask_jwt_extended import get_jwt # Import get_jwt to get claims
 from sqlalchemy import func # Import func to handle SQL functions like lower()
+from sqlalchemy import bindparam
+from applications.permissions import PERMISSION_LEVELS
 
 
 class RoleAPI(Resource):
@@ -72,6 +76,7 @@ class RoleAPI(Resource):
         role = Role.query.get_or_404(role_id)
         db.session.delete(role)
         db.session.commit()
+        invalidate_catalog()
         return {'message': 'Role deleted'}, 200
 
 
@@ -135,7 +140,14 @@ class RolePermissionAPI(Resource):
             new_perms.append(permission)
 
         role.permissions = new_perms
+        # Tokens carry permissions compiled at login, so every holder of the role must log in again
+        member_ids = [uid for (uid,) in db.session.query(User.id).filter(User.role_id == role.id).all()]
+        User.query.filter(User.role_id == role.id).update(
+            {User.session_version: User.session_version + 1}, synchronize_session=False
+        )
         db.session.commit()
+        invalidate_catalog()
+        session_versions.forget(*member_ids)
         return {
             "message": "Permissions updated successfully",
             "permissions": [
@@ -145,6 +157,126 @@ class RolePermissionAPI(Resource):
         }, 200
 
 
+class BulkPermissionAPI(Resource):
+    """
+    PUT /api/permissions/bulk
+    {
+      "target": "user" | "role",
+      "ids": [1, 2, 3],
+      "permissions": [{"page_id": 1, "operation": "write"}, {"page_id": 2, "operation": "inherit"}]
+    }
+    Applies every (id x page) assignment in one transaction. For users "inherit" removes the
+    override; roles accept only real operations. Pages not listed are left untouched.
+    """
+    TARGETS = {
+        'user': (User, user_permissions, user_permissions.c.user_id),
+        'role': (Role, role_permissions, role_permissions.c.role_id),
+    }
+
+    @check_permission()
+    def put(self):
+        data = request.get_json(force=True) or {}
+        target = data.get('target')
+        ids = data.get('ids')
+        assignments = data.get('permissions')
+
+        if target not in self.TARGETS:
+            return {"message": "target must be 'user' or 'role'"}, 400
+        if not isinstance(ids, list) or not ids or not isinstance(assignments, list) or not assignments:
+            return {"message": "ids and permissions must be non-empty lists"}, 400
+
+        allowed_ops = set(PERMISSION_LEVELS) | ({'inherit'} if target == 'user' else set())
+        page_ops = {}
+        for perm in assignments:
+            if not all(k in perm for k in ('page_id', 'operation')):
+                return {"message": "Invalid permission format"}, 400
+            operation = str(perm['operation']).lower()
+            if operation not in allowed_ops:
+                return {"message": f"Invalid operation '{perm['operation']}' for {target}"}, 400
+            page_ops[perm['page_id']] = operation
+
+        model, association, owner_column = self.TARGETS[target]
+        ids = set(ids)
+        found_ids = {row_id for (row_id,) in db.session.query(model.id).filter(model.id.in_(ids))}
+        if missing := ids - found_ids:
+            return {"message": f"{target.capitalize()}s not found: {', '.join(map(str, sorted(missing)))}"}, 404
+        found_pages = {page_id for (page_id,) in db.session.query(Page.id).filter(Page.id.in_(page_ops))}
+        if missing := set(page_ops) - found_pages:
+            return {"message": f"Pages not found: {', '.join(map(str, sorted(missing)))}"}, 404
+
+        try:
+            # Every Permission row of the affected pages in one IN query; create missing (page, op) pairs
+            perm_ids = {
+                (page_id, op): perm_id for perm_id, page_id, op in db.session.query(
+                    Permission.id, Permission.page_id, Permission.crud_operation
+                ).filter(Permission.page_id.in_(page_ops))
+            }
+            missing_perms = [
+                Permission(page_id=page_id, crud_operation=op)
+                for page_id, op in page_ops.items()
+                if op != 'inherit' and (page_id, op) not in perm_ids
+            ]
+            if missing_perms:
+                db.session.add_all(missing_perms)
+                db.session.flush()
+                perm_ids.update({(p.page_id, p.crud_operation): p.id for p in missing_perms})
+
+            desired = {
+                (owner_id, perm_ids[(page_id, op)])
+                for owner_id in ids
+                for page_id, op in page_ops.items()
+                if op != 'inherit'
+            }
+            current = set(db.session.query(owner_column, association.c.permission_id).filter(
+                owner_column.in_(ids),
+                association.c.permission_id.in_(set(perm_ids.values()))
+            ).all())
+
+            to_delete = current - desired
+            to_insert = desired - current
+            if to_delete:
+                db.session.execute(
+                    association.delete().where(
+                        owner_column == bindparam('owner_id'),
+                        association.c.permission_id == bindparam('perm_id')
+                    ),
+                    [{'owner_id': o, 'perm_id': p} for o, p in to_delete]
+                )
+            if to_insert:
+                db.session.execute(
+                    association.insert(),
+                    [{owner_column.name: o, 'permission_id': p} for o, p in to_insert]
+                )
+
+            # Tokens carry permissions compiled at login: bump each affected user once
+            changed_owners = {o for o, _ in to_delete | to_insert}
+            if target == 'user':
+                affected_users = changed_owners
+            else:
+                affected_users = {uid for (uid,) in db.session.query(User.id).filter(User.role_id.in_(changed_owners))} if changed_owners else set()
+            if affected_users:
+                User.query.filter(User.id.in_(affected_users)).update(
+                    {User.session_version: User.session_version + 1}, synchronize_session=False
+                )
+
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"BulkPermissionAPI Error: {str(e)}")
+            return {"error": "Database operation failed"}, 500
+
+        if changed_owners:
+            invalidate_catalog()
+            session_versions.forget(*affected_users)
+
+        return {
+            "message": "Permissions updated successfully",
+            "inserted": len(to_insert),
+            "deleted": len(to_delete),
+            "affected_users": sorted(affected_users)
+        }, 200
+
+
 class PageAPI(Resource):
     @check_permission()
     def get(self):
@@ -187,6 +319,7 @@ class PageAPI(Resource):
                 db.session.add(perm)
 
             db.session.commit()
+            invalidate_catalog()
             return {
                 **serialize_entity(page),
                 "permissions": operations
@@ -203,6 +336,7 @@ class PageAPI(Resource):
         if 'name' in request.json: p.name = request.json['name']
         if 'route' in request.json: p.route = request.json['route']
         db.session.commit()
+        invalidate_catalog()
         return serialize_entity(p), 200
 
     @check_permission()
@@ -227,5 +361,6 @@ class PageAPI(Resource):
         # Step 4: Delete the page
         db.session.delete(page)
         db.session.commit()
+        invalidate_catalog()
 
         return {"message": "Page and related permissions deleted successfully"}, 200
@@ -0,0 +1,250 @@
+# applications/slow_query_log.py
+"""
+Slow query recorder.
+
+Any statement slower than SLOW_QUERY_MS is written as one JSON line to a rotating file with:
+- its bound parameters, redacted: strings keep only their length and any leading/trailing
+  LIKE wildcard, so an unanchored '%term%' search is still recognisable
+- the endpoint and user that issued it
+- on SQLite, its EXPLAIN QUERY PLAN. Plans that SCAN a table rather than SEARCH an index are
+  marked full_scan.
+
+The EXPLAIN runs on the same DBAPI connection, bypassing SQLAlchemy events, and only for
+statements that already crossed the threshold. GET /api/system/slow-queries groups the log
+by statement and ranks the worst offenders.
+
+Each process writes its own file next to SLOW_QUERY_LOG_PATH, e.g. slow_queries.<pid>.jsonl,
+and rotates only that file, so gunicorn workers never rename a file another worker is still
+writing. The reader merges every process's files. Files left by processes that have exited
+are deleted oldest first once they exceed the size of one process's rotation set.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, date
+from logging.handlers import RotatingFileHandler
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('applications.slow_queries')
+logger.propagate = False
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def _redact(value):
+    if isinstance(value, str):
+        prefix = '%' if value.startswith('%') else ''
+        suffix = '%' if value.endswith('%') and len(value) > 1 else ''
+        return f"{prefix}<str:{len(value) - len(prefix) - len(suffix)}>{suffix}"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return '<bytes>'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters):
+    if isinstance(parameters, dict):
+        return {key: _redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact(value) for value in parameters]
+    return _redact(parameters)
+
+
+def _explain(dbapi_connection, statement, parameters):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"EXPLAIN failed: {e.__class__.__name__}"]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.threshold = 0.2
+        self.explain = True
+        self.path = None
+        self.max_bytes = 5 * 1024 * 1024
+        self.backup_count = 3
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        if not app.config.get('SLOW_QUERY_LOG', True):
+            return
+        self.threshold = app.config.get('SLOW_QUERY_MS', 200) / 1000
+        self.explain = app.config.get('SLOW_QUERY_EXPLAIN', True)
+        self.path = app.config['SLOW_QUERY_LOG_PATH']
+        self.max_bytes = app.config.get('SLOW_QUERY_MAX_BYTES', 5 * 1024 * 1024)
+        self.backup_count = app.config.get('SLOW_QUERY_BACKUP_COUNT', 3)
+        self._open()
+
+        with app.app_context():
+            engines = [('primary', engine) for engine in db.engines.values()]
+        if app.extensions.get('reporting_engine') is not None:
+            engines.append(('reporting', app.extensions['reporting_engine']))
+        for name, engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._make_after_cursor_execute(name))
+        app.extensions['slow_query_log'] = self
+
+    def _open(self):
+        """Point the logger at this process's file; also run on the first record after a fork."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+            root, ext = os.path.splitext(self.path)
+            # delay: no empty file for processes that never record anything
+            handler = RotatingFileHandler(f"{root}.{os.getpid()}{ext}", maxBytes=self.max_bytes,
+                                          backupCount=self.backup_count, encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            self._pid = os.getpid()
+        self._prune()
+
+    def _files(self):
+        """(path, pid) for every process's log file and rotated backup."""
+        directory, name = os.path.split(self.path)
+        root, ext = os.path.splitext(name)
+        pattern = re.compile(re.escape(root) + r'\.(\d+)' + re.escape(ext) + r'(?:\.\d+)?$')
+        try:
+            names = os.listdir(directory or '.')
+        except FileNotFoundError:
+            return []
+        return [(os.path.join(directory, n), int(m.group(1))) for n in names if (m := pattern.match(n))]
+
+    def _prune(self):
+        """Delete files of exited processes, oldest first, beyond one rotation set's worth of bytes."""
+        budget = self.max_bytes * (self.backup_count + 1)
+        dead = []
+        for path, pid in self._files():
+            if pid != os.getpid() and not _alive(pid):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                dead.append((stat.st_mtime, stat.st_size, path))
+        kept = 0
+        for _, size, path in sorted(dead, reverse=True):
+            kept += size
+            if kept > budget:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_started_at', []).append(time.perf_counter())
+
+    def _make_after_cursor_execute(self, engine_name):
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info['slow_query_started_at'].pop()
+            if elapsed >= self.threshold:
+                self.record(conn, engine_name, statement, parameters, executemany, elapsed)
+        return after_cursor_execute
+
+    def record(self, conn, engine_name, statement, parameters, executemany, elapsed):
+        entry = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'duration_ms': round(elapsed * 1000, 2),
+            'engine': engine_name,
+            'statement': ' '.join(statement.split()),
+            # executemany: the first row is representative and keeps the line short
+            'parameters': redact_parameters(parameters[0] if executemany and parameters else parameters),
+            'rows': len(parameters) if executemany else None,
+            'pid': os.getpid(),
+        }
+        if has_request_context():
+            entry.update({
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'user_id': g.get('user_id'),
+                'username': g.get('username'),
+            })
+        if (self.explain and not executemany and conn.dialect.name == 'sqlite'
+                and entry['statement'].lstrip('(').upper().startswith(EXPLAINABLE)):
+            plan = _explain(conn.connection.dbapi_connection, statement, parameters)
+            entry['plan'] = plan
+            entry['full_scan'] = any(step.startswith('SCAN ') for step in plan)
+        if self._pid != os.getpid():
+            self._open()
+        logger.info(json.dumps(entry, default=str))
+
+    def entries(self):
+        """Every recorded entry in every process's files, oldest first."""
+        if not self.path:
+            return []
+        entries = []
+        for path, _ in self._files():
+            try:
+                with open(path, encoding='utf-8') as fh:
+                    for line in fh:
+                        try:
+                            entries.append(json.loads(line))
+                        except ValueError:
+                            continue  # line still being written
+            except FileNotFoundError:
+                continue  # rotated or pruned while listing
+        entries.sort(key=lambda entry: entry.get('ts', ''))
+        return entries
+
+    def worst_offenders(self, limit=20, endpoint=None, full_scan_only=False):
+        """Group entries by statement; rank by total time spent."""
+        groups = defaultdict(lambda: {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'endpoints': set()})
+        for entry in self.entries():
+            if endpoint and entry.get('endpoint') != endpoint:
+                continue
+            if full_scan_only and not entry.get('full_scan'):
+                continue
+            group = groups[entry['statement']]
+            group['count'] += 1
+            group['total_ms'] += entry['duration_ms']
+            if entry['duration_ms'] >= group['max_ms']:
+                group['max_ms'] = entry['duration_ms']
+                group['slowest'] = entry
+            group['last_seen'] = entry['ts']
+            if entry.get('endpoint'):
+                group['endpoints'].add(entry['endpoint'])
+
+        ranked = sorted(groups.items(), key=lambda item: -item[1]['total_ms'])[:limit]
+        return [{
+            'statement': statement,
+            'count': group['count'],
+            'total_ms': round(group['total_ms'], 2),
+            'avg_ms': round(group['total_ms'] / group['count'], 2),
+            'max_ms': group['max_ms'],
+            'last_seen': group['last_seen'],
+            'endpoints': sorted(group['endpoints']),
+            'full_scan': group['slowest'].get('full_scan'),
+            'plan': group['slowest'].get('plan'),
+            'slowest': {k: group['slowest'].get(k) for k in ('ts', 'parameters', 'path', 'username')},
+        } for statement, group in ranked]
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,108 @@
+# applications/sql_instrumentation.py
+"""
+Per-request SQL statement counter and N+1 detector.
+
+Cursor events on every engine (primary and reporting) add each statement's count and time
+to the current request. Statements are grouped by their SQL text, which still has bound
+placeholders, so the same lookup run once per row shows up as one shape repeated N times.
+Shapes repeated at least SQL_N_PLUS_ONE_THRESHOLD times are flagged as likely N+1 loops.
+
+After each request the totals go out as headers (X-SQL-Count, X-SQL-Time-Ms, X-SQL-Repeated
+and a Server-Timing entry) and as one JSON log line on the "applications.sql" logger, at
+WARNING when an N+1 shape was flagged. SQL_INSTRUMENTATION=0 registers nothing at all.
+"""
+import json
+import logging
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('applications.sql')
+
+MAX_LOGGED_SHAPES = 5
+SHAPE_PREVIEW_CHARS = 200
+
+
+class RequestSQLStats:
+    __slots__ = ('count', 'seconds', 'shapes')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def repeated(self, threshold):
+        return [(sql, n) for sql, n in self.shapes.most_common() if n >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('sql_started_at', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['sql_started_at'].pop()
+    if not has_request_context():
+        return
+    stats = g.get('sql_stats')
+    if stats is None:
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - started
+    stats.shapes[statement] += 1
+
+
+def current_stats():
+    """RequestSQLStats for the running request, or None outside a request / when disabled."""
+    return g.get('sql_stats') if has_request_context() else None
+
+
+def init_sql_instrumentation(app, db):
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+    threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5)
+    send_headers = app.config.get('SQL_INSTRUMENTATION_HEADERS', True)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    if app.extensions.get('reporting_engine') is not None:
+        engines.append(app.extensions['reporting_engine'])
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_sql_stats():
+        g.sql_stats = RequestSQLStats()
+
+    @app.after_request
+    def report_sql_stats(response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        repeated = stats.repeated(threshold)
+        elapsed_ms = round(stats.seconds * 1000, 2)
+
+        if send_headers:
+            response.headers['X-SQL-Count'] = str(stats.count)
+            response.headers['X-SQL-Time-Ms'] = str(elapsed_ms)
+            response.headers['X-SQL-Repeated'] = str(len(repeated))
+            response.headers.add('Server-Timing', f'db;dur={elapsed_ms};desc="{stats.count} queries"')
+
+        level = logging.WARNING if repeated else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'user_id': g.get('user_id'),
+                'sql_count': stats.count,
+                'sql_ms': elapsed_ms,
+                'n_plus_one': [
+                    {'count': n, 'sql': ' '.join(sql.split())[:SHAPE_PREVIEW_CHARS]}
+                    for sql, n in repeated[:MAX_LOGGED_SHAPES]
+                ],
+            }))
+        return response
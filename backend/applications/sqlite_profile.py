@@ -0,0 +1,46 @@
+# applications/sqlite_profile.py
+"""
+Connection-level tuning for SQLite, applied once per pooled DBAPI connection.
+
+WAL lets readers proceed while a writer commits, synchronous=NORMAL is durable under WAL
+except for power loss between checkpoints, and busy_timeout makes a second writer wait for
+the lock instead of failing with "database is locked". foreign_keys is per connection in
+SQLite, so it lives here too rather than being re-issued on every request.
+
+The profile comes from app.config['SQLITE_PRAGMAS'] (see main.py); a pragma set to None is
+left at SQLite's default.
+"""
+from sqlalchemy import event
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,        # ms
+    'cache_size': -64000,        # negative = KiB, i.e. 64 MB per connection
+    'mmap_size': 268435456,      # 256 MB
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+
+
+def install_sqlite_profile(engine, pragmas):
+    """Register a connect listener that applies `pragmas` to every new connection of `engine`."""
+    if engine.dialect.name != 'sqlite':
+        return
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items() if value is not None]
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def init_sqlite_profile(app, db):
+    pragmas = app.config.get('SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+    with app.app_context():
+        for engine in db.engines.values():
+            install_sqlite_profile(engine, pragmas)
@@ -0,0 +1,91 @@
+# applications/system_api.py
+import hmac
+import os
+from flask import current_app, request
+from flask_restful import Resource
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from applications.model import db
+from applications.utils import require_admin
+from applications.result_cache import result_cache
+from applications.slow_query_log import slow_query_log
+from applications.metrics import metrics
+
+
+class ResultCacheStatsAPI(Resource):
+    @require_admin
+    def get(self):
+        """GET /api/system/cache - backend, entry count and hit/miss counters"""
+        return result_cache.stats(), 200
+
+    @require_admin
+    def delete(self):
+        """DELETE /api/system/cache - drop every cached result"""
+        result_cache.clear()
+        return {"message": "Result cache cleared."}, 200
+
+
+class HealthAPI(Resource):
+    def get(self):
+        """GET /api/health - liveness: the worker is up and serving requests (no DB access)"""
+        return {"status": "ok", "pid": os.getpid()}, 200
+
+
+class ReadinessAPI(Resource):
+    def get(self):
+        """GET /api/ready - readiness: the primary (and reporting) database answer a trivial query"""
+        checks = {}
+        try:
+            db.session.execute(text("SELECT 1"))
+            checks["database"] = "ok"
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            checks["database"] = str(e.__class__.__name__)
+
+        reporting_engine = current_app.extensions.get('reporting_engine')
+        if reporting_engine is not None:
+            try:
+                with reporting_engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                checks["reporting_database"] = "ok"
+            except SQLAlchemyError as e:
+                checks["reporting_database"] = str(e.__class__.__name__)
+
+        ready = all(v == "ok" for v in checks.values())
+        return {"status": "ready" if ready else "unavailable", "pid": os.getpid(), "checks": checks}, 200 if ready else 503
+
+
+class SlowQueryLogAPI(Resource):
+    @require_admin
+    def get(self):
+        """
+        GET /api/system/slow-queries?limit=20&endpoint=ticket_operations&full_scan=1
+        Slow statements grouped by SQL text, ranked by total time, with the slowest sample's plan.
+        """
+        args = request.args
+        limit = min(args.get('limit', 20, type=int), 200)
+        offenders = slow_query_log.worst_offenders(
+            limit=limit,
+            endpoint=args.get('endpoint'),
+            full_scan_only=args.get('full_scan') == '1'
+        )
+        return {
+            "threshold_ms": round(slow_query_log.threshold * 1000, 2),
+            "log_path": slow_query_log.path,
+            "offenders": offenders
+        }, 200
+
+
+class MetricsAPI(Resource):
+    def get(self):
+        """
+        GET /metrics
+        Prometheus text format, summed across workers. Open unless METRICS_TOKEN is set, in which
+        case the scraper sends it as a bearer token.
+        """
+        if not current_app.config.get('METRICS_ENABLED', True):
+            return {"error": "Metrics are disabled"}, 404
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+            return {"error": "Unauthorized"}, 401
+        return metrics.response()
@@ -7,6 +7,9 @@ from applications.model import db, Customer, Agent, Ticket, Particular, TravelLo
 from sqlalchemy import or_, func
 from datetime import datetime, date, timedelta
 from applications.pdf_excel_export_helpers import generate_export_excel, generate_export_pdf
+from applications.reporting_db import read_only_db
+from applications.search_index import search_condition
+from applications.pagination import SortKey, order_by_key, paginate
 from applications.common_booking_resource import CommonBookingResource
 
 class TicketResource(Resource, CommonBookingResource):
@@ -61,61 +64,55 @@ class TicketResource(Resource, CommonBookingResource):
             except ValueError:
                 return {'error': 'Invalid date format. Use YYYY-MM-DD.'}, 400
         
-        if search_query:
-            search_pattern = f'%{search_query.lower()}%'
+        # Name sorts and the LIKE fallback read the joined tables
+        name_sorts = {
+            'customer_name': Customer.name,
+            'agent_name': Agent.name,
+            'passenger_name': Passenger.name,
+            'ticket_type_name': TicketType.name,
+        }
+        matches = search_condition('ticket', self.MODEL.id, search_query) if search_query else None
+        if sort_by in name_sorts or (search_query and matches is None):
             query = query.outerjoin(Customer, self.MODEL.customer_id == Customer.id)\
                          .outerjoin(Agent, self.MODEL.agent_id == Agent.id)\
                          .outerjoin(Passenger, self.MODEL.passenger_id == Passenger.id)\
-                         .outerjoin(TicketType, self.MODEL.ticket_type_id == TicketType.id)\
-                         .filter(or_(
-                            func.lower(self.MODEL.ref_no).like(search_pattern),
-                            func.lower(Customer.name).like(search_pattern),
-                            func.lower(Agent.name).like(search_pattern),
-                            func.lower(Passenger.name).like(search_pattern),
-                            func.lower(TicketType.name).like(search_pattern),
-                         ))
-        
-        if sort_by in ['ref_no', 'date', 'customer_name', 'passenger_name', 'agent_name', 'agent_paid', 'customer_charge', 'profit', 'ticket_type_name']:
-            if sort_by in ['customer_name', 'agent_name', 'passenger_name', 'ticket_type_name']:
-                sort_model = {
-                    'customer_name': Customer,
-                    'agent_name': Agent,
-                    'passenger_name': Passenger,
-                    'ticket_type_name': TicketType,
-                }.get(sort_by)
-                if sort_model:
-                    sort_column = getattr(sort_model, 'name')
-                    if sort_order == 'ascend':
-                        query = query.order_by(sort_column.asc())
-                    else:
-                        query = query.order_by(sort_column.desc())
-            else:
-                sort_column = getattr(self.MODEL, sort_by)
-                if sort_order == 'ascend':
-                    query = query.order_by(sort_column.asc())
-                else:
-                    query = query.order_by(sort_column.desc())
+                         .outerjoin(TicketType, self.MODEL.ticket_type_id == TicketType.id)
+
+        if search_query:
+            if matches is None:
+                search_pattern = f'%{search_query.lower()}%'
+                matches = or_(
+                    func.lower(self.MODEL.ref_no).like(search_pattern),
+                    func.lower(Customer.name).like(search_pattern),
+                    func.lower(Agent.name).like(search_pattern),
+                    func.lower(Passenger.name).like(search_pattern),
+                    func.lower(TicketType.name).like(search_pattern),
+                )
+            query = query.filter(matches)
+
+        if sort_by in name_sorts:
+            sort_column = name_sorts[sort_by]
+        elif sort_by in ['ref_no', 'date', 'agent_paid', 'customer_charge', 'profit']:
+            sort_column = getattr(self.MODEL, sort_by)
         else:
-            query = query.order_by(self.MODEL.ref_no.desc())
-            
+            sort_by, sort_column, sort_order = 'ref_no', self.MODEL.ref_no, 'desc'
+        sort_key = SortKey(sort_by, sort_column, self.MODEL.id, sort_order != 'ascend')
+
         if export_format in ['excel', 'pdf']:
-            tickets = query.all()
-            formatted_data = [self._format_for_export(rec) for rec in tickets]
+            with read_only_db():
+                tickets = order_by_key(query, sort_key).all()
+                formatted_data = [self._format_for_export(rec) for rec in tickets]
             if export_format == 'excel':
                 return generate_export_excel(formatted_data, 'ticket')
             if export_format == 'pdf':
                 title = f"{status.capitalize()} Tickets"
                 return generate_export_pdf(formatted_data, title, start_date_str, end_date_str, status='ticket')
 
-        paginated_result = query.paginate(page=page, per_page=per_page, error_out=False)
-        tickets = paginated_result.items
-        
-        return {
-            'data': [self._format_ticket(rec) for rec in tickets],
-            'total': paginated_result.total,
-            'page': paginated_result.page,
-            'per_page': paginated_result.per_page
-        }, 200
+        tickets, page_meta = paginate(
+            query, sort_key, 'ticket_list', ['ticket', 'customer', 'agent', 'partner', 'passenger', 'ticket_type'],
+            page=page, per_page=per_page
+        )
+        return {'data': [self._format_ticket(rec) for rec in tickets], **page_meta}, 200
 
     @check_permission()
     def post(self, action=None):
@@ -6,6 +6,9 @@ from applications.model import db, Customer, Agent, Partner, Transaction ,Passen
 from datetime import datetime, timedelta
 from dateutil.parser import parse as parse_date
 from applications.pdf_excel_export_helpers import generate_export_pdf, generate_export_excel
+from applications.reporting_db import read_only_db
+from applications.search_index import search_condition
+from applications.pagination import SortKey, paginate
 from sqlalchemy import case
 
 TRANSACTION_TYPES = ['payment', 'receipt', 'refund', 'wallet_transfer']
@@ -471,57 +474,51 @@ class TransactionResource(Resource):
             except ValueError:
                 return {'error': 'Invalid date format. Use YYYY-MM-DD.'}, 400
 
-        # Apply search filter
-        if search_query:
-            search_pattern = f'%{search_query.lower()}%'
+        allowed_sort_columns = ['ref_no', 'date', 'entity_name', 'amount']
+        if sort_by not in allowed_sort_columns:
+            sort_by = 'date'
+
+        # The entity_name sort and the LIKE fallback read the joined tables
+        matches = search_condition('transaction', Transaction.id, search_query) if search_query else None
+        if sort_by == 'entity_name' or (search_query and matches is None):
             query = query.outerjoin(Customer, (Transaction.entity_type == 'customer') & (Transaction.entity_id == Customer.id))\
                          .outerjoin(Agent, (Transaction.entity_type == 'agent') & (Transaction.entity_id == Agent.id))\
                          .outerjoin(Partner, (Transaction.entity_type == 'partner') & (Transaction.entity_id == Partner.id))\
-                         .outerjoin(Particular, Transaction.particular_id == Particular.id)\
-                         .filter(db.or_(
-                            db.func.lower(Transaction.ref_no).like(search_pattern),
-                            db.func.lower(Customer.name).like(search_pattern),
-                            db.func.lower(Agent.name).like(search_pattern),
-                            db.func.lower(Partner.name).like(search_pattern),
-                            db.func.lower(Particular.name).like(search_pattern)
-                         ))
+                         .outerjoin(Particular, Transaction.particular_id == Particular.id)
 
-        # Apply sorting
-        allowed_sort_columns = ['ref_no', 'date', 'entity_name', 'amount']
-        if sort_by not in allowed_sort_columns:
-            sort_by = 'date'
+        # Apply search filter
+        if search_query:
+            if matches is None:
+                search_pattern = f'%{search_query.lower()}%'
+                matches = db.or_(
+                    db.func.lower(Transaction.ref_no).like(search_pattern),
+                    db.func.lower(Customer.name).like(search_pattern),
+                    db.func.lower(Agent.name).like(search_pattern),
+                    db.func.lower(Partner.name).like(search_pattern),
+                    db.func.lower(Particular.name).like(search_pattern)
+                )
+            query = query.filter(matches)
 
+        # Apply sorting
         if sort_by == 'entity_name':
             # Special handling for entity name sorting
-            entity_name_expr = case(
-                [
-                    (Transaction.entity_type == 'customer', Customer.name),
-                    (Transaction.entity_type == 'agent', Agent.name),
-                    (Transaction.entity_type == 'partner', Partner.name)
-                ],
+            sort_column = case(
+                (Transaction.entity_type == 'customer', Customer.name),
+                (Transaction.entity_type == 'agent', Agent.name),
+                (Transaction.entity_type == 'partner', Partner.name),
                 else_=None
             )
-            if sort_order == 'asc':
-                query = query.order_by(entity_name_expr.asc())
-            else:
-                query = query.order_by(entity_name_expr.desc())
         else:
-            column = getattr(Transaction, sort_by)
-            if sort_order == 'asc':
-                query = query.order_by(column.asc())
-            else:
-                query = query.order_by(column.desc())
+            sort_column = getattr(Transaction, sort_by)
+        sort_key = SortKey(sort_by, sort_column, Transaction.id, sort_order != 'asc')
 
         # Apply pagination
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        transactions = pagination.items
+        transactions, page_meta = paginate(
+            query, sort_key, 'transaction_list', ['transaction', 'customer', 'agent', 'partner', 'particular'],
+            page=page, per_page=per_page
+        )
 
-        return {
-            "transactions": [get_transaction_payload(t) for t in transactions],
-            "total": pagination.total,
-            "page": page,
-            "per_page": per_page
-        }, 200
+        return {"transactions": [get_transaction_payload(t) for t in transactions], **page_meta}, 200
 
     @check_permission()
     def post(self, transaction_type):
@@ -661,6 +658,7 @@ class TransactionResource(Resource):
             db.session.rollback()
             return {'error': str(e)}, 400
 
+    @read_only_db()
     def _export_transactions(self, transaction_type, format_type):
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
@@ -679,18 +677,21 @@ class TransactionResource(Resource):
                 return {'error': 'Invalid date format. Use YYYY-MM-DD.'}, 400
 
         if search_query:
-            search_pattern = f'%{search_query.lower()}%'
-            query = query.outerjoin(Customer, (Transaction.entity_type == 'customer') & (Transaction.entity_id == Customer.id))\
-                         .outerjoin(Agent, (Transaction.entity_type == 'agent') & (Transaction.entity_id == Agent.id))\
-                         .outerjoin(Partner, (Transaction.entity_type == 'partner') & (Transaction.entity_id == Partner.id))\
-                         .outerjoin(Particular, Transaction.particular_id == Particular.id)\
-                         .filter(db.or_(
-                            db.func.lower(Transaction.ref_no).like(search_pattern),
-                            db.func.lower(Customer.name).like(search_pattern),
-                            db.func.lower(Agent.name).like(search_pattern),
-                            db.func.lower(Partner.name).like(search_pattern),
-                            db.func.lower(Particular.name).like(search_pattern)
-                         ))
+            matches = search_condition('transaction', Transaction.id, search_query)
+            if matches is None:
+                search_pattern = f'%{search_query.lower()}%'
+                query = query.outerjoin(Customer, (Transaction.entity_type == 'customer') & (Transaction.entity_id == Customer.id))\
+                             .outerjoin(Agent, (Transaction.entity_type == 'agent') & (Transaction.entity_id == Agent.id))\
+                             .outerjoin(Partner, (Transaction.entity_type == 'partner') & (Transaction.entity_id == Partner.id))\
+                             .outerjoin(Particular, Transaction.particular_id == Particular.id)
+                matches = db.or_(
+                    db.func.lower(Transaction.ref_no).like(search_pattern),
+                    db.func.lower(Customer.name).like(search_pattern),
+                    db.func.lower(Agent.name).like(search_pattern),
+                    db.func.lower(Partner.name).like(search_pattern),
+                    db.func.lower(Particular.name).like(search_pattern)
+                )
+            query = query.filter(matches)
 
         transactions = query.all()
 
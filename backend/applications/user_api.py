@@ -1,8 +1,13 @@
-from flask import request,abort
+import csv
+import io
+from flask import request,abort,current_app
 from flask_restful import Resource
 from applications.model import db, User, Permission, Role, Page,role_permissions, user_permissions
-from applications.utils import check_permission, get_user_payload
-from applications.validation_utils import validate_user_data, validate_password,create_existing_cache
+from applications.utils import check_permission, get_user_payload, verify_session_version
+from applications.validation_utils import validate_user_data, validate_password,create_existing_cache,add_to_existing_cache
+from applications.permission_catalog import invalidate_catalog
+from applications.session_versions import session_versions
+from applications.password_hashing import hash_passwords
 from sqlalchemy import func, case
 from sqlalchemy.orm import joinedload,aliased
 from sqlalchemy.exc import IntegrityError
@@ -88,6 +93,11 @@ class UserAPI(Resource):
                 abort(pw_code, pw_msg)
         
         try:
+            # Role, status or password changes invalidate the user's existing tokens
+            revoke = bool(data.get('password')) or any(
+                field in data and data[field] != getattr(user, field) for field in ('role_id', 'status')
+            )
+
             # Update fields
             for field in ['name', 'full_name','email', 'role_id', 'emp_id', 'status']:
                 if field in data:
@@ -95,8 +105,12 @@ class UserAPI(Resource):
             
             if 'password' in data:
                 user.set_password(data['password'])
+
+            if revoke:
+                user.session_version += 1
             
             db.session.commit()
+            session_versions.set(user.id, user.session_version)
             return get_user_payload(user), 200
         except Exception as e:
             db.session.rollback()
@@ -107,6 +121,7 @@ class UserAPI(Resource):
         user = User.query.get_or_404(user_id)
         db.session.delete(user)
         db.session.commit()
+        session_versions.forget(user_id)
         return {'message': 'User deleted'}, 200
 
 class UserPermissionAPI(Resource):
@@ -196,6 +211,8 @@ class UserPermissionAPI(Resource):
         user.permissions = existing_perms + updated_perms
         user.session_version += 1
         db.session.commit()
+        invalidate_catalog()
+        session_versions.set(user.id, user.session_version)
 
         return {
             "message": "Permissions updated",
@@ -216,7 +233,10 @@ class UserPermissionAPI(Resource):
             p for p in user.permissions
             if p.page_id not in page_ids
         ]
+        user.session_version += 1
         db.session.commit()
+        invalidate_catalog()
+        session_versions.set(user.id, user.session_version)
         return {"deleted": page_ids}, 200
 
     def options(self, user_id):
@@ -333,10 +353,11 @@ class BulkUserAPI(Resource):
             if missing_ids:
                 abort(404, f"Users not found: {', '.join(map(str, missing_ids))}")
 
-            # Apply updates to each user
+            # Apply updates to each user; status/role changes invalidate existing tokens
             for user in users:
                 for field, value in updates.items():
                     setattr(user, field, value)
+                user.session_version += 1
 
             # Bulk validation before commit
             for user in users:
@@ -345,10 +366,13 @@ class BulkUserAPI(Resource):
             # Optimized bulk update
             db.session.bulk_update_mappings(User, [{
                 'id': u.id,
+                'session_version': u.session_version,
                 **{f: v for f, v in updates.items()}
             } for u in users])
             
             db.session.commit()
+            for u in users:
+                session_versions.set(u.id, u.session_version)
             
             return {
                 "message": f"Successfully updated {len(users)} users",
@@ -396,6 +420,7 @@ class BulkDeleteAPI(Resource):
                 abort(404, "No users found for deletion")
                 
             db.session.commit()
+            session_versions.forget(*user_ids)
             
             return {
                 "message": f"Successfully deleted {delete_count} users",
@@ -407,37 +432,46 @@ class BulkDeleteAPI(Resource):
             abort(400, str(e))
 
 class BulkUserCreateAPI(Resource):
+    # Columns accepted from JSON rows and CSV uploads
+    IMPORT_FIELDS = ['name', 'full_name', 'password', 'email', 'role_id', 'emp_id', 'status']
+
     @check_permission()
     def post(self):
-        data = request.get_json()
-        if not data or 'users' not in data:
-            abort(400, "Missing users array in request body")
-            
-        users_data = data['users']
-        
-        if not isinstance(users_data, list) or len(users_data) == 0:
-            abort(400, "users must be a non-empty list")
-
-        # Create cache of existing identifiers
+        """
+        POST /api/users/bulk
+        JSON body {"users": [...]} or a multipart CSV upload in field "file" with a header row
+        of IMPORT_FIELDS. Rows are validated in one pass against identifiers loaded once;
+        nothing is saved unless every row is valid.
+        """
+        upload = request.files.get('file')
+        if upload:
+            # DictReader pulls rows straight off the upload stream
+            users_data = csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''))
+        else:
+            data = request.get_json(silent=True)
+            if not data or 'users' not in data:
+                abort(400, "Missing users array in request body")
+            users_data = data['users']
+            if not isinstance(users_data, list) or len(users_data) == 0:
+                abort(400, "users must be a non-empty list")
+
+        # Existing identifiers and role ids are loaded once; accepted rows are added
+        # to the same sets so intra-batch duplicates are caught too
         existing_cache = create_existing_cache()
+        role_ids = {role_id for (role_id,) in db.session.query(Role.id)}
         new_users = []
+        new_passwords = []
         errors = []
-        batch_cache = {
-            'names': set(),
-            'emails': set(),
-            'emp_ids': set()
-        }
 
-        for index, user_data in enumerate(users_data):
-            # Combine existing cache with batch cache
-            combined_cache = {
-                'names': existing_cache['names'] | batch_cache['names'],
-                'emails': existing_cache['emails'] | batch_cache['emails'],
-                'emp_ids': existing_cache['emp_ids'] | batch_cache['emp_ids']
-            }
-            
+        for index, raw_row in enumerate(users_data):
+            try:
+                user_data = self._normalize_row(raw_row)
+            except ValueError as e:
+                errors.append({"index": index, "user": raw_row, "error": str(e), "code": 400})
+                continue
+
             # Validate user data
-            is_valid, msg, code = validate_user_data(user_data, existing_cache=combined_cache)
+            is_valid, msg, code = validate_user_data(user_data, existing_cache=existing_cache, role_ids=role_ids)
             if not is_valid:
                 errors.append({
                     "index": index,
@@ -446,19 +480,8 @@ class BulkUserCreateAPI(Resource):
                     "code": code
                 })
                 continue
-            
-            # Validate password
-            password = user_data.get('password')
-            if not password:
-                errors.append({
-                    "index": index,
-                    "user": user_data,
-                    "error": "Password is required",
-                    "code": 400
-                })
-                continue
-                
-            is_pw_valid, pw_msg, pw_code = validate_password(password)
+
+            is_pw_valid, pw_msg, pw_code = validate_password(user_data['password'])
             if not is_pw_valid:
                 errors.append({
                     "index": index,
@@ -467,36 +490,15 @@ class BulkUserCreateAPI(Resource):
                     "code": pw_code
                 })
                 continue
-            
-            try:
-                # Create user object
-                user = User(
-                    name=user_data['name'],
-                    full_name=user_data['full_name'],
-                    email=user_data.get('email'),
-                    role_id=user_data.get('role_id'),
-                    emp_id=user_data.get('emp_id'),
-                    status=user_data.get('status', 'active')
-                )
-                user.set_password(password)
-                new_users.append(user)
-                
-                # Add to batch cache to prevent intra-batch duplicates
-                batch_cache['names'].add(user_data['name'].lower())
-                if user_data.get('email'):
-                    batch_cache['emails'].add(user_data['email'].lower())
-                if user_data.get('emp_id'):
-                    batch_cache['emp_ids'].add(user_data['emp_id'])
-                    
-            except Exception as e:
-                errors.append({
-                    "index": index,
-                    "user": user_data,
-                    "error": str(e),
-                    "code": 500
-                })
-        
+
+            add_to_existing_cache(existing_cache, user_data)
+            new_passwords.append(user_data.pop('password'))
+            new_users.append(user_data)
+
         if errors:
+            # Passwords never go back to the client
+            for error in errors:
+                error['user'] = {k: v for k, v in dict(error['user']).items() if isinstance(k, str) and k != 'password'}
             return {
                 "message": "Some users have errors",
                 "success_count": len(new_users),
@@ -508,7 +510,10 @@ class BulkUserCreateAPI(Resource):
             return {"message": "No valid users to create"}, 400
 
         try:
-            db.session.bulk_save_objects(new_users)
+            for user_data, password_hash in zip(new_users, hash_passwords(new_passwords)):
+                user_data['password'] = password_hash
+            # One executemany INSERT for the whole batch
+            db.session.execute(User.__table__.insert(), new_users)
             db.session.commit()
             return {
                 "message": f"Successfully created {len(new_users)} users",
@@ -516,10 +521,34 @@ class BulkUserCreateAPI(Resource):
             }, 201
         except IntegrityError as e:
             db.session.rollback()
-            return self.handle_integrity_error(e, new_users)
+            return self.handle_integrity_error(e, [User(**u) for u in new_users])
         except Exception as e:
             db.session.rollback()
-            abort(500, f"Bulk create failed: {str(e)}")
+            # e.orig: the driver's message without the bound rows (which hold password hashes)
+            current_app.logger.error(f"Bulk user create failed: {getattr(e, 'orig', e)!r}")
+            abort(500, "Bulk create failed")
+
+    def _normalize_row(self, row):
+        """
+        Trim strings, drop unknown columns and coerce ids (CSV cells arrive as text).
+        Every row gets all IMPORT_FIELDS, missing ones as None: the executemany INSERT takes
+        its column list from the first row.
+        """
+        user_data = {}
+        for field in self.IMPORT_FIELDS:
+            value = row.get(field)
+            if isinstance(value, str):
+                value = value.strip() or None
+            user_data[field] = value
+        for field in ('role_id', 'emp_id'):
+            if user_data[field] is not None:
+                try:
+                    user_data[field] = int(user_data[field])
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid {field}: {user_data[field]}")
+        if user_data['status'] is None:
+            user_data['status'] = 'active'
+        return user_data
 
     def handle_integrity_error(self, e, attempted_users):
         error_info = str(e.orig).lower()
@@ -601,11 +630,10 @@ class UserDuplicateCheckAPI(Resource):
 class CurrentUserAPI(Resource):
     @jwt_required()
     def get(self):
+        verify_session_version(get_jwt())
         uid = get_jwt_identity()
-        user = User.query.options(
-            joinedload(User.role).joinedload(Role.permissions).joinedload(Permission.page),
-            joinedload(User.permissions).joinedload(Permission.page)
-        ).get(uid)
+        # Effective permissions come from the cached catalog, not the relationships
+        user = User.query.options(joinedload(User.role)).get(uid)
         
         if not user:
             abort(404, description="User not found")
@@ -2,6 +2,8 @@ from functools import wraps
 from flask import abort,request
 from flask_jwt_extended import jwt_required, get_jwt
 from applications.model import User
+from applications.permissions import claims_permission_map, has_level
+from applications.session_versions import session_versions
 
 from flask import request, abort, g
 from functools import wraps
@@ -13,15 +15,7 @@ def check_permission():
         @jwt_required()
         def wrapper(*args, **kwargs):
             claims = get_jwt()
-
-            # Define a permission hierarchy mapping
-            permission_order = {
-                'full': 4,
-                'modify': 3,
-                'write': 2,
-                'read': 1,
-                'none': 0,
-            }
+            verify_session_version(claims)
 
             # Store user info for downstream use (e.g., audit logs)
             g.user_id = claims.get("sub")
@@ -38,22 +32,8 @@ def check_permission():
             if not resource or not operation:
                 abort(400, "Missing permission headers")
 
-            perms = claims.get("perms", [])
-            
-            has_access = False
-            required_level = permission_order.get(operation, 0)
-            
-            if required_level > 0:
-                for perm_string in perms:
-                    try:
-                        perm_resource, perm_op = perm_string.split('.')
-                        if perm_resource == resource and permission_order.get(perm_op, 0) >= required_level:
-                            has_access = True
-                            break
-                    except ValueError:
-                        continue
-
-            if has_access:
+            # Compiled {page: level} map from the token: one dict lookup per request
+            if has_level(claims_permission_map(claims), resource, operation):
                 return fn(*args, **kwargs)
 
             abort(403, f"Requires {resource}.{operation}")
@@ -66,12 +46,19 @@ def require_admin(fn):
     @jwt_required()
     def wrapper(*args, **kwargs):
         claims = get_jwt()
+        verify_session_version(claims)
         if not claims.get("is_admin"):
             abort(403, description="Admin access required")
         return fn(*args, **kwargs)
     return wrapper
+
+def verify_session_version(claims):
+    """Reject tokens issued before the user's permissions/role/status last changed."""
+    if not session_versions.is_current(claims):
+        abort(401, "Session expired. Please log in again.")
+
 def get_perms_for_audit(user_id):
-    user = User.get(user_id)
+    user = User.query.get(user_id)
     return user.effective_permissions
 def serialize_entity(entity):
     return {col.name: getattr(entity, col.name) for col in entity.__table__.columns}
@@ -3,10 +3,13 @@ from applications.model import db, User, Role
 from sqlalchemy import func
 import re
 
-def validate_user_data(data, existing_user=None, existing_cache=None):
+def validate_user_data(data, existing_user=None, existing_cache=None, role_ids=None):
     """
     Validate user data with comprehensive checks
     Returns tuple: (is_valid, error_message, status_code)
+
+    Bulk callers pass existing_cache (see create_existing_cache) and role_ids; both are then
+    authoritative and the row is validated without touching the database.
     """
     # Required fields check
     required_fields = ['name', 'full_name', 'role_id']
@@ -18,8 +21,10 @@ def validate_user_data(data, existing_user=None, existing_cache=None):
         return False, f"Missing fields: {', '.join(missing)}", 400
     
     # Validate role exists
-    role = Role.query.get(data['role_id'])
-    if not role:
+    if role_ids is not None:
+        if data['role_id'] not in role_ids:
+            return False, "Invalid role_id", 400
+    elif not Role.query.get(data['role_id']):
         return False, "Invalid role_id", 400
     
    
@@ -34,8 +39,9 @@ def validate_user_data(data, existing_user=None, existing_cache=None):
     
     # Name duplicate check
     name = data['name'].strip().lower()
-    if existing_cache and name in existing_cache['names']:
-        duplicate_fields.append('username')
+    if existing_cache is not None:
+        if name in existing_cache['names']:
+            duplicate_fields.append('username')
     else:
         query = User.query.filter(func.lower(User.name) == name)
         if user_id:
@@ -46,8 +52,9 @@ def validate_user_data(data, existing_user=None, existing_cache=None):
     # Employee ID duplicate check
     emp_id = data.get('emp_id')
     if emp_id is not None:
-        if existing_cache and emp_id in existing_cache['emp_ids']:
-            duplicate_fields.append('employee_id')
+        if existing_cache is not None:
+            if emp_id in existing_cache['emp_ids']:
+                duplicate_fields.append('employee_id')
         else:
             query = User.query.filter_by(emp_id=emp_id)
             if user_id:
@@ -58,8 +65,9 @@ def validate_user_data(data, existing_user=None, existing_cache=None):
     # Email duplicate check
     if email:
         email = email.lower()
-        if existing_cache and email in existing_cache['emails']:
-            duplicate_fields.append('email')
+        if existing_cache is not None:
+            if email in existing_cache['emails']:
+                duplicate_fields.append('email')
         else:
             query = User.query.filter(func.lower(User.email) == email)
             if user_id:
@@ -73,12 +81,23 @@ def validate_user_data(data, existing_user=None, existing_cache=None):
     return True, "", 200
 
 def create_existing_cache():
-    """Create cache of existing identifiers for bulk operations"""
-    return {
-        'names': {u.name.lower() for u in User.query.all()},
-        'emails': {u.email.lower() for u in User.query.filter(User.email.isnot(None))},
-        'emp_ids': {u.emp_id for u in User.query.filter(User.emp_id.isnot(None))}
-    }
+    """Create cache of existing identifiers for bulk operations (one query, three columns)"""
+    cache = {'names': set(), 'emails': set(), 'emp_ids': set()}
+    for name, email, emp_id in db.session.query(User.name, User.email, User.emp_id):
+        cache['names'].add(name.lower())
+        if email:
+            cache['emails'].add(email.lower())
+        if emp_id is not None:
+            cache['emp_ids'].add(emp_id)
+    return cache
+
+def add_to_existing_cache(cache, data):
+    """Record an accepted row so later rows of the same batch see it as a duplicate"""
+    cache['names'].add(data['name'].strip().lower())
+    if data.get('email'):
+        cache['emails'].add(data['email'].lower())
+    if data.get('emp_id') is not None:
+        cache['emp_ids'].add(data['emp_id'])
 
 def validate_password(password):
     """Validate password meets security requirements"""
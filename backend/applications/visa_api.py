@@ -8,6 +8,9 @@ from sqlalchemy import or_, func
 from datetime import datetime, date, timedelta
 from applications.common_booking_resource import CommonBookingResource
 from applications.pdf_excel_export_helpers import generate_export_excel, generate_export_pdf
+from applications.reporting_db import read_only_db
+from applications.search_index import search_condition
+from applications.pagination import SortKey, order_by_key, paginate
 
 class VisaResource(Resource, CommonBookingResource):
     def __init__(self, **kwargs):
@@ -61,64 +64,57 @@ class VisaResource(Resource, CommonBookingResource):
             except ValueError:
                 return {'error': 'Invalid date format. Use YYYY-MM-DD.'}, 400
 
-        # Filter by search query, joining on all relevant tables
-        if search_query:
-            search_pattern = f'%{search_query.lower()}%'
+        # Name sorts and the LIKE fallback read the joined tables
+        name_sorts = {
+            'customer_name': Customer.name,
+            'agent_name': Agent.name,
+            'passenger_name': Passenger.name,
+            'visa_type_name': VisaType.name,
+        }
+        matches = search_condition('visa', self.MODEL.id, search_query) if search_query else None
+        if sort_by in name_sorts or (search_query and matches is None):
             query = query.outerjoin(Customer, self.MODEL.customer_id == Customer.id)\
                          .outerjoin(Agent, self.MODEL.agent_id == Agent.id)\
                          .outerjoin(VisaType, self.MODEL.visa_type_id == VisaType.id)\
-                         .outerjoin(Passenger, self.MODEL.passenger_id == Passenger.id)\
-                         .filter(or_(
-                            func.lower(self.MODEL.ref_no).like(search_pattern),
-                            func.lower(Customer.name).like(search_pattern),
-                            func.lower(Agent.name).like(search_pattern),
-                            func.lower(VisaType.name).like(search_pattern),
-                            func.lower(Passenger.name).like(search_pattern),
-                         ))
+                         .outerjoin(Passenger, self.MODEL.passenger_id == Passenger.id)
+
+        # Filter by search query
+        if search_query:
+            if matches is None:
+                search_pattern = f'%{search_query.lower()}%'
+                matches = or_(
+                    func.lower(self.MODEL.ref_no).like(search_pattern),
+                    func.lower(Customer.name).like(search_pattern),
+                    func.lower(Agent.name).like(search_pattern),
+                    func.lower(VisaType.name).like(search_pattern),
+                    func.lower(Passenger.name).like(search_pattern),
+                )
+            query = query.filter(matches)
 
-        # Apply sorting logic
-        if sort_by in ['ref_no', 'date', 'customer_name', 'passenger_name', 'agent_name', 'agent_paid', 'customer_charge', 'profit', 'visa_type_name']:
-            if sort_by in ['customer_name', 'agent_name', 'passenger_name', 'visa_type_name']:
-                # Handle sorting on joined tables
-                sort_model = {
-                    'customer_name': Customer,
-                    'agent_name': Agent,
-                    'passenger_name': Passenger,
-                    'visa_type_name': VisaType,
-                }.get(sort_by)
-                if sort_model:
-                    sort_column = getattr(sort_model, 'name')
-                    if sort_order == 'ascend':
-                        query = query.order_by(sort_column.asc())
-                    else:
-                        query = query.order_by(sort_column.desc())
-            else:
-                sort_column = getattr(self.MODEL, sort_by)
-                if sort_order == 'ascend':
-                    query = query.order_by(sort_column.asc())
-                else:
-                    query = query.order_by(sort_column.desc())
+        # Sort key, with id as the tie-breaker so cursors are unambiguous
+        if sort_by in name_sorts:
+            sort_column = name_sorts[sort_by]
+        elif sort_by in ['ref_no', 'date', 'agent_paid', 'customer_charge', 'profit']:
+            sort_column = getattr(self.MODEL, sort_by)
         else:
-            query = query.order_by(self.MODEL.ref_no.desc())
-        
+            sort_by, sort_column, sort_order = 'ref_no', self.MODEL.ref_no, 'desc'
+        sort_key = SortKey(sort_by, sort_column, self.MODEL.id, sort_order != 'ascend')
+
         if export_format in ['excel', 'pdf']:
-            visas = query.all()
-            formatted_data = [self._format_for_export(rec) for rec in visas]
+            with read_only_db():
+                visas = order_by_key(query, sort_key).all()
+                formatted_data = [self._format_for_export(rec) for rec in visas]
             if export_format == 'excel':
                 return generate_export_excel(formatted_data, 'visa')
             if export_format == 'pdf':
                 title = f"{status.capitalize()} Visas"
                 return generate_export_pdf(formatted_data, title, start_date_str, end_date_str, status='visa')
-        
-        paginated_result = query.paginate(page=page, per_page=per_page, error_out=False)
-        visas = paginated_result.items
-        
-        return {
-            'data': [self._format_visa(rec) for rec in visas],
-            'total': paginated_result.total,
-            'page': paginated_result.page,
-            'per_page': paginated_result.per_page
-        }, 200
+
+        visas, page_meta = paginate(
+            query, sort_key, 'visa_list', ['visa', 'customer', 'agent', 'partner', 'passenger', 'visa_type'],
+            page=page, per_page=per_page
+        )
+        return {'data': [self._format_visa(rec) for rec in visas], **page_meta}, 200
 
     @check_permission()
     def post(self, action=None):
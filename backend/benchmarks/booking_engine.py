@@ -0,0 +1,266 @@
+# benchmarks/booking_engine.py
+"""
+Latency and query counts of the money-moving code paths, measured against generated databases
+of increasing size (tools/generate_data.py). The paths:
+- booking payments: CommonBookingResource._process_payments
+- booking reversals: CommonBookingResource._reverse_payments
+- update_wallet_and_company / revert_wallet_and_company
+- apply_credit_wallet_logic
+- generate_ref_no
+
+Each size runs in its own process. Every operation runs inside a request context with a
+fresh session and is rolled back afterwards, so the database stays the same size throughout.
+Latencies include the flush; query counts come from applications/sql_instrumentation.py.
+
+The last column shows each operation's median latency at the largest size relative to the
+smallest. Booking cost should stay flat as the ledger grows. --max-growth turns that into a
+check.
+
+    cd backend
+    python benchmarks/booking_engine.py                          # report
+    python benchmarks/booking_engine.py --save-baseline          # refresh benchmarks/baselines/booking_engine.json
+    python benchmarks/booking_engine.py --compare --threshold 0.25 --max-growth 3
+
+--compare exits 1 in either case:
+- an operation's throughput drops more than --threshold below the stored baseline
+- an operation issues more queries than the baseline
+
+Baselines are machine-specific; refresh them on the machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(BACKEND_DIR, 'benchmarks', 'baselines', 'booking_engine.json')
+END_DATE = '2025-06-30'  # pinned so generated databases (and baselines) are reproducible
+RESULT_MARKER = 'RESULT '
+
+OPERATIONS = ['book_ticket', 'reverse_payments', 'update_wallet_and_company',
+              'revert_wallet_and_company', 'apply_credit_wallet_logic', 'generate_ref_no']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated booking counts')
+    parser.add_argument('--iterations', type=int, default=200, help='timed runs per operation')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'booking_engine_data'),
+                        help='generated databases are cached here and reused')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed throughput drop, fraction')
+    parser.add_argument('--max-growth', type=float, help='fail if p50 at the largest size exceeds the smallest by this factor')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+# ---- worker: runs inside a process bound to one generated database ------------------------
+
+def run_worker(args):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + args.worker
+    os.environ['SLOW_QUERY_LOG'] = '0'
+    sys.path.insert(0, BACKEND_DIR)
+
+    from datetime import date
+    from flask import g
+    from main import app
+    from applications.model import db, Customer, Ticket, Transaction
+    from applications.sql_instrumentation import RequestSQLStats
+    from applications.ticket_api import TicketResource
+    from applications.transaction_api import (apply_credit_wallet_logic, generate_ref_no,
+                                              revert_wallet_and_company, update_wallet_and_company)
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        customer_ids = [r[0] for r in db.session.query(Customer.id)]
+        agent_ids = [r[0] for r in db.session.execute(db.text("SELECT id FROM agent"))]
+        ticket_ids = [r[0] for r in db.session.query(Ticket.id).filter(
+            Ticket.status == 'booked', Ticket.customer_payment_mode.in_(['cash', 'online'])).limit(5000)]
+        # Reverting a receipt takes the money back out, so only receipts the customer can still cover
+        receipt_ids = [r[0] for r in db.session.query(Transaction.id).join(
+            Customer, Customer.id == Transaction.entity_id).filter(
+            Transaction.transaction_type == 'receipt', Transaction.entity_type == 'customer',
+            Customer.wallet_balance + Customer.credit_limit - Customer.credit_used >= Transaction.amount).limit(5000)]
+
+    def book_ticket():
+        resource = TicketResource()
+        charge = round(rng.uniform(200, 2000), 2)
+        agent_paid = round(charge * 0.9, 2)
+        ticket = Ticket(customer_id=rng.choice(customer_ids), agent_id=rng.choice(agent_ids),
+                        travel_location_id=1, ticket_type_id=1, ref_no=resource._get_next_ref_no(),
+                        status='booked', customer_charge=charge, agent_paid=agent_paid,
+                        profit=round(charge - agent_paid, 2), customer_payment_mode='cash',
+                        agent_payment_mode='online', date=date.today(), updated_by=g.username)
+        db.session.add(ticket)
+        db.session.flush()
+        resource._process_payments(ticket, 'book', 'ticket')
+        db.session.flush()
+
+    def reverse_payments():
+        ticket = Ticket.query.get(rng.choice(ticket_ids))
+        TicketResource()._reverse_payments(ticket, 'ticket')
+        db.session.flush()
+
+    def update_wallet():
+        t = Transaction(ref_no=generate_ref_no('receipt'), entity_type='customer',
+                        entity_id=rng.choice(customer_ids), transaction_type='receipt', pay_type='cash_deposit',
+                        mode='cash', amount=round(rng.uniform(100, 5000), 2), updated_by=g.username, extra_data={})
+        update_wallet_and_company(t)
+        db.session.add(t)
+        db.session.flush()
+
+    def revert_wallet():
+        t = Transaction.query.get(rng.choice(receipt_ids))
+        revert_wallet_and_company(t)
+        db.session.flush()
+
+    def credit_wallet_logic():
+        customer = Customer.query.get(rng.choice(customer_ids))
+        apply_credit_wallet_logic(customer, 10.0, 'customer', mode='revert')
+        apply_credit_wallet_logic(customer, 10.0, 'customer', mode='deduct')
+
+    def ref_no():
+        generate_ref_no('receipt')
+
+    operations = {
+        'book_ticket': book_ticket,
+        'reverse_payments': reverse_payments,
+        'update_wallet_and_company': update_wallet,
+        'revert_wallet_and_company': revert_wallet,
+        'apply_credit_wallet_logic': credit_wallet_logic,
+        'generate_ref_no': ref_no,
+    }
+
+    results = {}
+    for name in OPERATIONS:
+        timings, queries = [], []
+        for i in range(args.warmup + args.iterations):
+            with app.test_request_context():
+                g.username = 'benchmark'
+                g.sql_stats = RequestSQLStats()
+                started = time.perf_counter()
+                operations[name]()
+                elapsed = time.perf_counter() - started
+                db.session.rollback()
+                if i >= args.warmup:
+                    timings.append(elapsed)
+                    queries.append(g.sql_stats.count)
+        timings.sort()
+        results[name] = {
+            'p50_ms': round(statistics.median(timings) * 1000, 3),
+            'p95_ms': round(timings[int(len(timings) * 0.95) - 1] * 1000, 3),
+            'ops_per_sec': round(len(timings) / sum(timings), 1),
+            'queries': max(queries),
+        }
+    print(RESULT_MARKER + json.dumps(results))
+
+
+# ---- driver ---------------------------------------------------------------------------------
+
+def database_for(size, args):
+    os.makedirs(args.data_dir, exist_ok=True)
+    path = os.path.join(args.data_dir, f"bookings-{size}-seed{args.seed}-{END_DATE}.sqlite3")
+    if not os.path.exists(path):
+        print(f"generating {size:,} bookings -> {path}", flush=True)
+        subprocess.run([sys.executable, os.path.join(BACKEND_DIR, 'tools', 'generate_data.py'),
+                        '--database', path, '--bookings', str(size), '--seed', str(args.seed),
+                        '--end-date', END_DATE], cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+    return path
+
+
+def measure(size, args):
+    path = database_for(size, args)
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', path,
+                             '--iterations', str(args.iterations), '--warmup', str(args.warmup),
+                             '--seed', str(args.seed)],
+                            cwd=BACKEND_DIR, capture_output=True, text=True)
+    lines = [line for line in result.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"worker for {size} bookings failed:\n{result.stderr[-3000:]}")
+    return json.loads(lines[-1][len(RESULT_MARKER):])
+
+
+def report(results, sizes):
+    print(f"{'bookings':>9}  {'operation':<27} {'p50 ms':>8} {'p95 ms':>8} {'ops/s':>9} {'queries':>8}")
+    for size in sizes:
+        for name in OPERATIONS:
+            r = results[str(size)][name]
+            print(f"{size:>9,}  {name:<27} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} {r['ops_per_sec']:>9,.1f} {r['queries']:>8}")
+    growth = {}
+    if len(sizes) > 1:
+        print(f"\np50 growth from {sizes[0]:,} to {sizes[-1]:,} bookings:")
+        for name in OPERATIONS:
+            growth[name] = results[str(sizes[-1])][name]['p50_ms'] / results[str(sizes[0])][name]['p50_ms']
+            print(f"    {name:<27} x{growth[name]:.2f}")
+    return growth
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for size, ops in results.items():
+        for name, current in ops.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if not base:
+                continue
+            floor = base['ops_per_sec'] * (1 - threshold)
+            if current['ops_per_sec'] < floor:
+                regressions.append(f"{name} @ {int(size):,}: {current['ops_per_sec']:,.1f} ops/s "
+                                   f"< {floor:,.1f} (baseline {base['ops_per_sec']:,.1f})")
+            if current['queries'] > base['queries']:
+                regressions.append(f"{name} @ {int(size):,}: {current['queries']} queries (baseline {base['queries']})")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        return run_worker(args)
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    results = {str(size): measure(size, args) for size in sizes}
+    growth = report(results, sizes)
+    failures = []
+
+    if args.max_growth and growth:
+        failures += [f"{name}: p50 grew x{g:.2f} from {sizes[0]:,} to {sizes[-1]:,} bookings (limit x{args.max_growth})"
+                     for name, g in growth.items() if g > args.max_growth]
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"no baseline at {args.baseline}; run with --save-baseline first")
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        failures += compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as fh:
+            json.dump({
+                'generated_at': time.strftime('%Y-%m-%d'),
+                'machine': f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU, Python {platform.python_version()}",
+                'iterations': args.iterations,
+                'seed': args.seed,
+                'results': results,
+            }, fh, indent=2)
+            fh.write('\n')
+        print(f"\nbaseline written to {args.baseline}")
+
+    if failures:
+        print("\nREGRESSIONS:")
+        for failure in failures:
+            print(f"    {failure}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
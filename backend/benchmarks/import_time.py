@@ -0,0 +1,85 @@
+# benchmarks/import_time.py
+"""
+Worker boot cost: `python -X importtime -c "import main"` plus the child's peak RSS.
+
+Two runs against a throw-away SQLite database: a plain boot (what a worker that never
+serves an export pays) and a boot that then touches every export backend (what the first
+export adds). The heaviest top-level imports of the plain boot are listed so regressions
+are easy to spot.
+
+    cd backend
+    python benchmarks/import_time.py --top 15 --runs 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REPORT_RSS = "import resource, sys; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)"
+SCENARIOS = [
+    ('plain boot', "import main; " + REPORT_RSS),
+    ('boot + all export backends',
+     "import main; from applications import export_backends as xb; "
+     "[getattr(xb, n) for n in xb._BACKENDS]; " + REPORT_RSS),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='runs per scenario (median reported)')
+    parser.add_argument('--top', type=int, default=15, help='heaviest top-level imports to list')
+    return parser.parse_args()
+
+
+def run_once(code, env):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+
+    imports, rss_kb = [], 0
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:'):
+            parts = line[len('import time:'):].split('|')
+            if len(parts) != 3 or not parts[0].strip().isdigit():
+                continue  # column header
+            name = parts[2].rstrip()
+            # Nesting is shown by indentation; depth 0 = imported directly by the running code
+            depth = (len(name) - len(name.lstrip())) // 2
+            imports.append((name.strip(), int(parts[1]), depth))
+        elif line.strip().isdigit():
+            rss_kb = int(line.strip())
+    total_us = sum(cumulative for _, cumulative, depth in imports if depth == 0)
+    return total_us, rss_kb, imports
+
+
+def main():
+    args = parse_args()
+    db_file = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False)
+    db_file.close()
+    env = {**os.environ, 'DATABASE_URL': 'sqlite:///' + db_file.name, 'PYTHONDONTWRITEBYTECODE': '1'}
+
+    try:
+        # Prime the database (first boot seeds it) so every measured run is a warm boot
+        run_once("import main", env)
+        for label, code in SCENARIOS:
+            runs = [run_once(code, env) for _ in range(args.runs)]
+            total_ms = statistics.median(r[0] for r in runs) / 1000
+            rss_mb = statistics.median(r[1] for r in runs) / 1024
+            print(f"{label:<30} imports {total_ms:8.1f} ms   peak RSS {rss_mb:7.1f} MB")
+            if label == 'plain boot':
+                top = sorted((i for i in runs[-1][2] if i[2] <= 1), key=lambda i: -i[1])[:args.top]
+                for name, cumulative, depth in top:
+                    print(f"    {'  ' * depth}{name:<40} {cumulative / 1000:8.1f} ms")
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_file.name + suffix):
+                os.remove(db_file.name + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+# benchmarks/load_test.py
+"""
+Concurrent HTTP load test: many clients replay a weighted mix of real user actions. The mix
+covers logins, ticket/visa bookings, receipts, paginated lists, searches, dashboard loads and
+exports. The report gives p50/p95/p99 latency, throughput and error rate per scenario, and
+counts "database is locked" failures separately.
+
+Every scenario is matched against the URL map that create_app registered before the run
+starts. A renamed or removed route fails fast instead of silently turning into 404s.
+
+In-process mode (default) runs each client on its own Flask test client against a generated
+database (tools/generate_data.py, cached). Threads share one process, so this measures
+SQLite/locking and per-request cost, not multi-core capacity. --url targets a running
+server instead, e.g. gunicorn -c gunicorn.conf.py wsgi:app, and needs an admin login
+there.
+
+    cd backend
+    python benchmarks/load_test.py --clients 16 --duration 30 --output runs/before.json
+    python benchmarks/load_test.py --clients 16 --duration 30 --compare runs/before.json
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --clients 32 --duration 60
+    python benchmarks/load_test.py --scenarios ticket_list,ticket_search --clients 8
+
+Runs are repeatable: the dataset (--bookings, --seed) and every client's random choices are
+seeded, and --output records the configuration next to the numbers.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DATA_END_DATE = '2025-06-30'  # generated datasets are pinned so runs stay comparable
+SEARCH_TERMS = ['khan', 'nair', 'sky', 'gulf', 'ali', 'travels', '/T/0', 'maria']
+
+
+class Scenario:
+    def __init__(self, name, weight, method, path, query=None, body=None, auth=True):
+        self.name = name
+        self.weight = weight
+        self.method = method
+        self.path = path
+        self.query = query or (lambda ctx: {})
+        self.body = body
+        self.auth = auth
+
+
+def window(ctx, days):
+    end = ctx.data_end - timedelta(days=ctx.rng.randint(0, 300))
+    return {'start_date': (end - timedelta(days=days)).isoformat(), 'end_date': end.isoformat()}
+
+
+def booking_body(ctx, kind):
+    charge = round(ctx.rng.uniform(200, 2500), 2)
+    body = {
+        'customer_id': ctx.rng.choice(ctx.ids['customer']),
+        'agent_id': ctx.rng.choice(ctx.ids['agent']),
+        'travel_location_id': ctx.rng.choice(ctx.ids['travel_location']),
+        'passenger_id': ctx.rng.choice(ctx.ids['passenger']) if ctx.ids['passenger'] else None,
+        'customer_charge': charge,
+        'agent_paid': round(charge * 0.9, 2),
+        'customer_payment_mode': ctx.rng.choice(['cash', 'online']),
+        'agent_payment_mode': 'cash',
+        'date': ctx.data_end.isoformat(),
+        'description': 'load test',
+    }
+    body['ticket_type_id' if kind == 'ticket' else 'visa_type_id'] = ctx.rng.choice(ctx.ids[f'{kind}_type'])
+    return body
+
+
+SCENARIOS = [
+    Scenario('login', 4, 'POST', '/api/login', auth=False,
+             body=lambda ctx: {'name': ctx.username, 'password': ctx.password}),
+    Scenario('ticket_list', 20, 'GET', '/api/tickets',
+             query=lambda ctx: {**window(ctx, 30), 'page': ctx.rng.randint(1, 5), 'per_page': 20}),
+    Scenario('ticket_search', 10, 'GET', '/api/tickets',
+             query=lambda ctx: {**window(ctx, 365), 'search_query': ctx.rng.choice(SEARCH_TERMS)}),
+    Scenario('visa_list', 8, 'GET', '/api/visas',
+             query=lambda ctx: {**window(ctx, 30), 'page': ctx.rng.randint(1, 3)}),
+    Scenario('service_list', 4, 'GET', '/api/services', query=lambda ctx: window(ctx, 30)),
+    Scenario('receipt_list', 8, 'GET', '/api/transactions/receipt',
+             query=lambda ctx: {**window(ctx, 30), 'page': ctx.rng.randint(1, 3)}),
+    Scenario('receipt_search', 3, 'GET', '/api/transactions/receipt',
+             query=lambda ctx: {**window(ctx, 365), 'search_query': ctx.rng.choice(SEARCH_TERMS)}),
+    Scenario('dashboard', 10, 'GET', '/api/dashboard/metrics', query=lambda ctx: window(ctx, 30)),
+    Scenario('dashboard_balances', 4, 'GET', '/api/dashboard/balances'),
+    Scenario('customer_balances', 2, 'GET', '/api/dashboard/customer_balances'),
+    Scenario('book_ticket', 10, 'POST', '/api/tickets', body=lambda ctx: booking_body(ctx, 'ticket')),
+    Scenario('book_visa', 5, 'POST', '/api/visas', body=lambda ctx: booking_body(ctx, 'visa')),
+    Scenario('receipt', 6, 'POST', '/api/transactions/receipt',
+             body=lambda ctx: {'entity_type': 'customer', 'entity_id': ctx.rng.choice(ctx.ids['customer']),
+                               'pay_type': 'cash_deposit', 'mode': ctx.rng.choice(['cash', 'online']),
+                               'amount': round(ctx.rng.uniform(100, 3000), 2), 'transaction_date': ctx.data_end.isoformat()}),
+    Scenario('ticket_export', 1, 'GET', '/api/tickets',
+             query=lambda ctx: {**window(ctx, 7), 'export': 'excel', 'status': 'booked'}),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='base URL of a running server (default: in-process)')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=20, help='seconds to run')
+    parser.add_argument('--scenarios', help='comma-separated subset of: ' + ', '.join(s.name for s in SCENARIOS))
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--bookings', type=int, default=20000, help='size of the generated dataset (in-process)')
+    parser.add_argument('--database', help='use this SQLite file instead of a generated one (in-process)')
+    parser.add_argument('--data-end', type=date.fromisoformat,
+                        help=f'last date with data; list windows end before it (default: {DATA_END_DATE} in-process, today with --url)')
+    parser.add_argument('--output', help='write the run as JSON for later --compare')
+    parser.add_argument('--compare', help='JSON from an earlier --output run')
+    return parser.parse_args()
+
+
+# ---- clients --------------------------------------------------------------------------------
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, query, body, headers):
+        response = self.client.open(path, method=method, query_string=query, json=body, headers=headers)
+        return response.status_code, response.get_data().decode('utf-8', 'replace')
+
+
+class HTTPClient:
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = None
+
+    def request(self, method, path, query, body, headers):
+        url = path + ('?' + urlencode(query) if query else '')
+        payload = json.dumps(body) if body is not None else None
+        headers = {**headers, 'Content-Type': 'application/json'} if payload else headers
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            self.conn.request(method, url, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            return response.status, response.read().decode('utf-8', 'replace')
+        except (OSError, http.client.HTTPException) as e:
+            self.conn = None  # reconnect on the next request
+            return 0, f"{e.__class__.__name__}: {e}"
+
+
+class ClientContext:
+    def __init__(self, index, args, ids, data_end):
+        self.rng = random.Random(args.seed * 1000 + index)
+        self.username = args.username
+        self.password = args.password
+        self.ids = ids
+        self.data_end = data_end
+
+
+def login(client, ctx):
+    status, text = client.request('POST', '/api/login', None, {'name': ctx.username, 'password': ctx.password}, {})
+    if status != 200:
+        raise RuntimeError(f"login as {ctx.username} failed ({status}): {text[:200]}")
+    return {'Authorization': 'Bearer ' + json.loads(text)['token']}
+
+
+def load_ids(client, headers):
+    ids = {}
+    for entity in ('customer', 'agent', 'passenger', 'travel_location', 'ticket_type', 'visa_type'):
+        status, text = client.request('GET', f'/api/manage/{entity}', None, None, headers)
+        if status != 200:
+            raise RuntimeError(f"GET /api/manage/{entity} failed ({status}): {text[:200]}")
+        records = json.loads(text)
+        records = records if isinstance(records, list) else next(iter(records.values()))
+        ids[entity] = [r['id'] for r in records if r.get('active', True)][:5000]
+    missing = [k for k in ('customer', 'agent', 'travel_location', 'ticket_type', 'visa_type') if not ids[k]]
+    if missing:
+        raise RuntimeError(f"no {', '.join(missing)} records to book against; generate data first")
+    return ids
+
+
+def run_client(make_client, ctx, scenarios, deadline, stats):
+    client = make_client()
+    headers = login(client, ctx)
+    names, weights = [s for s in scenarios], [s.weight for s in scenarios]
+    while time.perf_counter() < deadline:
+        scenario = ctx.rng.choices(names, weights)[0]
+        query = scenario.query(ctx)
+        body = scenario.body(ctx) if scenario.body else None
+        started = time.perf_counter()
+        status, text = client.request(scenario.method, scenario.path, query, body, headers if scenario.auth else {})
+        elapsed = time.perf_counter() - started
+
+        s = stats[scenario.name]
+        s['latencies'].append(elapsed)
+        s['statuses'][status] += 1
+        if 'database is locked' in text:
+            s['locked'] += 1
+
+
+# ---- reporting ------------------------------------------------------------------------------
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))]
+
+
+def summarize(stats, duration):
+    summary = {}
+    for name, s in sorted(stats.items()):
+        latencies = sorted(s['latencies'])
+        errors = sum(n for status, n in s['statuses'].items() if status == 0 or status >= 400)
+        summary[name] = {
+            'requests': len(latencies),
+            'rps': round(len(latencies) / duration, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'errors': errors,
+            'error_rate': round(errors / len(latencies), 4) if latencies else 0.0,
+            'locked': s['locked'],
+            'statuses': {str(k): v for k, v in sorted(s['statuses'].items())},
+        }
+    return summary
+
+
+def print_report(summary, previous=None):
+    header = f"{'scenario':<20} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'locked':>7}"
+    print(header)
+    print('-' * len(header))
+    total = {'requests': 0, 'rps': 0.0, 'errors': 0, 'locked': 0}
+    for name, r in summary.items():
+        print(f"{name:<20} {r['requests']:>7} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['errors']:>7} {r['locked']:>7}")
+        for key in total:
+            total[key] += r[key]
+        if r['errors']:
+            print(f"{'':<20} statuses: {r['statuses']}")
+    print('-' * len(header))
+    print(f"{'total':<20} {total['requests']:>7} {total['rps']:>8.1f} {'':>8} {'':>8} {'':>8} {total['errors']:>7} {total['locked']:>7}")
+
+    if previous:
+        print(f"\nvs {previous['label']}:")
+        for name, r in summary.items():
+            old = previous['summary'].get(name)
+            if not old or not old['requests']:
+                continue
+            print(f"    {name:<20} p95 {old['p95_ms']:>8.1f} -> {r['p95_ms']:>8.1f} ms ({pct_change(old['p95_ms'], r['p95_ms'])})"
+                  f"   req/s {old['rps']:>7.1f} -> {r['rps']:>7.1f} ({pct_change(old['rps'], r['rps'])})")
+
+
+def pct_change(old, new):
+    return f"{(new - old) / old * 100:+.0f}%" if old else 'n/a'
+
+
+# ---- driver ---------------------------------------------------------------------------------
+
+def generated_database(args):
+    data_dir = os.path.join(tempfile.gettempdir(), 'load_test_data')
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"bookings-{args.bookings}-seed{args.seed}-{DATA_END_DATE}.sqlite3")
+    if not os.path.exists(path):
+        print(f"generating {args.bookings:,} bookings -> {path}", flush=True)
+        subprocess.run([sys.executable, os.path.join(BACKEND_DIR, 'tools', 'generate_data.py'),
+                        '--database', path, '--bookings', str(args.bookings), '--seed', str(args.seed),
+                        '--end-date', DATA_END_DATE], cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+    # Bookings made by a run stay in the copy, never in the cached dataset
+    run_copy = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False)
+    run_copy.close()
+    _copy_database(path, run_copy.name)
+    return run_copy.name
+
+
+def _copy_database(source, target):
+    import sqlite3
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+
+def check_routes(app, scenarios):
+    """Resolve every scenario against the routes create_app registered."""
+    from werkzeug.exceptions import HTTPException
+    adapter = app.url_map.bind('localhost')
+    problems, endpoints = [], {}
+    for scenario in scenarios:
+        try:
+            endpoints[scenario.name], _ = adapter.match(scenario.path, method=scenario.method)
+        except HTTPException as e:
+            problems.append(f"{scenario.name}: {scenario.method} {scenario.path} -> {e.code}")
+    if problems:
+        sys.exit("scenarios do not match registered routes:\n    " + "\n    ".join(problems))
+    return endpoints
+
+
+def main():
+    args = parse_args()
+    scenarios = SCENARIOS
+    if args.scenarios:
+        wanted = set(args.scenarios.split(','))
+        unknown = wanted - {s.name for s in SCENARIOS}
+        if unknown:
+            sys.exit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in SCENARIOS if s.name in wanted]
+
+    database = scratch = None
+    if args.url:
+        # Route check only: boot the app against a scratch database so ts.sqlite3 is never touched
+        scratch = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False).name
+        os.environ['DATABASE_URL'] = 'sqlite:///' + scratch
+        data_end = args.data_end or date.today()
+    else:
+        database = args.database or generated_database(args)
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(database)
+        os.environ.setdefault('SLOW_QUERY_LOG', '0')
+        data_end = args.data_end or date.fromisoformat(DATA_END_DATE)
+
+    from main import app
+    endpoints = check_routes(app, scenarios)
+    # Per-request N+1 warnings would drown the report
+    logging.getLogger('applications.sql').setLevel(logging.ERROR)
+
+    if args.url:
+        make_client = lambda: HTTPClient(args.url)
+    else:
+        make_client = lambda: InProcessClient(app)
+
+    setup = make_client()
+    ids = load_ids(setup, login(setup, ClientContext(0, args, None, data_end)))
+
+    stats_per_client = [defaultdict(lambda: {'latencies': [], 'statuses': Counter(), 'locked': 0})
+                        for _ in range(args.clients)]
+    started = time.perf_counter()
+    deadline = started + args.duration
+    errors = []
+
+    def client_thread(index):
+        try:
+            run_client(make_client, ClientContext(index + 1, args, ids, data_end), scenarios, deadline,
+                       stats_per_client[index])
+        except Exception as e:
+            errors.append(f"client {index}: {e}")
+
+    threads = [threading.Thread(target=client_thread, args=(i,), daemon=True) for i in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duration = time.perf_counter() - started
+    if errors:
+        print("client failures:\n    " + "\n    ".join(errors[:10]))
+
+    merged = defaultdict(lambda: {'latencies': [], 'statuses': Counter(), 'locked': 0})
+    for stats in stats_per_client:
+        for name, s in stats.items():
+            merged[name]['latencies'] += s['latencies']
+            merged[name]['statuses'].update(s['statuses'])
+            merged[name]['locked'] += s['locked']
+    summary = summarize(merged, duration)
+
+    target = args.url or f"in-process ({os.path.basename(database)})"
+    print(f"{target}: {args.clients} clients for {duration:.1f}s\n")
+    previous = None
+    if args.compare:
+        with open(args.compare) as fh:
+            previous = json.load(fh)
+    print_report(summary, previous)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as fh:
+            json.dump({
+                'label': os.path.basename(args.output),
+                'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'machine': f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU, Python {platform.python_version()}",
+                'config': {'target': args.url or 'in-process', 'clients': args.clients, 'duration': args.duration,
+                           'seed': args.seed, 'bookings': None if args.url else args.bookings,
+                           'scenarios': {s.name: s.weight for s in scenarios}},
+                'endpoints': endpoints,
+                'summary': summary,
+            }, fh, indent=2)
+        print(f"\nrun written to {args.output}")
+
+    # Throw away the per-run copy (or the route-check scratch database)
+    leftover = scratch or (database if not args.database else None)
+    for suffix in ('', '-wal', '-shm'):
+        if leftover and os.path.exists(leftover + suffix):
+            os.remove(leftover + suffix)
+
+
+if __name__ == '__main__':
+    main()
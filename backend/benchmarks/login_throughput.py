@@ -0,0 +1,87 @@
+# benchmarks/login_throughput.py
+"""
+Logins per second through POST /api/login, before and after moving hashing to the process pool.
+
+Runs against a throw-away SQLite database (DATABASE_URL is pointed at a temp file), so the
+real ts.sqlite3 is never touched.
+
+    cd backend
+    python benchmarks/login_throughput.py --users 20 --logins 200 --concurrency 8
+    python benchmarks/login_throughput.py --method pbkdf2:sha256:600000 --workers 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20, help='distinct staff accounts')
+    parser.add_argument('--logins', type=int, default=200, help='logins per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent request threads')
+    parser.add_argument('--method', default='scrypt', help='werkzeug hash method for the "after" run')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help='hashing processes for the "after" run')
+    return parser.parse_args()
+
+
+def run_logins(app, names, logins, concurrency):
+    def login(i):
+        client = app.test_client()
+        response = client.post('/api/login', json={'name': names[i % len(names)], 'password': 'Password#123'})
+        return response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    failures = sum(1 for s in statuses if s != 200)
+    return logins / elapsed, elapsed, failures
+
+
+def main():
+    args = parse_args()
+    db_file = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_file.name
+
+    from main import app
+    from applications.model import db, User, Role
+    from applications.password_hashing import hash_passwords
+
+    with app.app_context():
+        role_id = Role.query.filter_by(name='admin').first().id
+        names = [f'bench_user_{i}' for i in range(args.users)]
+        for name, password_hash in zip(names, hash_passwords(['Password#123'] * len(names))):
+            db.session.add(User(name=name, full_name=name, role_id=role_id, password=password_hash))
+        db.session.commit()
+
+    scenarios = [
+        ('before: inline hashing, scrypt default', {'PASSWORD_HASH_WORKERS': 0, 'PASSWORD_HASH_METHOD': 'scrypt'}),
+        (f'after: {args.workers} hashing processes, {args.method}',
+         {'PASSWORD_HASH_WORKERS': args.workers, 'PASSWORD_HASH_METHOD': args.method}),
+    ]
+
+    print(f"{args.logins} logins, {args.users} users, {args.concurrency} concurrent clients, {os.cpu_count()} CPUs")
+    try:
+        for label, config in scenarios:
+            app.config.update(config)
+            # LoginAPI prints per login; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                # Warm-up login per user: pays one-off costs such as a rehash to the new method
+                run_logins(app, names, len(names), args.concurrency)
+                rate, elapsed, failures = run_logins(app, names, args.logins, args.concurrency)
+            print(f"  {label:<55} {rate:8.1f} logins/s  ({elapsed:.2f}s, {failures} failed)")
+    finally:
+        os.remove(db_file.name)
+
+
+if __name__ == '__main__':
+    main()
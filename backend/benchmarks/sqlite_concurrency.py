@@ -0,0 +1,132 @@
+# benchmarks/sqlite_concurrency.py
+"""
+Readers vs writers on one SQLite file, with SQLite defaults and with the connection profile
+from applications/sqlite_profile.py.
+
+Writer threads insert transactions (one commit each); reader threads run the dashboard-style
+aggregate over the same table. With the rollback journal a commit locks readers out and a
+second writer fails fast with "database is locked"; under WAL + busy_timeout readers keep
+going during commits and writers queue instead of erroring.
+
+    cd backend
+    python benchmarks/sqlite_concurrency.py --readers 4 --writers 2 --seconds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+
+from applications.model import db, Particular, Transaction
+from applications.sqlite_profile import DEFAULT_PRAGMAS, install_sqlite_profile
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--rows', type=int, default=20000, help='rows preloaded before the run')
+    return parser.parse_args()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run_scenario(pragmas, args):
+    db_file = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False)
+    db_file.close()
+    # No pysqlite-level wait: the profile's busy_timeout (or its absence) decides
+    engine = create_engine('sqlite:///' + db_file.name, connect_args={'timeout': 0},
+                           pool_size=args.readers + args.writers)
+    if pragmas:
+        install_sqlite_profile(engine, pragmas)
+
+    table = Transaction.__table__
+    db.metadata.create_all(engine, tables=[Particular.__table__, table])
+
+    def row(i):
+        return {
+            'ref_no': f'BENCH-{i}', 'entity_type': 'customer', 'entity_id': i % 50 + 1,
+            'pay_type': 'cash', 'transaction_type': 'receipt', 'mode': 'cash',
+            'amount': float(i % 997), 'date': datetime.now(),
+        }
+
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [row(i) for i in range(args.rows)])
+
+    counter = iter(range(args.rows, 10 ** 9))
+    counter_lock = threading.Lock()
+    stop = threading.Event()
+    results = {'reads': [], 'writes': [], 'read_errors': 0, 'write_errors': 0}
+    results_lock = threading.Lock()
+    aggregate = select(table.c.entity_id, func.sum(table.c.amount)).group_by(table.c.entity_id)
+
+    def reader():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(aggregate).all()
+                with results_lock:
+                    results['reads'].append(time.perf_counter() - started)
+            except OperationalError:
+                with results_lock:
+                    results['read_errors'] += 1
+
+    def writer():
+        while not stop.is_set():
+            with counter_lock:
+                i = next(counter)
+            started = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(table.insert(), row(i))
+                with results_lock:
+                    results['writes'].append(time.perf_counter() - started)
+            except OperationalError:
+                with results_lock:
+                    results['write_errors'] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    engine.dispose()
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(db_file.name + suffix):
+            os.remove(db_file.name + suffix)
+    return results
+
+
+def main():
+    args = parse_args()
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s, {args.rows} preloaded rows")
+    for label, pragmas in (('before: SQLite defaults', None), ('after: connection profile', DEFAULT_PRAGMAS)):
+        r = run_scenario(pragmas, args)
+        print(f"  {label}")
+        print(f"    reads  {len(r['reads']) / args.seconds:8.1f}/s  p95 {percentile(r['reads'], 0.95) * 1000:7.2f} ms"
+              f"  errors {r['read_errors']}")
+        print(f"    writes {len(r['writes']) / args.seconds:8.1f}/s  p95 {percentile(r['writes'], 0.95) * 1000:7.2f} ms"
+              f"  errors {r['write_errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for `gunicorn -c gunicorn.conf.py wsgi:app`, all overridable from the environment.
+
+    WEB_BIND                 0.0.0.0:5000
+    WEB_CONCURRENCY          worker processes (default: 2 x CPUs + 1)
+    WEB_THREADS              threads per worker (default 4)
+    WEB_WORKER_CLASS         gthread (default) or sync
+    WEB_PRELOAD              1 = import and seed once in the master, then fork (default 1)
+    WEB_MAX_REQUESTS         recycle a worker after this many requests (default 1000, 0 = never)
+    WEB_MAX_REQUESTS_JITTER  random extra requests so workers do not recycle together (default 100)
+    WEB_TIMEOUT              seconds before a silent worker is killed (default 120; exports are slow)
+    WEB_GRACEFUL_TIMEOUT     seconds a recycled worker gets to finish in-flight requests (default 30)
+    WEB_KEEPALIVE            seconds to hold idle keep-alive connections (default 5)
+    WEB_LOG_LEVEL            info
+    WEB_ACCESS_LOG           "-" for stdout, a path, or empty to disable (default "-")
+    METRICS_DIR              where workers leave metric snapshots for /metrics (default: a fresh
+                             temp dir per server; emptied at startup)
+    RESULT_CACHE_BACKEND     file (default with more than one worker), memory (one worker only) or none
+
+A recycled worker can drop a connection it accepted just before exiting; run behind a proxy
+that retries idempotent requests on an empty upstream reply (nginx proxy_next_upstream).
+"""
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("WEB_THREADS", 4))
+worker_class = os.getenv("WEB_WORKER_CLASS", "gthread")
+preload_app = os.getenv("WEB_PRELOAD", "1") == "1"
+
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.getenv("WEB_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("WEB_KEEPALIVE", 5))
+
+loglevel = os.getenv("WEB_LOG_LEVEL", "info")
+accesslog = os.getenv("WEB_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+# Set before the app is imported so every worker snapshots to the same place
+os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="metrics-"))
+
+# The memory result cache and its table versions live in one process: a write handled by one
+# worker would never invalidate another worker's entries. Workers share the file backend instead.
+if workers > 1:
+    os.environ.setdefault("RESULT_CACHE_BACKEND", "file")
+    if os.environ["RESULT_CACHE_BACKEND"] == "memory":
+        raise RuntimeError("RESULT_CACHE_BACKEND=memory serves stale results with more than one worker; "
+                           "use file or none, or set WEB_CONCURRENCY=1")
+
+
+def when_ready(server):
+    from applications.metrics import reset_metrics_dir
+    reset_metrics_dir(os.environ["METRICS_DIR"])
+    if preload_app:
+        from wsgi import prepare_for_fork
+        prepare_for_fork()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from wsgi import reset_after_fork
+        reset_after_fork()
@@ -9,9 +9,17 @@ from flask_cors import CORS
 
 from applications.bootstrap import initialize_system
 from applications.model import db
+from applications.result_cache import result_cache
+from applications.session_versions import session_versions
+from applications.audit import audit_trail
+from applications.sqlite_profile import init_sqlite_profile
+from applications.reporting_db import init_reporting_engine
+from applications.sql_instrumentation import init_sql_instrumentation
+from applications.slow_query_log import slow_query_log
+from applications.metrics import metrics
 from applications.login_api import LoginAPI, SignupAPI, VerifyTokenAPI
 from applications.user_api import UserAPI,CurrentUserAPI, UserPermissionAPI,PagePermissionsAPI,BulkUserAPI,BulkDeleteAPI,BulkUserCreateAPI,UserDuplicateCheckAPI
-from applications.setting_api import RoleAPI, RolePermissionAPI, PageAPI
+from applications.setting_api import RoleAPI, RolePermissionAPI, PageAPI, BulkPermissionAPI
 from applications.generic_api import GenericAPI
 from applications.entity_api import EntityResource
 from applications.transaction_api import TransactionResource,CompanyBalanceResource
@@ -22,7 +30,10 @@ from applications.dashboard import CompanyBalancesAPI, DashboardMetricsAPI, Cust
 from applications.attachment_api import AttachmentResource
 from applications.reports_api import  CompanyBalanceReportResource
 from applications.invoice_api import InvoiceListResource, InvoiceStatusResource, InvoiceDownloadResource,InvoiceDeleteResource, InvoiceExportResource
-from sqlalchemy import text
+from applications.system_api import ResultCacheStatsAPI, HealthAPI, ReadinessAPI, SlowQueryLogAPI, MetricsAPI
+from applications.audit_api import AuditLogAPI
+from applications.booking_feed_api import BookingFeedResource
+from applications.bulk_booking_api import BulkBookingImportResource
 
 def create_app():
     app = Flask(__name__)
@@ -30,8 +41,38 @@ def create_app():
     current_dir = os.path.abspath(os.path.dirname(__file__))
 
     # Database
-    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///" + os.path.join(current_dir, "ts.sqlite3")
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL", "sqlite:///" + os.path.join(current_dir, "ts.sqlite3"))
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # SQLite pragmas applied once per pooled connection (applications/sqlite_profile.py)
+    app.config['SQLITE_PRAGMAS'] = {
+        'journal_mode': os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        'synchronous': os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        'busy_timeout': int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        'cache_size': int(os.getenv("SQLITE_CACHE_SIZE", -64000)),
+        'mmap_size': int(os.getenv("SQLITE_MMAP_SIZE", 268435456)),
+        'temp_store': os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+        'foreign_keys': 'ON',
+    }
+    # Separate read-only pool for reports/exports (applications/reporting_db.py); URL may point at a replica
+    app.config['READ_ONLY_REPORTS'] = os.getenv("READ_ONLY_REPORTS", "1") == "1"
+    app.config['REPORTING_DATABASE_URL'] = os.getenv("REPORTING_DATABASE_URL")
+    app.config['REPORTING_POOL_SIZE'] = int(os.getenv("REPORTING_POOL_SIZE", 5))
+    # Per-request statement count/time headers + log line, flagging repeated statements (N+1)
+    app.config['SQL_INSTRUMENTATION'] = os.getenv("SQL_INSTRUMENTATION", "1") == "1"
+    app.config['SQL_INSTRUMENTATION_HEADERS'] = os.getenv("SQL_INSTRUMENTATION_HEADERS", "1") == "1"
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+    # Statements slower than SLOW_QUERY_MS go to a rotating JSONL file with their query plan
+    app.config['SLOW_QUERY_LOG'] = os.getenv("SLOW_QUERY_LOG", "1") == "1"
+    app.config['SLOW_QUERY_MS'] = float(os.getenv("SLOW_QUERY_MS", 200))
+    app.config['SLOW_QUERY_EXPLAIN'] = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+    app.config['SLOW_QUERY_LOG_PATH'] = os.getenv("SLOW_QUERY_LOG_PATH", os.path.join(current_dir, "slow_queries.jsonl"))
+    app.config['SLOW_QUERY_MAX_BYTES'] = int(os.getenv("SLOW_QUERY_MAX_BYTES", 5 * 1024 * 1024))
+    app.config['SLOW_QUERY_BACKUP_COUNT'] = int(os.getenv("SLOW_QUERY_BACKUP_COUNT", 3))
+    # Prometheus metrics on /metrics; METRICS_DIR lets every gunicorn worker contribute to one scrape
+    app.config['METRICS_ENABLED'] = os.getenv("METRICS_ENABLED", "1") == "1"
+    app.config['METRICS_DIR'] = os.getenv("METRICS_DIR")
+    app.config['METRICS_FLUSH_INTERVAL'] = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+    app.config['METRICS_TOKEN'] = os.getenv("METRICS_TOKEN")
 
     #Upload attachments
     UPLOAD_FOLDER = os.path.join(current_dir, 'uploads')
@@ -40,6 +81,23 @@ def create_app():
     #Invoice related paths
     INVOICE_FOLDER = os.path.join(current_dir, 'invoices')
     app.config['INVOICE_FOLDER'] = INVOICE_FOLDER
+    # Cached derived documents (stamped invoices, report exports) kept under INVOICE_FOLDER/cache
+    app.config['DOCUMENT_CACHE_MAX_ENTRIES'] = int(os.getenv("DOCUMENT_CACHE_MAX_ENTRIES", 500))
+
+    # Result cache for read-heavy endpoints: memory (per process), file (shared by workers) or none
+    app.config['RESULT_CACHE_BACKEND'] = os.getenv("RESULT_CACHE_BACKEND", "memory")
+    app.config['RESULT_CACHE_PATH'] = os.getenv("RESULT_CACHE_PATH", os.path.join(current_dir, "result_cache.sqlite3"))
+    app.config['RESULT_CACHE_MAX_ENTRIES'] = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 1000))
+    app.config['RESULT_CACHE_TTL'] = int(os.getenv("RESULT_CACHE_TTL", 0))
+
+    # Audit trail: db (audit_log table), jsonl (rotating files at AUDIT_LOG_PATH) or none
+    app.config['AUDIT_BACKEND'] = os.getenv("AUDIT_BACKEND", "db")
+    app.config['AUDIT_LOG_PATH'] = os.getenv("AUDIT_LOG_PATH", os.path.join(current_dir, "audit.jsonl"))
+    app.config['AUDIT_FLUSH_INTERVAL'] = float(os.getenv("AUDIT_FLUSH_INTERVAL", 1.0))
+    app.config['AUDIT_BATCH_SIZE'] = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+    app.config['AUDIT_QUEUE_MAX'] = int(os.getenv("AUDIT_QUEUE_MAX", 100000))
+    app.config['AUDIT_MAX_BYTES'] = int(os.getenv("AUDIT_MAX_BYTES", 10 * 1024 * 1024))
+    app.config['AUDIT_BACKUP_COUNT'] = int(os.getenv("AUDIT_BACKUP_COUNT", 5))
 
     # Template folder for rendering HTML
     TEMPLATE_FOLDER = os.path.join(current_dir, 'templates')
@@ -54,6 +112,11 @@ def create_app():
     # JWT
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", "revive_token_key")
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=10)
+    # Password hashing: werkzeug method string (algorithm + cost) and size of the hashing process pool
+    app.config["PASSWORD_HASH_METHOD"] = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    # Upper bound (seconds) for another worker to notice a bumped session_version
+    app.config["SESSION_VERSION_TTL"] = int(os.getenv("SESSION_VERSION_TTL", 60))
 
     # CORS
     CORS(app,
@@ -73,14 +136,17 @@ def create_app():
 
     # Extensions
     db.init_app(app)
+    init_sqlite_profile(app, db)
+    init_reporting_engine(app, db)
+    init_sql_instrumentation(app, db)
+    slow_query_log.init_app(app, db)
+    metrics.init_app(app, db)
+    result_cache.init_app(app, db.session)
+    audit_trail.init_app(app, db.session)
     JWTManager(app)
+    session_versions.init_app(app)
     api = Api(app)
 
-    @app.before_request
-    def enable_foreign_keys():
-        if 'sqlite' in db.engine.url.drivername:
-            db.session.execute(text('PRAGMA foreign_keys = ON'))
-
     # Routes
     api.add_resource(LoginAPI,        "/api/login")
     api.add_resource(SignupAPI,       "/api/signup", "/api/signup/<int:user_id>")
@@ -97,6 +163,7 @@ def create_app():
     
     api.add_resource(RoleAPI,             "/api/roles", "/api/roles/<int:role_id>")
     api.add_resource(RolePermissionAPI,   '/api/permissions',"/api/roles/<int:role_id>/permissions")
+    api.add_resource(BulkPermissionAPI,   '/api/permissions/bulk')
     api.add_resource(PageAPI,             "/api/pages", "/api/pages/<int:page_id>")
     api.add_resource(GenericAPI,
         '/api/<string:resource>',
@@ -129,16 +196,24 @@ def create_app():
     api.add_resource(InvoiceDownloadResource, '/api/invoices/<int:invoice_id>/download')
     api.add_resource(InvoiceDeleteResource, '/api/invoices/<int:invoice_id>')
     api.add_resource(InvoiceExportResource, '/api/invoices/export')
-
-    # Create tables & seed
+    api.add_resource(ResultCacheStatsAPI, '/api/system/cache')
+    api.add_resource(HealthAPI, '/api/health')
+    api.add_resource(ReadinessAPI, '/api/ready')
+    api.add_resource(SlowQueryLogAPI, '/api/system/slow-queries')
+    api.add_resource(MetricsAPI, '/metrics')
+    api.add_resource(BookingFeedResource, '/api/bookings')
+    api.add_resource(BulkBookingImportResource, '/api/bookings/import/<string:booking_type>')
+    api.add_resource(AuditLogAPI, '/api/audit', '/api/audit/<string:table_name>/<int:row_id>')
+
+    # Create tables & seed; skipped when app_meta already holds this schema/seed version
     with app.app_context():
-        db.create_all()
-        initialize_system()
+        initialize_system(force=os.getenv("FORCE_SEED") == "1")
 
     return app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Development server only; production runs `gunicorn -c gunicorn.conf.py wsgi:app`
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv("FLASK_DEBUG", "1") == "1")
 
@@ -0,0 +1,43 @@
+# tests/conftest.py
+"""
+App fixtures on a throwaway SQLite file. main.py builds the app at import time, so the
+environment is set before anything imports it.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+_db_dir = tempfile.mkdtemp(prefix='babal-tests-')
+os.environ.update({
+    'DATABASE_URL': 'sqlite:///' + os.path.join(_db_dir, 'test.sqlite3'),
+    'PASSWORD_HASH_WORKERS': '0',
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    'RESULT_CACHE_BACKEND': 'memory',
+    'AUDIT_BACKEND': 'none',
+    'SLOW_QUERY_LOG': '0',
+    'METRICS_ENABLED': '0',
+})
+
+
+@pytest.fixture(scope='session')
+def app():
+    from main import app
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(client):
+    response = client.post('/api/login', json={'name': 'admin', 'password': 'admin'})
+    assert response.status_code == 200, response.json
+    return {'Authorization': 'Bearer ' + response.json['token']}
@@ -0,0 +1,42 @@
+# tests/test_bulk_booking_import.py
+import pytest
+
+from applications.model import Customer, Service
+
+
+@pytest.fixture
+def customer_id(app):
+    from applications.model import db
+    with app.app_context():
+        customer = Customer(name='Import Customer', wallet_balance=100, credit_limit=0)
+        db.session.add(customer)
+        db.session.commit()
+        yield customer.id
+        Service.query.filter_by(customer_id=customer.id).delete()
+        db.session.delete(db.session.get(Customer, customer.id))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('amount', ['nan', 'inf', '-inf', 'NaN'])
+def test_non_finite_amounts_are_row_errors(app, client, admin_headers, customer_id, amount):
+    rows = [
+        {'customer_id': customer_id, 'customer_charge': 10, 'customer_payment_mode': 'cash', 'date': '2026-10-01'},
+        {'customer_id': customer_id, 'customer_charge': amount, 'customer_payment_mode': 'cash', 'date': '2026-10-01'},
+    ]
+    response = client.post('/api/bookings/import/service', json={'rows': rows}, headers=admin_headers)
+    assert response.status_code == 207, response.json
+    assert response.json['errors'] == [{'index': 1, 'error': 'customer_charge must be a finite number'}]
+    with app.app_context():
+        assert Service.query.filter_by(customer_id=customer_id).count() == 0
+
+
+def test_valid_rows_are_booked(app, client, admin_headers, customer_id):
+    rows = [
+        {'customer_id': customer_id, 'customer_charge': 30, 'customer_payment_mode': 'wallet', 'date': '2026-10-01'},
+        {'customer_id': customer_id, 'customer_charge': 20.5, 'customer_payment_mode': 'cash', 'date': '2026-10-02'},
+    ]
+    response = client.post('/api/bookings/import/service', json={'rows': rows}, headers=admin_headers)
+    assert response.status_code == 201, response.json
+    assert [row['index'] for row in response.json['rows']] == [0, 1]
+    with app.app_context():
+        assert Customer.query.get(customer_id).wallet_balance == 70
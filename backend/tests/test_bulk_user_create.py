@@ -0,0 +1,61 @@
+# tests/test_bulk_user_create.py
+import io
+
+from applications.model import User
+
+
+def _role_id(app):
+    with app.app_context():
+        return User.query.filter_by(name='admin').first().role_id
+
+
+def _stored(app, names):
+    with app.app_context():
+        return {u.name: (u.email, u.emp_id, u.status)
+                for u in User.query.filter(User.name.in_(names))}
+
+
+def test_rows_with_different_optional_fields(app, client, admin_headers):
+    role_id = _role_id(app)
+    users = [
+        {'name': 'mixed_a', 'full_name': 'Mixed A', 'password': 'Passw0rd!', 'role_id': role_id,
+         'email': 'a@example.com'},
+        {'name': 'mixed_b', 'full_name': 'Mixed B', 'password': 'Passw0rd!', 'role_id': role_id},
+        {'name': 'mixed_c', 'full_name': 'Mixed C', 'password': 'Passw0rd!', 'role_id': role_id,
+         'email': 'c@example.com', 'emp_id': 9003, 'status': 'inactive'},
+    ]
+    response = client.post('/api/users/bulk', json={'users': users}, headers=admin_headers)
+    assert response.status_code == 201, response.json
+    assert _stored(app, ['mixed_a', 'mixed_b', 'mixed_c']) == {
+        'mixed_a': ('a@example.com', None, 'active'),
+        'mixed_b': (None, None, 'active'),
+        'mixed_c': ('c@example.com', 9003, 'inactive'),
+    }
+
+
+def test_first_row_without_optional_fields(app, client, admin_headers):
+    role_id = _role_id(app)
+    users = [
+        {'name': 'sparse_a', 'full_name': 'Sparse A', 'password': 'Passw0rd!', 'role_id': role_id},
+        {'name': 'sparse_b', 'full_name': 'Sparse B', 'password': 'Passw0rd!', 'role_id': role_id,
+         'email': 'b@example.com', 'emp_id': 9102},
+    ]
+    response = client.post('/api/users/bulk', json={'users': users}, headers=admin_headers)
+    assert response.status_code == 201, response.json
+    assert _stored(app, ['sparse_a', 'sparse_b'])['sparse_b'] == ('b@example.com', 9102, 'active')
+
+
+def test_csv_with_blank_cells(app, client, admin_headers):
+    role_id = _role_id(app)
+    csv_data = (
+        "name,full_name,password,email,role_id,emp_id\n"
+        f"csv_a,CSV A,Passw0rd!,,{role_id},\n"
+        f"csv_b,CSV B,Passw0rd!,csvb@example.com,{role_id},9202\n"
+    )
+    response = client.post('/api/users/bulk', headers=admin_headers, content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(csv_data.encode()), 'users.csv')})
+    assert response.status_code == 201, response.json
+    assert _stored(app, ['csv_a', 'csv_b']) == {
+        'csv_a': (None, None, 'active'),
+        'csv_b': ('csvb@example.com', 9202, 'active'),
+    }
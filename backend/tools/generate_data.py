@@ -0,0 +1,668 @@
+# tools/generate_data.py
+"""
+Fill a fresh database with synthetic, production-shaped data.
+
+The app boots against the target database, so the schema, pages, roles and admin user come
+from the normal bootstrap. Everything else is bulk-inserted into the model tables in chunks.
+Generated rows:
+- staff users
+- lookups: locations, ticket/visa types, particulars
+- customers, agents, partners and passengers
+- years of tickets, visas and services, in a booked/cancelled mix
+- payments, receipts, refunds and wallet transfers
+- the CompanyAccountBalance ledger
+- invoices and attachments
+
+Events are replayed in date order with the same wallet/credit and ledger rules as the
+booking, cancellation and transaction APIs:
+- a wallet payment the customer cannot cover falls back to cash
+- ledger rows carry running per-mode balances
+- the final entity balances are written back at the end
+
+The output depends only on --seed, --end-date and the volume options.
+
+    cd backend
+    python tools/generate_data.py --database generated.sqlite3 --bookings 1000000 --years 3 --seed 7
+    python tools/generate_data.py --database sqlite:////tmp/small.sqlite3 --bookings 20000 --force
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+FIRST_NAMES = ['Mohammed', 'Ahmed', 'Fatima', 'Aisha', 'Rahul', 'Priya', 'John', 'Maria', 'Ali', 'Sara',
+               'Omar', 'Noor', 'Arjun', 'Anjali', 'Yusuf', 'Mariam', 'David', 'Grace', 'Hassan', 'Leila',
+               'Vikram', 'Deepa', 'Ibrahim', 'Zainab', 'Thomas', 'Ana', 'Khalid', 'Huda', 'Suresh', 'Lakshmi']
+LAST_NAMES = ['Khan', 'Sharma', 'Rahman', 'Nair', 'Fernandes', 'Hussain', 'Pillai', 'Ali', 'Menon', 'Das',
+              'Kumar', 'Siddiqui', 'Joseph', 'Qureshi', 'Varghese', 'Abdullah', 'Iyer', 'Mathew', 'Sheikh', 'Reddy']
+COMPANY_WORDS = ['Al Noor', 'Blue Sky', 'Crescent', 'Emerald', 'Falcon', 'Gulf', 'Horizon', 'Oasis', 'Pearl',
+                 'Royal', 'Silver Line', 'Star', 'Summit', 'Sunrise', 'Travel Point', 'Zenith']
+COMPANY_SUFFIXES = ['Travels', 'Tours', 'Trading', 'Holidays', 'Enterprises', 'Services', 'Group', 'Agency']
+CITIES = ['Dubai', 'Abu Dhabi', 'Doha', 'Riyadh', 'Jeddah', 'Muscat', 'Kuwait City', 'Manama', 'Mumbai',
+          'Delhi', 'Kochi', 'Chennai', 'Hyderabad', 'Karachi', 'Lahore', 'Dhaka', 'Colombo', 'Kathmandu',
+          'Cairo', 'Istanbul', 'London', 'Manchester', 'Paris', 'Frankfurt', 'Singapore', 'Kuala Lumpur',
+          'Bangkok', 'Manila', 'Jakarta', 'Toronto', 'New York', 'Nairobi']
+COUNTRIES = ['India', 'Pakistan', 'Bangladesh', 'Sri Lanka', 'Nepal', 'Philippines', 'Egypt', 'UAE', 'UK']
+TICKET_TYPES = ['Economy', 'Premium Economy', 'Business', 'First', 'Group Fare']
+VISA_TYPES = ['Tourist 30 Days', 'Tourist 90 Days', 'Visit 60 Days', 'Business', 'Transit 96 Hours',
+              'Employment', 'Family Visit', 'Student']
+PARTICULARS = ['Air Ticket', 'Visa Processing', 'Hotel Booking', 'Travel Insurance', 'Document Attestation',
+               'Passport Renewal', 'Airport Transfer', 'Tour Package', 'Office Rent', 'Salaries', 'Utilities']
+ATTACHMENT_NAMES = ['passport.pdf', 'visa_copy.pdf', 'e_ticket.pdf', 'receipt.jpg', 'emirates_id.png',
+                    'photo.jpg', 'invoice_copy.pdf']
+
+PAYMENT_MODES = (['cash', 'online', 'wallet'], [45, 35, 20])
+AGENT_PAYMENT_MODES = (['cash', 'online', 'wallet'], [30, 30, 40])
+REFUND_MODES = (['cash', 'online', 'wallet'], [35, 25, 40])
+BOOKING_KINDS = (['ticket', 'visa', 'service'], [60, 25, 15])
+CANCEL_RATE = {'ticket': 0.08, 'visa': 0.05, 'service': 0.04}
+STAFF_PASSWORD = 'Password#123'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', default='generated.sqlite3',
+                        help='SQLite file path or SQLAlchemy URL (default: backend/generated.sqlite3)')
+    parser.add_argument('--force', action='store_true', help='replace an existing SQLite file')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--end-date', type=date.fromisoformat, default=date.today(),
+                        help='last booking date, YYYY-MM-DD (default: today; pin it for repeatable output)')
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--bookings', type=int, default=100000, help='tickets + visas + services')
+    parser.add_argument('--transactions', type=int, help='payments/receipts/refunds/transfers (default: bookings / 5)')
+    parser.add_argument('--customers', type=int, help='default: bookings / 200, at least 50')
+    parser.add_argument('--agents', type=int, default=60)
+    parser.add_argument('--partners', type=int, default=15)
+    parser.add_argument('--passengers', type=int, help='default: bookings / 4')
+    parser.add_argument('--staff', type=int, default=8, help='staff users that appear in updated_by')
+    parser.add_argument('--invoices', type=int, help='default: customers * 2')
+    parser.add_argument('--attachments', type=int, help='default: bookings / 50')
+    parser.add_argument('--attachment-files', action='store_true',
+                        help='also write a small placeholder file per attachment under UPLOAD_FOLDER')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='rows per INSERT batch')
+    args = parser.parse_args()
+
+    args.transactions = args.bookings // 5 if args.transactions is None else args.transactions
+    args.customers = max(50, args.bookings // 200) if args.customers is None else args.customers
+    args.passengers = max(100, args.bookings // 4) if args.passengers is None else args.passengers
+    args.invoices = args.customers * 2 if args.invoices is None else args.invoices
+    args.attachments = args.bookings // 50 if args.attachments is None else args.attachments
+    return args
+
+
+def database_url(args):
+    if '://' in args.database:
+        return args.database
+    path = os.path.abspath(os.path.join(BACKEND_DIR, args.database))
+    if os.path.exists(path):
+        if not args.force:
+            sys.exit(f"{path} exists; pass --force to replace it")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return 'sqlite:///' + path
+
+
+class Generator:
+    def __init__(self, args, engine, models):
+        self.args = args
+        self.engine = engine
+        self.models = models
+        self.rng = random.Random(args.seed)
+        self.end = datetime.combine(args.end_date, datetime.max.time()).replace(microsecond=0)
+        self.start = datetime.combine(args.end_date - timedelta(days=int(args.years * 365)), datetime.min.time())
+
+        self.buffers = defaultdict(list)
+        self.inserted = Counter()
+        self.ids = Counter()
+        self.ref_seq = Counter()
+        self.cancellations = []  # heap of (when, seq, kind, booking row)
+        self.seq = 0
+
+        # Running balances, indexed by entity id (index 0 unused)
+        self.ledger = {'cash': 0.0, 'online': 0.0}
+        self.customers = [None]  # [wallet_balance, credit_limit, credit_used]
+        self.agents = [None]     # [wallet_balance, credit_limit, credit_balance]
+        self.partners = [None]   # [wallet_balance, allow_negative_wallet]
+        self.names = {'customer': [None], 'agent': [None], 'partner': [None]}
+
+    # ---- bulk insert plumbing -------------------------------------------------------------
+
+    def next_id(self, table):
+        self.ids[table] += 1
+        return self.ids[table]
+
+    def add(self, model, row):
+        rows = self.buffers[model]
+        rows.append(row)
+        if len(rows) >= self.args.chunk_size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        for m in ([model] if model else list(self.buffers)):
+            rows = self.buffers.pop(m, None)
+            if rows:
+                with self.engine.begin() as conn:
+                    conn.execute(m.__table__.insert(), rows)
+                self.inserted[m.__tablename__] += len(rows)
+
+    def ref_no(self, when, prefix, width=5):
+        key = (when.year, prefix)
+        self.ref_seq[key] += 1
+        return f"{when.year}/{prefix}/{self.ref_seq[key]:0{width}d}"
+
+    def weighted(self, options):
+        values, weights = options
+        return self.rng.choices(values, weights)[0]
+
+    def skewed_picker(self, count, exponent=0.9):
+        """A few regulars account for most of the volume, like real customer books."""
+        ids = list(range(1, count + 1))
+        self.rng.shuffle(ids)
+        cumulative, total = [], 0.0
+        for rank in range(count):
+            total += 1 / (rank + 1) ** exponent
+            cumulative.append(total)
+        return lambda: self.rng.choices(ids, cum_weights=cumulative)[0]
+
+    def moment(self, day):
+        return day + timedelta(seconds=self.rng.randint(8 * 3600, 21 * 3600))
+
+    # ---- reference data -------------------------------------------------------------------
+
+    def generate_reference_data(self):
+        from applications.password_hashing import hash_password
+        m = self.models
+        created = self.start - timedelta(days=30)
+        for model, names in ((m.TravelLocation, CITIES), (m.TicketType, TICKET_TYPES),
+                             (m.VisaType, VISA_TYPES), (m.Particular, PARTICULARS)):
+            for name in names:
+                self.add(model, {'id': self.next_id(model.__tablename__), 'name': name, 'active': True})
+
+        staff_role_id = m.Role.query.filter_by(name='user').one().id
+        password = hash_password(STAFF_PASSWORD)
+        self.staff = []
+        for i in range(1, self.args.staff + 1):
+            name = f"staff{i:02d}"
+            self.staff.append(name)
+            self.add(m.User, {
+                'name': name, 'full_name': f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                'password': password, 'role_id': staff_role_id, 'status': 'active',
+                'email': f"{name}@example.com", 'last_seen': created, 'session_version': 1,
+            })
+
+        for i in range(1, self.args.customers + 1):
+            name = f"{self.rng.choice(COMPANY_WORDS)} {self.rng.choice(COMPANY_SUFFIXES)} {i}" \
+                if self.rng.random() < 0.4 else f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {i}"
+            credit_limit = self.rng.choice([0, 0, 0, 5000, 10000, 25000])
+            self.customers.append([0.0, float(credit_limit), 0.0])
+            self.names['customer'].append(name)
+            self.add(m.Customer, {
+                'id': i, 'name': name, 'contact': self.phone(), 'email': self.email(name),
+                'active': self.rng.random() > 0.03, 'wallet_balance': 0.0,
+                'credit_limit': float(credit_limit), 'credit_used': 0.0,
+            })
+
+        for i in range(1, self.args.agents + 1):
+            name = f"{self.rng.choice(COMPANY_WORDS)} {self.rng.choice(['Air', 'Visa', 'Holidays', 'Consolidators'])} {i}"
+            credit_limit = float(self.rng.choice([25000, 50000, 100000, 250000]))
+            self.agents.append([0.0, credit_limit, credit_limit])
+            self.names['agent'].append(name)
+            self.add(m.Agent, {
+                'id': i, 'name': name, 'contact': self.phone(), 'email': self.email(name), 'active': True,
+                'wallet_balance': 0.0, 'credit_limit': credit_limit, 'credit_balance': credit_limit,
+            })
+
+        for i in range(1, self.args.partners + 1):
+            name = f"{self.rng.choice(COMPANY_WORDS)} Partners {i}"
+            allow_negative = self.rng.random() < 0.3
+            self.partners.append([0.0, allow_negative])
+            self.names['partner'].append(name)
+            self.add(m.Partner, {
+                'id': i, 'name': name, 'contact': self.phone(), 'email': self.email(name), 'active': True,
+                'wallet_balance': 0.0, 'allow_negative_wallet': allow_negative,
+            })
+
+        for i in range(1, self.args.passengers + 1):
+            born = date(1950, 1, 1) + timedelta(days=self.rng.randint(0, 365 * 55))
+            issued = self.start.date() - timedelta(days=self.rng.randint(0, 365 * 8))
+            self.add(m.Passenger, {
+                'id': i, 'salutation': self.rng.choice(['Mr', 'Mrs', 'Ms']),
+                'first_name': self.rng.choice(FIRST_NAMES),
+                'middle_name': self.rng.choice(FIRST_NAMES) if self.rng.random() < 0.2 else None,
+                'last_name': self.rng.choice(LAST_NAMES), 'contact': self.phone(),
+                # Unique by construction; about one in ten passengers has no passport on file
+                'passport_number': f"{self.rng.choice('JKLMNPRSTUZ')}{i:08d}" if self.rng.random() > 0.1 else None,
+                'date_of_birth': born, 'passport_issue_date': issued,
+                'passport_expiry': issued + timedelta(days=3652),
+                'nationality': self.rng.choice(COUNTRIES), 'country': self.rng.choice(COUNTRIES),
+                'city': self.rng.choice(CITIES), 'active': True,
+            })
+        self.flush()
+
+    def phone(self):
+        return f"+971 5{self.rng.randint(0, 9)} {self.rng.randint(100, 999)} {self.rng.randint(1000, 9999)}"
+
+    def email(self, name):
+        return name.lower().replace(' ', '.') + '@example.com' if self.rng.random() < 0.7 else None
+
+    # ---- money rules (mirrors common_booking_resource / service_api / transaction_api) -----
+
+    def post_ledger(self, mode, amount, when, ref_no, transaction_type, action, user):
+        if mode not in ('cash', 'online') or not amount:
+            return
+        balance = self.ledger[mode] = round(self.ledger[mode] + amount, 2)
+        self.add(self.models.CompanyAccountBalance, {
+            'id': self.next_id('company_account_balance'), 'mode': mode, 'credited_amount': amount,
+            'credited_date': when, 'balance': balance, 'ref_no': ref_no, 'transaction_type': transaction_type,
+            'action': action, 'updated_by': user, 'updated_at': when,
+        })
+
+    def customer_can_pay(self, customer_id, amount):
+        wallet, limit, used = self.customers[customer_id]
+        return wallet + (limit - used) >= amount
+
+    def charge_customer(self, customer_id, amount):
+        c = self.customers[customer_id]
+        if c[0] >= amount:
+            c[0] -= amount
+        else:
+            c[2] += amount - c[0]
+            c[0] = 0
+
+    def credit_customer(self, customer_id, amount):
+        c = self.customers[customer_id]
+        repay = min(c[2], amount)
+        c[2] -= repay
+        c[0] += amount - repay
+
+    def agent_can_pay(self, agent_id, amount):
+        wallet, _, credit = self.agents[agent_id]
+        return wallet + credit >= amount
+
+    def charge_agent(self, agent_id, amount):
+        a = self.agents[agent_id]
+        if a[0] >= amount:
+            a[0] -= amount
+        else:
+            a[2] -= amount - a[0]
+            a[0] = 0
+
+    def credit_agent(self, agent_id, amount):
+        a = self.agents[agent_id]
+        repay = min(a[1] - a[2], amount)
+        a[2] += repay
+        a[0] += amount - repay
+
+    @staticmethod
+    def account_mode(row):
+        agent = row.get('agent_id')
+        for mode in (row['customer_payment_mode'], row.get('agent_payment_mode') if agent else None,
+                     row.get('customer_refund_mode'), row.get('agent_recovery_mode') if agent else None):
+            if mode in ('cash', 'online'):
+                return mode
+        return None
+
+    # ---- bookings -------------------------------------------------------------------------
+
+    def book(self, kind, when):
+        rng = self.rng
+        customer_id = self.pick_customer()
+        user = rng.choice(self.staff)
+        sigma_mu = {'ticket': (6.2, 0.6), 'visa': (5.8, 0.4), 'service': (4.5, 0.7)}[kind]
+        charge = round(rng.lognormvariate(*sigma_mu), 2)
+        mode = self.weighted(PAYMENT_MODES)
+        if mode == 'wallet' and not self.customer_can_pay(customer_id, charge):
+            mode = 'cash'
+
+        row = {
+            'customer_id': customer_id, 'particular_id': rng.randint(1, 4) if rng.random() < 0.3 else None,
+            'description': None, 'date': when.date(), 'status': 'booked', 'customer_charge': charge,
+            'customer_payment_mode': mode, 'customer_refund_amount': 0.0, 'customer_refund_mode': None,
+            'created_at': when, 'updated_at': None, 'updated_by': user,
+        }
+        model = {'ticket': self.models.Ticket, 'visa': self.models.Visa, 'service': self.models.Service}[kind]
+        row['id'] = self.next_id(kind)
+        row['ref_no'] = self.ref_no(when, kind[0].upper())
+
+        if kind != 'service':
+            agent_id = rng.randint(1, self.args.agents) if rng.random() < 0.85 else None
+            agent_paid = round(charge * rng.uniform(0.82, 0.96), 2) if agent_id else 0.0
+            agent_mode = self.weighted(AGENT_PAYMENT_MODES) if agent_id else 'cash'
+            if agent_mode == 'wallet' and not self.agent_can_pay(agent_id, agent_paid):
+                agent_mode = 'cash'
+            row.update({
+                'agent_id': agent_id,
+                'partner_id': rng.randint(1, self.args.partners) if rng.random() < 0.05 else None,
+                'travel_location_id': rng.randint(1, len(CITIES)),
+                'passenger_id': rng.randint(1, self.args.passengers) if rng.random() < 0.95 else None,
+                'agent_paid': agent_paid, 'profit': round(charge - agent_paid, 2),
+                'agent_payment_mode': agent_mode, 'agent_recovery_amount': 0.0, 'agent_recovery_mode': None,
+            })
+            if kind == 'ticket':
+                row['ticket_type_id'] = rng.choices(range(1, len(TICKET_TYPES) + 1), [70, 8, 12, 2, 8])[0]
+            else:
+                row['visa_type_id'] = rng.randint(1, len(VISA_TYPES))
+
+        if mode == 'wallet':
+            self.charge_customer(customer_id, charge)
+        if kind == 'service':
+            self.post_ledger(mode, charge, when, row['ref_no'], 'service', 'book', user)
+        else:
+            if row['agent_id'] and agent_mode == 'wallet' and agent_paid > 0:
+                self.charge_agent(row['agent_id'], agent_paid)
+            net = (charge if mode in ('cash', 'online') else 0) - \
+                  (agent_paid if row['agent_id'] and agent_mode in ('cash', 'online') else 0)
+            if net:
+                self.post_ledger(self.account_mode(row), round(net, 2), when, row['ref_no'], kind, 'book', user)
+
+        cancel_at = self.moment(when.replace(hour=0, minute=0, second=0) + timedelta(days=rng.randint(1, 45)))
+        if rng.random() < CANCEL_RATE[kind] and cancel_at <= self.end:
+            # Final row values are written now; the money moves when the replay reaches cancel_at
+            row.update({
+                'status': 'cancelled', 'updated_at': cancel_at,
+                'customer_refund_amount': round(charge * rng.choice([1, 1, 0.9, 0.75, 0.5]), 2),
+                'customer_refund_mode': self.weighted(REFUND_MODES),
+            })
+            if kind != 'service' and row['agent_id']:
+                row['agent_recovery_amount'] = round(row['agent_paid'] * rng.choice([1, 0.9, 0.75]), 2)
+                row['agent_recovery_mode'] = self.weighted(REFUND_MODES)
+            self.seq += 1
+            heapq.heappush(self.cancellations, (cancel_at, self.seq, kind, dict(row)))
+
+        self.add(model, row)
+        if rng.random() < self.attachment_rate:
+            self.attach(kind, row['id'], row['ref_no'], when)
+
+    def cancel(self, kind, row, when):
+        user = self.rng.choice(self.staff)
+        refund, refund_mode = row['customer_refund_amount'], row['customer_refund_mode']
+        if kind == 'service':
+            if refund_mode == 'wallet':
+                c = self.customers[row['customer_id']]
+                restore = min(refund, min(row['customer_charge'], c[2]))
+                c[2] -= restore
+                c[0] += refund - restore
+            else:
+                self.post_ledger(refund_mode, -refund, when, row['ref_no'], 'service', 'refund', user)
+            return
+
+        if refund_mode == 'wallet':
+            self.credit_customer(row['customer_id'], refund)
+        if row['agent_id'] and row['agent_recovery_mode'] == 'wallet':
+            self.credit_agent(row['agent_id'], row['agent_recovery_amount'])
+        net = (-refund if refund_mode in ('cash', 'online') else 0) + \
+              (row['agent_recovery_amount'] if row['agent_id'] and row['agent_recovery_mode'] in ('cash', 'online') else 0)
+        if net:
+            mode = self.account_mode(row)
+            if mode:
+                self.post_ledger(mode, round(net, 2), when, row['ref_no'], kind, 'cancel', user)
+
+    # ---- payments / receipts / refunds / transfers ----------------------------------------
+
+    def transact(self, when):
+        rng = self.rng
+        roll = rng.random()
+        user = rng.choice(self.staff)
+        mode = rng.choice(['cash', 'online'])
+        amount = round(rng.lognormvariate(7.0, 0.8), 2)
+        extra = dict.fromkeys(['refund_direction', 'deduct_from_account', 'credit_to_account', 'from_entity_type',
+                               'from_entity_id', 'to_entity_type', 'to_entity_id', 'mode_for_from', 'mode_for_to'])
+        entity_type, entity_id, pay_type, direction = 'others', None, None, None
+
+        if roll < 0.45:
+            ttype, direction = 'receipt', 1
+            sub = rng.random()
+            if sub < 0.6:
+                entity_type, entity_id, pay_type = 'customer', self.pick_customer(), 'cash_deposit'
+                self.credit_customer(entity_id, amount)
+                extra['credited_entity'] = True
+            elif sub < 0.8:
+                entity_type, entity_id, pay_type = 'partner', rng.randint(1, self.args.partners), 'cash_deposit'
+                self.partners[entity_id][0] += amount
+                extra['credited_entity'] = True
+            else:
+                pay_type = 'other_receipt'
+        elif roll < 0.78:
+            ttype, direction = 'payment', -1
+            sub = rng.random()
+            if sub < 0.6:
+                entity_type, entity_id, pay_type = 'agent', rng.randint(1, self.args.agents), 'cash_deposit'
+                self.credit_agent(entity_id, amount)
+                extra['credited_entity'] = True
+            elif sub < 0.7 and self.customers[(cid := self.pick_customer())][0] > 50:
+                amount = round(min(amount, self.customers[cid][0]), 2)
+                entity_type, entity_id, pay_type = 'customer', cid, 'cash_withdrawal'
+                self.charge_customer(cid, amount)
+                extra['debited_entity'] = True
+            else:
+                amount = round(amount / 2, 2)
+                pay_type = 'other_expense'
+        elif roll < 0.9:
+            ttype, pay_type = 'refund', 'refund'
+            amount = round(amount / 3, 2)
+            if rng.random() < 0.6:
+                direction = -1
+                entity_type, entity_id = 'customer', self.pick_customer()
+                extra.update(refund_direction='outgoing', from_entity_type='others', to_entity_type='customer',
+                             to_entity_id=entity_id, mode_for_from=mode, mode_for_to=mode)
+            else:
+                direction = 1
+                entity_type, entity_id = 'agent', rng.randint(1, self.args.agents)
+                extra.update(refund_direction='incoming', from_entity_type='agent', from_entity_id=entity_id,
+                             to_entity_type='others', mode_for_from=mode, mode_for_to=mode)
+        else:
+            source = self.pick_customer()
+            if self.customers[source][0] < 50:
+                return self.transact(when)  # nothing to move; draw another transaction instead
+            ttype = pay_type = entity_type = 'wallet_transfer'
+            mode = 'wallet'
+            amount = round(min(amount, self.customers[source][0]), 2)
+            to_type = rng.choice(['customer', 'agent', 'partner'])
+            to_id = self.pick_customer() if to_type == 'customer' else \
+                rng.randint(1, self.args.agents if to_type == 'agent' else self.args.partners)
+            self.charge_customer(source, amount)
+            if to_type == 'customer':
+                self.credit_customer(to_id, amount)
+            elif to_type == 'agent':
+                self.credit_agent(to_id, amount)
+            else:
+                self.partners[to_id][0] += amount
+            extra = {'from_entity_type': 'customer', 'from_entity_id': source,
+                     'to_entity_type': to_type, 'to_entity_id': to_id,
+                     'from_entity_name': self.names['customer'][source],
+                     'to_entity_name': self.names[to_type][to_id]}
+
+        ref_no = self.ref_no(when, self.ref_prefixes[ttype])
+        if direction:
+            self.post_ledger(mode, direction * amount, when, ref_no, ttype, 'add', user)
+            extra['company_adjusted'] = True
+        transaction_id = self.next_id('transaction')
+        self.add(self.models.Transaction, {
+            'id': transaction_id, 'ref_no': ref_no, 'entity_type': entity_type, 'entity_id': entity_id,
+            'pay_type': pay_type, 'transaction_type': ttype, 'mode': mode, 'amount': amount, 'date': when,
+            'description': None, 'particular_id': rng.randint(1, len(PARTICULARS)) if pay_type == 'other_expense' else None,
+            'customer_refund_amount': 0.0, 'agent_deduction_amount': 0.0, 'mode_for_customer': 'cash',
+            'mode_for_agent': 'wallet', 'updated_by': user, 'extra_data': extra,
+        })
+        if rng.random() < self.attachment_rate:
+            self.attach('transaction', transaction_id, ref_no, when, subfolder=ttype)
+
+    # ---- attachments / invoices -----------------------------------------------------------
+
+    def attach(self, parent_type, parent_id, ref_no, when, subfolder=None):
+        file_name = self.rng.choice(ATTACHMENT_NAMES)
+        stored = f"{ref_no.replace('/', '-')}_{when:%Y%m%d%H%M%S}_{file_name}"
+        file_path = os.path.join(parent_type, *([subfolder] if subfolder else []), stored)
+        self.add(self.models.Attachment, {
+            'file_name': file_name, 'file_path': file_path, 'parent_type': parent_type,
+            'parent_id': parent_id, 'created_at': when,
+        })
+        if self.args.attachment_files:
+            absolute = os.path.join(self.upload_folder, file_path)
+            os.makedirs(os.path.dirname(absolute), exist_ok=True)
+            with open(absolute, 'wb') as fh:
+                fh.write(f"placeholder attachment for {parent_type} {ref_no}\n".encode())
+
+    def generate_invoices(self):
+        rng = self.rng
+        months = []
+        month = self.start.date().replace(day=1)
+        while month <= self.args.end_date:
+            months.append(month)
+            month = (month + timedelta(days=32)).replace(day=1)
+        letters = {'customer': 'C', 'agent': 'A', 'partner': 'P'}
+        invoices = []
+        for _ in range(self.args.invoices):
+            entity_type = rng.choices(['customer', 'agent', 'partner'], [75, 20, 5])[0]
+            entity_id = self.pick_customer() if entity_type == 'customer' else \
+                rng.randint(1, self.args.agents if entity_type == 'agent' else self.args.partners)
+            period_start = rng.choice(months)
+            period_end = (period_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            generated = self.moment(datetime.combine(period_end, datetime.min.time()) + timedelta(days=rng.randint(1, 5)))
+            invoices.append((generated, entity_type, entity_id, period_start, period_end))
+
+        # Numbers are sequential per year and entity type, in generation order
+        for generated, entity_type, entity_id, period_start, period_end in sorted(invoices, key=lambda i: i[0]):
+            recent = generated > self.end - timedelta(days=45)
+            self.add(self.models.Invoice, {
+                'invoice_number': self.ref_no(generated, f"{letters[entity_type]}/INV", width=3),
+                'entity_type': entity_type, 'entity_id': entity_id,
+                'period_start': period_start, 'period_end': min(period_end, self.args.end_date),
+                'status': 'pending' if recent else rng.choices(['paid', 'pending', 'cancelled'], [80, 12, 8])[0],
+                'generated_date': generated, 'pdf_path': None,
+            })
+
+    # ---- driver ---------------------------------------------------------------------------
+
+    def day_weights(self, days):
+        weights = []
+        for i, day in enumerate(days):
+            growth = 1 + 0.5 * i / len(days)        # the business grows ~50% over the window
+            weekend = 0.6 if day.weekday() in (4, 5) else 1.0
+            season = 1.3 if day.month in (6, 7, 8, 12) else 1.0
+            weights.append(growth * weekend * season)
+        return weights
+
+    def run(self):
+        from applications.transaction_api import REF_NO_PREFIXES
+        self.ref_prefixes = REF_NO_PREFIXES
+        self.attachment_rate = self.args.attachments / max(1, self.args.bookings + self.args.transactions)
+
+        self.generate_reference_data()
+        self.pick_customer = self.skewed_picker(self.args.customers)
+
+        days = [self.start + timedelta(days=i) for i in range((self.end - self.start).days + 1)]
+        weights = self.day_weights(days)
+        cumulative, total = [], 0.0
+        for w in weights:
+            total += w
+            cumulative.append(total)
+        booking_days = Counter(self.rng.choices(range(len(days)), cum_weights=cumulative, k=self.args.bookings))
+        transaction_days = Counter(self.rng.choices(range(len(days)), cum_weights=cumulative, k=self.args.transactions))
+
+        for i, day in enumerate(days):
+            events = [(self.moment(day), n, 'booking') for n in range(booking_days.get(i, 0))]
+            events += [(self.moment(day), len(events) + n, 'transaction') for n in range(transaction_days.get(i, 0))]
+            day_end = day + timedelta(days=1)
+            while self.cancellations and self.cancellations[0][0] < day_end:
+                when, seq, kind, row = heapq.heappop(self.cancellations)
+                events.append((when, -seq, (kind, row)))
+            events.sort(key=lambda e: (e[0], e[1]))
+
+            for when, _, what in events:
+                if what == 'booking':
+                    self.book(self.weighted(BOOKING_KINDS), when)
+                elif what == 'transaction':
+                    self.transact(when)
+                else:
+                    self.cancel(what[0], what[1], when)
+
+        self.generate_invoices()
+        self.flush()
+        self.write_balances()
+
+    def write_balances(self):
+        from sqlalchemy import bindparam
+        m = self.models
+        with self.engine.begin() as conn:
+            conn.execute(
+                m.Customer.__table__.update().where(m.Customer.__table__.c.id == bindparam('_id')),
+                [{'_id': i, 'wallet_balance': round(c[0], 2), 'credit_used': round(c[2], 2)}
+                 for i, c in enumerate(self.customers) if c]
+            )
+            conn.execute(
+                m.Agent.__table__.update().where(m.Agent.__table__.c.id == bindparam('_id')),
+                [{'_id': i, 'wallet_balance': round(a[0], 2), 'credit_balance': round(a[2], 2)}
+                 for i, a in enumerate(self.agents) if a]
+            )
+            conn.execute(
+                m.Partner.__table__.update().where(m.Partner.__table__.c.id == bindparam('_id')),
+                [{'_id': i, 'wallet_balance': round(p[0], 2)} for i, p in enumerate(self.partners) if p]
+            )
+
+
+def close_database(app, engine):
+    """
+    Fold the WAL back into the database file and close every connection. The load runs with
+    synchronous=OFF, and without this most rows stay in the -wal file: a copy of the .sqlite3
+    alone would silently miss them.
+    """
+    from applications.audit import audit_trail
+    audit_trail.flush()
+    reporting_engine = app.extensions.get('reporting_engine')
+    if reporting_engine is not None:
+        reporting_engine.dispose()
+    engine.dispose()
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.connect() as conn:
+        # synchronous is per connection: the checkpoint itself is written durably
+        conn.exec_driver_sql("PRAGMA synchronous=FULL")
+        busy, _, _ = conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+    engine.dispose()
+    if busy:
+        sys.exit("WAL checkpoint was blocked by another connection; the -wal file must stay with the database")
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = database_url(args)
+    # Bulk load: no per-statement instrumentation, and SQLite need not fsync every chunk
+    os.environ.setdefault('SQL_INSTRUMENTATION', '0')
+    os.environ.setdefault('SLOW_QUERY_LOG', '0')
+    os.environ.setdefault('SQLITE_SYNCHRONOUS', 'OFF')
+
+    started = time.perf_counter()
+    from main import app
+    from applications import model
+
+    with app.app_context():
+        if model.db.session.query(model.Ticket.id).first() or model.db.session.query(model.Customer.id).first():
+            sys.exit("Target database already has customers or tickets; generate into a fresh database")
+        model.db.session.remove()
+
+        generator = Generator(args, model.db.engine, model)
+        generator.upload_folder = app.config['UPLOAD_FOLDER']
+        generator.run()
+        close_database(app, model.db.engine)
+
+    elapsed = time.perf_counter() - started
+    total = sum(generator.inserted.values())
+    for table, count in sorted(generator.inserted.items()):
+        print(f"{table:<26} {count:>10,}")
+    print(f"{'total':<26} {total:>10,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    print(f"database: {os.environ['DATABASE_URL']}")
+    print(f"ledger closing balance: cash {generator.ledger['cash']:,.2f}  online {generator.ledger['online']:,.2f}")
+    print(f"staff logins: {', '.join(generator.staff[:3])}{', ...' if len(generator.staff) > 3 else ''} / {STAFF_PASSWORD}")
+
+
+if __name__ == '__main__':
+    main()
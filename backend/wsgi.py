@@ -0,0 +1,37 @@
+# wsgi.py
+"""
+Production entry point:
+
+    cd backend
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Process/thread counts, recycling and timeouts come from environment variables, see
+gunicorn.conf.py. main.py's __main__ block remains the development server.
+"""
+from main import app
+from applications.model import db
+from applications.result_cache import result_cache
+from applications.audit import audit_trail
+from applications.metrics import metrics
+
+
+def reset_after_fork():
+    """
+    Run in every worker right after fork (gunicorn post_fork hook). With preload_app the
+    parent already opened pooled connections while seeding; close=False drops them from
+    this process's pool without closing the parent's sockets/file handles.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    reporting_engine = app.extensions.get('reporting_engine')
+    if reporting_engine is not None:
+        reporting_engine.dispose(close=False)
+    result_cache.after_fork()
+    audit_trail.after_fork()
+    metrics.after_fork()
+
+
+def prepare_for_fork():
+    """Run once in the master before workers fork: write audit records queued by startup seeding."""
+    audit_trail.flush()
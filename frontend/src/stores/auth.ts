@@ -6,7 +6,7 @@ import { nextTick } from 'vue'
 import { hasPermission } from '@/utils/permissions'
 import { jwtDecode } from 'jwt-decode' 
 interface JwtPayload {
-  perms: PermissionOperation[]
+  pm?: Record<string, number>  // compiled {page: level} map, checked server-side
   is_admin: boolean
   session_version: number
   sub: string 
@@ -78,7 +78,7 @@ export const useAuthStore = defineStore('auth', {
     loginSuccess(data: { token: string; user: User }) {
       this.token = data.token
       const decoded = this.decodeToken()
-      console.log('Final permissions:', [...new Set(decoded.perms)]) 
+      console.log('Final permissions:', [...new Set(data.user.perms)]) 
       this.handleUserResponse(data.user, decoded)
       this.persistSession(decoded)
     },
@@ -108,7 +108,7 @@ export const useAuthStore = defineStore('auth', {
     handleUserResponse(apiUser: User, decoded: JwtPayload) {
       this.user = {
         ...apiUser,
-        perms: decoded.perms,
+        perms: apiUser.perms,
         is_admin: decoded.is_admin,
         session_version: decoded.session_version
       }